@@ -25,9 +25,9 @@ class HorseProfileModel(Base):
     __tablename__ = 'horse_profile'
 
     horse_id = Column(String(255), primary_key=True)
-    breeder_id = Column(String(255), nullable=False)
-    owner_id = Column(String(255), nullable=False)
-    trainer_id = Column(String(255), nullable=False)
+    breeder_id = Column(String(255), nullable=False, index=True)
+    owner_id = Column(String(255), nullable=False, index=True)
+    trainer_id = Column(String(255), nullable=False, index=True)
     name = Column(String(255), nullable=False)
     sex = Column(String(255))
     birthday = Column(DateTime)
@@ -89,19 +89,19 @@ class HorseProfileDBGateway(HorseProfileDBGatewayInterface):
         return model.to_entity()
 
     def select_by_breeder(self, breeder_id: str) -> list[HorseProfile]:
-        models: Optional[HorseProfile] = self.__horse_profile.query(HorseProfileModel).filter_by(breeder_id).all()
+        models: Optional[HorseProfile] = self.__horse_profile.query(HorseProfileModel).filter_by(breeder_id=breeder_id).all()
         if models is None:
             raise NotFoundError
         return [model.to_entity() for model in models]
 
     def select_by_owner(self, owner_id: str) -> list[HorseProfile]:
-        models: Optional[HorseProfile] = self.__horse_profile.query(HorseProfileModel).filter_by(owner_id).all()
+        models: Optional[HorseProfile] = self.__horse_profile.query(HorseProfileModel).filter_by(owner_id=owner_id).all()
         if models is None:
             raise NotFoundError
         return [model.to_entity() for model in models]
 
     def select_by_trainer(self, trainer_id: str) -> list[HorseProfile]:
-        models: Optional[HorseProfile] = self.__horse_profile.query(HorseProfileModel).filter_by(trainer_id).all()
+        models: Optional[HorseProfile] = self.__horse_profile.query(HorseProfileModel).filter_by(trainer_id=trainer_id).all()
         if models is None:
             raise NotFoundError
         return [model.to_entity() for model in models]
@@ -141,21 +141,21 @@ class HorseProfileDBGateway(HorseProfileDBGatewayInterface):
             return True
 
     def has_breeder(self, breeder_id: str) -> bool:
-        model: Optional[HorseProfile] = self.__horse_profile.query(HorseProfileModel).get(breeder_id)
+        model: Optional[HorseProfile] = self.__horse_profile.query(HorseProfileModel).filter_by(breeder_id=breeder_id).first()
         if model is None:
             return False
         else:
             return True
 
     def has_owner(self, owner_id: str) -> bool:
-        model: Optional[HorseProfile] = self.__horse_profile.query(HorseProfileModel).get(owner_id)
+        model: Optional[HorseProfile] = self.__horse_profile.query(HorseProfileModel).filter_by(owner_id=owner_id).first()
         if model is None:
             return False
         else:
             return True
 
     def has_trainer(self, trainer_id: str) -> bool:
-        model: Optional[HorseProfile] = self.__horse_profile.query(HorseProfileModel).get(trainer_id)
+        model: Optional[HorseProfile] = self.__horse_profile.query(HorseProfileModel).filter_by(trainer_id=trainer_id).first()
         if model is None:
             return False
         else:
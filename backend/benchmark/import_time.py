@@ -0,0 +1,124 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from tabulate import tabulate
+
+# 計測するエントリポイント (起動時にimportされるモジュール)
+ENTRY_POINTS = [
+    'backend.scrape',
+    'backend.module.repository',
+    'backend.module.preparing',
+    'backend.module.simulation',
+    'backend.db.migrations.migrator',
+    'api.main',
+]
+
+# 起動時にimportされていないことを確認するモジュール (使用する時に初めてimportする)
+HEAVY_MODULES = ['lightgbm', 'sklearn', 'selenium', 'webdriver_manager', 'duckdb', 'pyarrow']
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_importtime(stderr: str) -> dict:
+    """
+    python -X importtime の出力を {モジュール名: (self[us], cumulative[us])} に変換する
+    """
+    times = dict()
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def measure(module: str) -> dict:
+    """
+    新しいインタプリタでmoduleをimportし、起動時間とモジュール毎のimport時間を計測する
+
+    Returns
+    -------
+    measurement: dict
+        wall_ms: インタプリタの起動からimport完了までの時間
+        import_ms: moduleのimportにかかった時間 (cumulative)
+        times: {モジュール名: (self[us], cumulative[us])}
+        error: importに失敗した場合の最後のエラーメッセージ
+    """
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT_DIR,
+        capture_output=True,
+        text=True
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    times = parse_importtime(process.stderr)
+    error = None
+    if process.returncode != 0:
+        error = [line for line in process.stderr.splitlines() if not line.startswith('import time:')][-1:]
+        error = error[0] if error else f'exit code {process.returncode}'
+    return {
+        'wall_ms': wall_ms,
+        'import_ms': times.get(module, (0, 0))[1] / 1000,
+        'times': times,
+        'error': error,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='エントリポイント毎に、python -X importtime で起動時のimport時間を計測する')
+    parser.add_argument('--modules', nargs='*', default=ENTRY_POINTS, help='計測するモジュール')
+    parser.add_argument('--repeat', type=int, default=5, help='モジュール毎の計測回数 (中央値を表示する)')
+    parser.add_argument('--top', type=int, default=5, help='import時間(self)の長いモジュールを何件表示するか')
+    parser.add_argument('--output', default=None, help='計測結果を追記するJSON Linesファイル (起動時間の推移の記録に利用する)')
+    args = parser.parse_args()
+
+    rows = list()
+    records = list()
+    for module in args.modules:
+        measurements = [measure(module) for _ in range(args.repeat)]
+        last = measurements[-1]
+        wall_ms = statistics.median(measurement['wall_ms'] for measurement in measurements)
+        import_ms = statistics.median(measurement['import_ms'] for measurement in measurements)
+        heavy = [name for name in HEAVY_MODULES if name in last['times']]
+        slowest = sorted(last['times'].items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+        rows.append([
+            module,
+            wall_ms,
+            import_ms,
+            len(last['times']),
+            ', '.join(heavy) or '-',
+            last['error'] or '',
+        ])
+        records.append({
+            'module': module,
+            'wall_ms': wall_ms,
+            'import_ms': import_ms,
+            'n_modules': len(last['times']),
+            'heavy_modules': heavy,
+            'slowest': [[name, self_us / 1000] for name, (self_us, _) in slowest],
+            'error': last['error'],
+        })
+    print(tabulate(
+        rows,
+        ['entry point', 'wall ms', 'import ms', 'modules', 'heavy modules', 'error'],
+        tablefmt='presto',
+        floatfmt='.1f'
+    ))
+    for record in records:
+        print(f"\n{record['module']} (self ms)")
+        print(tabulate(record['slowest'], ['module', 'self ms'], tablefmt='presto', floatfmt='.1f'))
+
+    if args.output is not None:
+        measured_at = time.strftime('%Y-%m-%dT%H:%M:%S')
+        with open(args.output, 'a') as f:
+            for record in records:
+                f.write(json.dumps({'measured_at': measured_at, 'python': sys.version.split()[0], **record}, ensure_ascii=False) + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+import argparse
+import itertools
+import re
+import time
+from typing import Callable
+from urllib.parse import urlparse
+from tabulate import tabulate
+from backend.environment.scraping import Scraping
+from backend.module.scraping import (
+    Fetcher,
+    HttpClient,
+    PageCache,
+    RacePageExtractor,
+    HorseProfileExtractor,
+    ShutubaExtractor,
+    PedigreeStore,
+    OddsClient
+)
+from backend.benchmark.stub_server import StubServer
+
+
+def get_extractors(fetcher: Fetcher) -> dict:
+    """
+    ページの種類毎に、スクレイパが利用している解析処理を返す
+    """
+    return {
+        'race': RacePageExtractor(),
+        'horse': HorseProfileExtractor(),
+        'ped': lambda _id, html: PedigreeStore().add_page(_id, html),
+        'shutuba': ShutubaExtractor(),
+        'odds': lambda _id, html: OddsClient(fetcher).parse(html),
+    }
+
+
+def benchmark(server: StubServer, fetcher: Fetcher, kind: str, extract: Callable, n_pages: int) -> list:
+    """
+    kindのページをn_pages件取得・解析し、1秒あたりの取得ページ数と1ページあたりの解析時間を計測する
+
+    Returns
+    -------
+    row: list
+        [種類, ページ数, 取得ページ数/秒, 解析ms/ページ, 取得失敗数, 解析失敗数]
+    """
+    paths = list(itertools.islice(itertools.cycle(server.paths_by_kind[kind]), n_pages))
+    urls = [server.base_url + path for path in paths]
+    start = time.perf_counter()
+    contents = fetcher.fetch_all(urls)
+    fetch_sec = time.perf_counter() - start
+    parse_sec = 0.0
+    n_fetch_errors = 0
+    n_parse_errors = 0
+    for path, url in zip(paths, urls):
+        html = contents[url]
+        if html is None:
+            n_fetch_errors += 1
+            continue
+        _id = re.findall(r'(\w+)/?$|race_id=(\d+)', path)[0]
+        _id = _id[0] or _id[1]
+        start = time.perf_counter()
+        try:
+            extract(_id, html)
+        except (AttributeError, IndexError, KeyError, ValueError):
+            n_parse_errors += 1
+        parse_sec += time.perf_counter() - start
+    n_parsed = max(len(paths) - n_fetch_errors, 1)
+    return [kind, len(paths), len(paths) / fetch_sec, parse_sec / n_parsed * 1000, n_fetch_errors, n_parse_errors]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='ローカルのスタブサーバに対してスクレイパの取得・解析速度を計測する')
+    parser.add_argument('--corpus', default=Scraping.CACHE_DIR, help='ページを保存したPageCacheのディレクトリ')
+    parser.add_argument('--kinds', nargs='*', default=['race', 'horse', 'ped', 'shutuba', 'odds'])
+    parser.add_argument('--n-pages', type=int, default=200, help='種類毎に取得するページ数')
+    parser.add_argument('--latency', type=float, default=0.05, help='1リクエストあたりの平均の応答待ち時間(秒)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='503を返す割合')
+    parser.add_argument('--concurrency', type=int, default=Scraping.MAX_CONCURRENCY)
+    args = parser.parse_args()
+
+    server = StubServer(PageCache(args.corpus), latency=args.latency, error_rate=args.error_rate)
+    base_url = server.start()
+    # ベンチマークではリクエスト頻度を制限しない
+    fetcher = Fetcher(
+        client=HttpClient(pool_size=args.concurrency),
+        max_concurrency=args.concurrency,
+        rate_limits={urlparse(base_url).netloc: (1e6, 10 ** 6)}
+    )
+    extractors = get_extractors(fetcher)
+    rows = list()
+    try:
+        for kind in args.kinds:
+            if not server.paths_by_kind.get(kind):
+                print(f'{kind}のページが保存されていないため、計測を飛ばします。')
+                continue
+            rows.append(benchmark(server, fetcher, kind, extractors[kind], args.n_pages))
+    finally:
+        server.stop()
+    print(tabulate(
+        rows,
+        ['kind', 'pages', 'pages/sec', 'parse ms/page', 'fetch errors', 'parse errors'],
+        tablefmt='presto',
+        floatfmt='.2f'
+    ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import urlparse
+from backend.module.scraping import PageCache
+
+
+class StubServer:
+    """
+    PageCacheに保存したページをnetkeibaの代わりに返すローカルHTTPサーバ
+
+    db.netkeiba.com, race.netkeiba.com のページをパス(クエリを含む)で引けるようにし、
+    Scraping.DB_BASE_URL, Scraping.RACE_BASE_URL をこのサーバに向けることでスクレイパをオフラインで動かす。
+    保存されていないidのページは、同じ種類の保存済みページからパスに応じて決まった1つを返すため、
+    少ない保存済みページから任意の数のページを合成できる。
+
+    Attributes
+    ----------
+    latency: float
+        1リクエストあたりの平均の応答待ち時間(秒)
+    error_rate: float
+        503を返す割合
+    """
+
+    origins = ['https://db.netkeiba.com', 'https://race.netkeiba.com']
+
+    # ページの種類とパスの対応
+    kinds = {
+        'race': r'^/race/\d{12}/?$',
+        'ped': r'^/horse/ped/\w+/?$',
+        'horse': r'^/horse/\w+/?$',
+        'shutuba': r'^/race/shutuba\.html\?',
+        'odds': r'^/api/api_get_jra_odds\.html\?',
+        'calendar': r'^/top/calendar\.html\?',
+        'race_list': r'^/top/race_list_sub\.html\?',
+    }
+
+    def __init__(
+        self,
+        cache: PageCache,
+        host: str = '127.0.0.1',
+        port: int = 0,
+        latency: float = 0.0,
+        error_rate: float = 0.0
+    ) -> None:
+        self.cache = cache
+        self.latency = latency
+        self.error_rate = error_rate
+        self.paths: dict = dict()
+        self.paths_by_kind: dict = {kind: list() for kind in self.kinds}
+        for url in cache.urls():
+            if not any(url.startswith(origin) for origin in self.origins):
+                continue
+            parsed = urlparse(url)
+            path = parsed.path + ('?' + parsed.query if parsed.query else '')
+            self.paths[path] = url
+            kind = self.get_kind(path)
+            if kind is not None:
+                self.paths_by_kind[kind].append(path)
+        self.httpd = ThreadingHTTPServer((host, port), self.__make_handler())
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> str:
+        """
+        別スレッドでサーバを起動し、ベースURLを返す
+        """
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self.base_url
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def get_kind(self, path: str) -> Optional[str]:
+        for kind, pattern in self.kinds.items():
+            if re.match(pattern, path):
+                return kind
+        return None
+
+    def get(self, path: str) -> Optional[bytes]:
+        """
+        pathに対応するページを返す
+        保存されていない場合は同じ種類の保存済みページを返し、種類が分からない場合はNoneを返す
+        """
+        if path in self.paths:
+            return self.cache.get(self.paths[path])
+        kind = self.get_kind(path)
+        if kind is None or not self.paths_by_kind[kind]:
+            return None
+        paths = self.paths_by_kind[kind]
+        return self.cache.get(self.paths[paths[zlib.crc32(path.encode()) % len(paths)]])
+
+    def __make_handler(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self) -> None:
+                if server.latency:
+                    time.sleep(random.uniform(0, 2 * server.latency))
+                if random.random() < server.error_rate:
+                    self.send_response(503)
+                    self.send_header('Retry-After', '0')
+                    self.end_headers()
+                    return
+                content = server.get(self.path)
+                if content is None:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                if server.get_kind(self.path) == 'odds':
+                    self.send_header('Content-Type', 'application/json')
+                else:
+                    self.send_header('Content-Type', 'text/html; charset=EUC-JP')
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format, *args) -> None:
+                pass
+
+        return Handler
@@ -0,0 +1,22 @@
+from backend.db.settings import Base, ENGINE
+from backend.db.migrations.migrator import Migrator
+
+
+def create_table() -> None:
+    """
+    modelsの最新のスキーマでテーブルを作成する
+    新規のデータベースの場合は、全てのマイグレーションを適用済みとして記録する
+    """
+    # 全てのモデルをBase.metadataに登録してから作成する
+    import backend.db.models  # noqa: F401
+    Migrator(ENGINE).create_all(Base.metadata)
+
+
+def delete_table() -> None:
+    Base.metadata.drop_all(bind=ENGINE)
+
+
+if __name__ == "__main__":
+    # データの初期化
+    delete_table()
+    create_table()
@@ -0,0 +1,95 @@
+import json
+import sys
+from datetime import date
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql
+from tabulate import tabulate
+from backend.db.settings import ENGINE
+from backend.db.models import HorseProfile, Result, RaceCard, RaceDateMapping
+from backend.module.crud.read import build_query
+
+# (名前, クエリ, 利用されるべきインデックス)
+# パイプライン(crud.read)とAPI(horse_profileの検索)が発行するクエリと同じ形のもの
+queries = [
+    ('read_result(race_id_ls)', build_query('result', race_id_ls=['202205010101']), 'ix_result_race_id'),
+    ('read_race_card(race_id_ls)', build_query('race_card', race_id_ls=['202205010101']), 'ix_race_card_race_id'),
+    (
+        'read_result(start_date, end_date)',
+        build_query('result', start_date=date(2022, 1, 1), end_date=date(2022, 1, 31)),
+        'ix_race_date_mapping_date_race_id'
+    ),
+    (
+        'race_card by jockey_id',
+        select([RaceCard.race_id, RaceCard.horse_id]).where(RaceCard.jockey_id == '01167'),
+        'ix_race_card_jockey_id'
+    ),
+    (
+        'result by (horse_id, date)',
+        select([Result.race_id, RaceDateMapping.date])
+        .join(RaceDateMapping, Result.race_id == RaceDateMapping.race_id)
+        .where(Result.horse_id == '2019104476', RaceDateMapping.date < date(2022, 6, 1)),
+        'result_pkey'
+    ),
+    ('api select_by_breeder', select([HorseProfile]).where(HorseProfile.breeder_id == '000000'), 'ix_horse_profile_breeder_id'),
+    ('api select_by_owner', select([HorseProfile]).where(HorseProfile.owner_id == '000000'), 'ix_horse_profile_owner_id'),
+    ('api select_by_trainer', select([HorseProfile]).where(HorseProfile.trainer_id == '00000'), 'ix_horse_profile_trainer_id'),
+]
+
+
+def get_index_names(plan: dict) -> set:
+    """
+    EXPLAINの実行計画から利用されているインデックス名を全て取り出す
+    """
+    names = {plan['Index Name']} if 'Index Name' in plan else set()
+    for child in plan.get('Plans', []):
+        names |= get_index_names(child)
+    return names
+
+
+def get_parent_index_names(connection, index_names: set) -> set:
+    """
+    年で分割したテーブル(v004)では、実行計画には年毎のテーブルのインデックス名(result_2022_race_id_idxなど)が出力されるため、
+    pg_inheritsから分割元のテーブルのインデックス名(ix_result_race_idなど)に置き換える
+    """
+    if not index_names:
+        return index_names
+    parents = dict(connection.execute(
+        text(
+            'SELECT child.relname, parent.relname FROM pg_inherits '
+            'JOIN pg_class child ON child.oid = pg_inherits.inhrelid '
+            'JOIN pg_class parent ON parent.oid = pg_inherits.inhparent '
+            'WHERE child.relname = ANY(:names)'
+        ),
+        {'names': list(index_names)}
+    ).fetchall())
+    return {parents.get(name, name) for name in index_names}
+
+
+def check() -> bool:
+    """
+    各クエリの実行計画に想定したインデックスが含まれるか確認する
+    行数が少ないテーブルではシーケンシャルスキャンが選ばれるため、enable_seqscanを無効にして
+    インデックスが利用可能かどうかを確認する
+
+    Returns
+    -------
+    is_ok: bool
+        全てのクエリでインデックスが利用された場合True
+    """
+    rows: list = list()
+    with ENGINE.connect() as connection:
+        transaction = connection.begin()
+        connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+        for name, query, expected in queries:
+            sql = str(query.compile(dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True}))
+            result = connection.exec_driver_sql('EXPLAIN (FORMAT JSON) ' + sql.replace('%', '%%')).scalar()
+            plan = (json.loads(result) if isinstance(result, str) else result)[0]['Plan']
+            index_names = get_parent_index_names(connection, get_index_names(plan))
+            rows.append([name, expected, ', '.join(sorted(index_names)) or '-', 'OK' if expected in index_names else 'NG'])
+        transaction.rollback()
+    print(tabulate(rows, ['query', 'expected', 'used', ''], tablefmt='presto'))
+    return all(row[-1] == 'OK' for row in rows)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if check() else 1)
@@ -0,0 +1,120 @@
+import argparse
+import importlib
+import pkgutil
+from datetime import datetime
+from types import ModuleType
+from typing import Optional
+from sqlalchemy import MetaData, inspect
+from sqlalchemy.engine import Engine
+from backend.db.settings import ENGINE
+import backend.db.migrations as migrations
+
+
+class Migrator:
+    """
+    作成済みのデータベースにスキーマの変更を適用する
+
+    backend.db.migrations の v<番号>_<説明>.py を番号順に適用し、適用済みの番号を schema_migration テーブルに記録する。
+    各マイグレーションは version, upgrade(connection), downgrade(connection) を持ち、1つのトランザクションで適用する。
+    新規に作成するデータベースは、backend.db.mainのcreate_table(create_all)で最新のスキーマを作成し、全てのマイグレーションを適用済みとして記録する。
+    その際、modelsで表現できないもの(ビューなど)は各マイグレーションのbaseline(connection)で作成する。
+
+    Attributes
+    ----------
+    engine: Engine
+        適用先のデータベース
+    """
+
+    def __init__(self, engine: Engine = ENGINE) -> None:
+        self.engine = engine
+        with self.engine.begin() as connection:
+            connection.exec_driver_sql(
+                'CREATE TABLE IF NOT EXISTS schema_migration (version INTEGER PRIMARY KEY, name VARCHAR(255), applied_at TIMESTAMP)'
+            )
+
+    @property
+    def migrations(self) -> list:
+        modules = [
+            importlib.import_module(f'{migrations.__name__}.{info.name}')
+            for info in pkgutil.iter_modules(migrations.__path__) if info.name.startswith('v')
+        ]
+        return sorted(modules, key=lambda module: module.version)
+
+    def get_applied(self) -> set:
+        with self.engine.connect() as connection:
+            return set(row[0] for row in connection.exec_driver_sql('SELECT version FROM schema_migration'))
+
+    def upgrade(self, target: Optional[int] = None) -> None:
+        """
+        適用していないマイグレーションをtargetの番号まで(指定しない場合は全て)適用する
+        """
+        applied = self.get_applied()
+        for module in self.migrations:
+            if module.version in applied or (target is not None and module.version > target):
+                continue
+            with self.engine.begin() as connection:
+                module.upgrade(connection)
+                connection.exec_driver_sql(
+                    'INSERT INTO schema_migration (version, name, applied_at) VALUES (%s, %s, %s)',
+                    (module.version, self.__get_name(module), datetime.now())
+                )
+            print(f'{self.__get_name(module)}を適用しました。')
+
+    def create_all(self, metadata: MetaData) -> None:
+        """
+        metadataの最新のスキーマでテーブルを作成する
+        テーブルが1つも存在しない新規のデータベースの場合は、全てのマイグレーションを適用済みとして記録する
+        (既存のデータベースには作成されていないテーブルのみ追加し、スキーマの変更はupgradeで適用する)
+        """
+        with self.engine.connect() as connection:
+            inspector = inspect(connection)
+            is_new = not any(inspector.has_table(table_name) for table_name in metadata.tables)
+        metadata.create_all(bind=self.engine)
+        if is_new and not self.get_applied():
+            self.stamp()
+
+    def stamp(self, target: Optional[int] = None) -> None:
+        """
+        マイグレーションをtargetの番号まで(指定しない場合は全て)適用せずに適用済みとして記録する
+        スキーマが既に最新である(create_allで作成した)データベースに用いる
+        baseline(connection)を持つマイグレーションは、modelsで作成されないもの(ビューなど)を作成するためそれを実行する
+        """
+        applied = self.get_applied()
+        for module in self.migrations:
+            if module.version in applied or (target is not None and module.version > target):
+                continue
+            with self.engine.begin() as connection:
+                if hasattr(module, 'baseline'):
+                    module.baseline(connection)
+                connection.exec_driver_sql(
+                    'INSERT INTO schema_migration (version, name, applied_at) VALUES (%s, %s, %s)',
+                    (module.version, self.__get_name(module), datetime.now())
+                )
+            print(f'{self.__get_name(module)}を適用済みとして記録しました。')
+
+    def downgrade(self, target: int) -> None:
+        """
+        targetの番号より後のマイグレーションを新しいものから順に取り消す
+        """
+        applied = self.get_applied()
+        for module in reversed(self.migrations):
+            if module.version not in applied or module.version <= target:
+                continue
+            with self.engine.begin() as connection:
+                module.downgrade(connection)
+                connection.exec_driver_sql('DELETE FROM schema_migration WHERE version = %s', (module.version,))
+            print(f'{self.__get_name(module)}を取り消しました。')
+
+    def __get_name(self, module: ModuleType) -> str:
+        return module.__name__.rsplit('.', 1)[-1]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='データベースにマイグレーションを適用する')
+    parser.add_argument('--target', type=int, default=None, help='この番号まで適用する (指定しない場合は全て)')
+    parser.add_argument('--stamp', action='store_true', help='適用せずに適用済みとして記録する (create_tableで作成したデータベース用)')
+    args = parser.parse_args()
+    if args.stamp:
+        Migrator().stamp(args.target)
+    else:
+        Migrator().upgrade(args.target)
@@ -0,0 +1,32 @@
+"""
+検索・結合に利用している列にB-treeインデックスを追加する
+
+主キーは(horse_id, race_id)の順のため、race_idのみでの絞り込みには利用できない。
+(horse_id, date)での検索は、resultの主キーで馬の出走を引き、race_date_mappingの(date, race_id)で日付を絞り込む。
+"""
+from sqlalchemy.engine import Connection
+
+version = 1
+
+indexes = {
+    'ix_race_date_mapping_date_race_id': ('race_date_mapping', ['date', 'race_id']),
+    'ix_result_race_id': ('result', ['race_id']),
+    'ix_race_card_race_id': ('race_card', ['race_id']),
+    'ix_race_card_jockey_id': ('race_card', ['jockey_id']),
+    'ix_horse_profile_breeder_id': ('horse_profile', ['breeder_id']),
+    'ix_horse_profile_owner_id': ('horse_profile', ['owner_id']),
+    'ix_horse_profile_trainer_id': ('horse_profile', ['trainer_id']),
+}
+
+
+def upgrade(connection: Connection) -> None:
+    for name, (table_name, columns) in indexes.items():
+        connection.exec_driver_sql(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table_name} ({", ".join(columns)})'
+        )
+        connection.exec_driver_sql(f'ANALYZE {table_name}')
+
+
+def downgrade(connection: Connection) -> None:
+    for name in indexes:
+        connection.exec_driver_sql(f'DROP INDEX IF EXISTS {name}')
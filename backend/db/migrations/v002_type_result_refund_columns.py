@@ -0,0 +1,65 @@
+"""
+result.order, result.diff_time, refund.money, refund.popular を数値の列に、
+refund.horse_number を馬番毎の horse_number_0, horse_number_1, horse_number_2 に変換する
+
+着差('クビ+1/2'など)の変換はSQLで表せないため、取り込み時と同じnormalizer.to_diff_timeで変換する。
+"""
+import pandas as pd
+from sqlalchemy.engine import Connection
+from backend.module.scraping.normalizer import to_diff_time
+
+version = 2
+
+
+def upgrade(connection: Connection) -> None:
+    # 着順は数字のみのものを整数に変換し、それ以外('除', '中'など)はNULLとする
+    connection.exec_driver_sql(
+        'ALTER TABLE result ALTER COLUMN "order" TYPE INTEGER '
+        'USING CASE WHEN "order" ~ \'^[0-9]+$\' THEN "order"::integer END'
+    )
+    # 着差は取り込み時と同じ関数で変換し、一時テーブルから反映する
+    diff_time_df = pd.read_sql(
+        'SELECT DISTINCT diff_time AS text FROM result WHERE diff_time IS NOT NULL', connection
+    )
+    diff_time_df['value'] = diff_time_df['text'].map(to_diff_time)
+    connection.exec_driver_sql('ALTER TABLE result ADD COLUMN diff_time_value DOUBLE PRECISION')
+    connection.exec_driver_sql('CREATE TEMP TABLE diff_time_mapping (text VARCHAR(255), value DOUBLE PRECISION) ON COMMIT DROP')
+    if len(diff_time_df):
+        connection.exec_driver_sql(
+            'INSERT INTO diff_time_mapping (text, value) VALUES (%(text)s, %(value)s)',
+            diff_time_df.astype(object).where(diff_time_df.notna(), None).to_dict(orient='records')
+        )
+    connection.exec_driver_sql(
+        'UPDATE result SET diff_time_value = m.value FROM diff_time_mapping m WHERE result.diff_time = m.text'
+    )
+    connection.exec_driver_sql('ALTER TABLE result DROP COLUMN diff_time')
+    connection.exec_driver_sql('ALTER TABLE result RENAME COLUMN diff_time_value TO diff_time')
+
+    # 払い戻し金額・人気は数字以外(',', '円'など)を取り除いて整数に変換する
+    for column in ['money', 'popular']:
+        connection.exec_driver_sql(
+            f'ALTER TABLE refund ALTER COLUMN {column} TYPE INTEGER '
+            f"USING NULLIF(regexp_replace({column}, '[^0-9]', '', 'g'), '')::integer"
+        )
+    # 馬番の組み合わせ('3 - 5', '3 → 5 → 1')を1頭ずつの列に分ける
+    for i in range(3):
+        connection.exec_driver_sql(f'ALTER TABLE refund ADD COLUMN horse_number_{i} SMALLINT')
+        connection.exec_driver_sql(
+            f'UPDATE refund SET horse_number_{i} = '
+            f"(regexp_match(horse_number, '^\\D*' || repeat('[0-9]+\\D+', {i}) || '([0-9]+)'))[1]::smallint"
+        )
+    connection.exec_driver_sql('ALTER TABLE refund DROP COLUMN horse_number')
+
+
+def downgrade(connection: Connection) -> None:
+    # 着差・馬番の元の表記には戻せないため、数値を文字列として保存する
+    connection.exec_driver_sql('ALTER TABLE result ALTER COLUMN "order" TYPE VARCHAR(255) USING "order"::varchar')
+    connection.exec_driver_sql('ALTER TABLE result ALTER COLUMN diff_time TYPE VARCHAR(255) USING diff_time::varchar')
+    for column in ['money', 'popular']:
+        connection.exec_driver_sql(f'ALTER TABLE refund ALTER COLUMN {column} TYPE VARCHAR(255) USING {column}::varchar')
+    connection.exec_driver_sql('ALTER TABLE refund ADD COLUMN horse_number VARCHAR(255)')
+    connection.exec_driver_sql(
+        "UPDATE refund SET horse_number = concat_ws(' - ', horse_number_0, horse_number_1, horse_number_2)"
+    )
+    for i in range(3):
+        connection.exec_driver_sql(f'ALTER TABLE refund DROP COLUMN horse_number_{i}')
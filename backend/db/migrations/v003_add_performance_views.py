@@ -0,0 +1,94 @@
+"""
+騎手・調教師・馬主・生産者・馬毎の成績の累積値をマテリアライズドビューとして追加する
+
+result_feature ビューで Result.preprocessing と同じ特徴量(着順が数字でないレースを除き、通過順から各コーナーの順位を求める)を計算し、
+performance_<entity> には entity_id, date 毎に、その日までの各特徴量の累積和・累積件数を保存する。
+ある日より前のレースの平均は、その日より前の最後の行の 累積和 / 累積件数 で求まる。
+(entity_id, date)の一意なインデックスにより、REFRESH MATERIALIZED VIEW CONCURRENTLY で読み込みを止めずに更新できる。
+"""
+from sqlalchemy.engine import Connection
+
+version = 3
+
+target_ls = ['order', 'time_idx', 'prize']
+horse_target_ls = [
+    'first_corner',
+    'final_corner',
+    'first_to_rank',
+    'first_to_final',
+    'final_to_rank',
+    'last3F',
+    'diff_time',
+] + target_ls
+
+# ビュー名と(集計の単位となる列, 累積する特徴量)の対応
+views = {
+    'performance_horse': ('horse_id', horse_target_ls),
+    'performance_jockey': ('jockey_id', target_ls),
+    'performance_trainer': ('trainer_id', target_ls),
+    'performance_owner': ('owner_id', target_ls),
+    'performance_breeder': ('breeder_id', target_ls),
+}
+
+
+def upgrade(connection: Connection) -> None:
+    connection.exec_driver_sql("""
+        CREATE VIEW result_feature AS
+        SELECT
+            f.*,
+            f.first_corner - f."order" AS first_to_rank,
+            f.first_corner - f.final_corner AS first_to_final,
+            f.final_corner - f."order" AS final_to_rank
+        FROM (
+            SELECT
+                r.race_id,
+                r.horse_id,
+                m.date,
+                r."order",
+                r.time_idx,
+                r.prize,
+                r."last3F",
+                COALESCE(r.diff_time, 0) AS diff_time,
+                (regexp_match(r.passing, '^[^0-9]*([0-9]+)'))[1]::integer AS first_corner,
+                (regexp_match(r.passing, '([0-9]+)[^0-9]*$'))[1]::integer AS final_corner,
+                c.jockey_id,
+                p.trainer_id,
+                p.owner_id,
+                p.breeder_id
+            FROM result r
+            JOIN race_date_mapping m ON m.race_id = r.race_id
+            LEFT JOIN race_card c ON c.race_id = r.race_id AND c.horse_id = r.horse_id
+            LEFT JOIN horse_profile p ON p.horse_id = r.horse_id
+            WHERE r."order" IS NOT NULL AND r.odds IS NOT NULL
+        ) f
+    """)
+    for name, (col, targets) in views.items():
+        cumulative = ',\n'.join(
+            f'SUM(SUM("{target}")) OVER w AS "sum_{target}", SUM(COUNT("{target}")) OVER w AS "count_{target}"'
+            for target in targets
+        )
+        connection.exec_driver_sql(f"""
+            CREATE MATERIALIZED VIEW {name} AS
+            SELECT
+                {col} AS entity_id,
+                date,
+                COUNT(*) AS n_races,
+                SUM(COUNT(*)) OVER w AS n_races_cumulative,
+                {cumulative}
+            FROM result_feature
+            WHERE {col} IS NOT NULL
+            GROUP BY {col}, date
+            WINDOW w AS (PARTITION BY {col} ORDER BY date ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW)
+        """)
+        connection.exec_driver_sql(f'CREATE UNIQUE INDEX ux_{name}_entity_id_date ON {name} (entity_id, date)')
+
+
+def baseline(connection: Connection) -> None:
+    # ビューはmodelsのcreate_allで作成されないため、新規のデータベースにも作成する
+    upgrade(connection)
+
+
+def downgrade(connection: Connection) -> None:
+    for name in views:
+        connection.exec_driver_sql(f'DROP MATERIALIZED VIEW IF EXISTS {name}')
+    connection.exec_driver_sql('DROP VIEW IF EXISTS result_feature')
@@ -0,0 +1,71 @@
+"""
+result, race_card, refund をrace_idの先頭4文字(開催年)で範囲分割したテーブルに作り直す
+
+race_idは主キーに含まれるため、そのまま分割のキーにできる ('2022' <= race_id < '2023' が2022年のレース)。
+既存の行は新しいテーブルに移し、v003のビューは元のテーブルを参照しているため作り直す。
+年毎のテーブルは、データの最初の年から翌年まで作成し、それ以降は書き込み時に crud.update.ensure_partitions で作成する。
+"""
+from datetime import date
+from sqlalchemy.engine import Connection
+from backend.db.migrations import v003_add_performance_views as performance_views
+
+version = 4
+
+# テーブル名と(主キー, インデックス)の対応
+tables = {
+    'result': (['horse_id', 'race_id'], {'ix_result_race_id': ['race_id']}),
+    'race_card': (['horse_id', 'race_id'], {'ix_race_card_race_id': ['race_id'], 'ix_race_card_jockey_id': ['jockey_id']}),
+    'refund': (['race_id', 'betting'], dict()),
+}
+
+
+def upgrade(connection: Connection) -> None:
+    performance_views.downgrade(connection)
+    for table_name, (primary_keys, indexes) in tables.items():
+        first_year = connection.exec_driver_sql(f'SELECT MIN(substr(race_id, 1, 4)) FROM {table_name}').scalar()
+        first_year = int(first_year) if first_year is not None else date.today().year
+        partitioned = f'{table_name}_partitioned'
+        connection.exec_driver_sql(
+            f'CREATE TABLE {partitioned} (LIKE {table_name} INCLUDING DEFAULTS) PARTITION BY RANGE (race_id)'
+        )
+        for year in range(first_year, date.today().year + 2):
+            connection.exec_driver_sql(
+                f"CREATE TABLE {table_name}_{year} PARTITION OF {partitioned} FOR VALUES FROM ('{year}') TO ('{year + 1}')"
+            )
+        # race_idの形式が異なる行など、どの年にも当てはまらない行を受け取る
+        connection.exec_driver_sql(f'CREATE TABLE {table_name}_default PARTITION OF {partitioned} DEFAULT')
+        connection.exec_driver_sql(f'INSERT INTO {partitioned} SELECT * FROM {table_name}')
+        connection.exec_driver_sql(f'DROP TABLE {table_name}')
+        connection.exec_driver_sql(f'ALTER TABLE {partitioned} RENAME TO {table_name}')
+        connection.exec_driver_sql(
+            f'ALTER TABLE {table_name} ADD CONSTRAINT {table_name}_pkey PRIMARY KEY ({", ".join(primary_keys)})'
+        )
+        for name, columns in indexes.items():
+            connection.exec_driver_sql(f'CREATE INDEX {name} ON {table_name} ({", ".join(columns)})')
+        connection.exec_driver_sql(f'ANALYZE {table_name}')
+    performance_views.upgrade(connection)
+
+
+def baseline(connection: Connection) -> None:
+    """
+    modelsのcreate_allで作成したテーブルは分割済みのため、どの年にも当てはまらない行を受け取るテーブルのみ作成する
+    """
+    for table_name in tables:
+        connection.exec_driver_sql(f'CREATE TABLE IF NOT EXISTS {table_name}_default PARTITION OF {table_name} DEFAULT')
+
+
+def downgrade(connection: Connection) -> None:
+    performance_views.downgrade(connection)
+    for table_name, (primary_keys, indexes) in tables.items():
+        heap = f'{table_name}_heap'
+        connection.exec_driver_sql(f'CREATE TABLE {heap} (LIKE {table_name} INCLUDING DEFAULTS)')
+        connection.exec_driver_sql(f'INSERT INTO {heap} SELECT * FROM {table_name}')
+        # 年毎のテーブルも合わせて削除される
+        connection.exec_driver_sql(f'DROP TABLE {table_name}')
+        connection.exec_driver_sql(f'ALTER TABLE {heap} RENAME TO {table_name}')
+        connection.exec_driver_sql(
+            f'ALTER TABLE {table_name} ADD CONSTRAINT {table_name}_pkey PRIMARY KEY ({", ".join(primary_keys)})'
+        )
+        for name, columns in indexes.items():
+            connection.exec_driver_sql(f'CREATE INDEX {name} ON {table_name} ({", ".join(columns)})')
+    performance_views.upgrade(connection)
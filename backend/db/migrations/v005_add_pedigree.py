@@ -0,0 +1,23 @@
+"""
+馬とその父・母の対応を保存する pedigree テーブルを追加する (models.Pedigree)
+
+既存のデータベースには作成されていないため、Peds.scrape や ParquetMirror.refresh の前に適用する。
+"""
+from sqlalchemy.engine import Connection
+
+version = 5
+
+
+def upgrade(connection: Connection) -> None:
+    connection.exec_driver_sql("""
+        CREATE TABLE IF NOT EXISTS pedigree (
+            horse_id VARCHAR(255) NOT NULL,
+            father_id VARCHAR(255),
+            mother_id VARCHAR(255),
+            PRIMARY KEY (horse_id)
+        )
+    """)
+
+
+def downgrade(connection: Connection) -> None:
+    connection.exec_driver_sql('DROP TABLE IF EXISTS pedigree')
@@ -5,3 +5,4 @@ from .race import Race
 from .refund import Refund
 from .race_card import RaceCard
 from .race_date_mapping import RaceDateMapping
+from .pedigree import Pedigree
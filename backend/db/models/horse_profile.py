@@ -1,5 +1,6 @@
 from sqlalchemy import Column, String, Date
-from backend.db.settings import Base, ENGINE
+from backend.db.settings import Base
+from backend.db.main import create_table, delete_table
 
 
 class HorseProfile(Base):
@@ -7,11 +8,11 @@ class HorseProfile(Base):
 
     horse_id = Column(String(255), primary_key=True)
     horse_name = Column(String(255), nullable=False)
-    breeder_id = Column(String(255), nullable=False)
+    breeder_id = Column(String(255), nullable=False, index=True)
     breeder_name = Column(String(255), nullable=False)
-    owner_id = Column(String(255), nullable=False)
+    owner_id = Column(String(255), nullable=False, index=True)
     owner_name = Column(String(255), nullable=False)
-    trainer_id = Column(String(255), nullable=False)
+    trainer_id = Column(String(255), nullable=False, index=True)
     trainer_name = Column(String(255), nullable=False)
     near_relation_horse_id_0 = Column(String(255))
     near_relation_horse_id_1 = Column(String(255))
@@ -25,14 +26,6 @@ class HorseProfile(Base):
     mother_name = Column(String(255))
 
 
-def create_table():
-    Base.metadata.create_all(bind=ENGINE)
-
-
-def delete_table():
-    Base.metadata.drop_all(bind=ENGINE)
-
-
 if __name__ == "__main__":
     # データの初期化
     delete_table()
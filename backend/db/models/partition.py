@@ -0,0 +1,10 @@
+from backend.environment.database import Database
+
+
+def partition_args(table_name: str) -> dict:
+    """
+    table_nameがDatabase.PARTITIONED_TABLESに含まれる場合、年で範囲分割するための__table_args__を返す
+    """
+    if table_name in Database.PARTITIONED_TABLES:
+        return {'postgresql_partition_by': Database.PARTITION_BY}
+    return dict()
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String
+from backend.db.settings import Base
+
+
+class Pedigree(Base):
+    """
+    馬とその父・母の対応
+    父または母が不明な場合(netkeibaにページが存在しない場合)はNULLとする
+    """
+    __tablename__ = 'pedigree'
+
+    horse_id = Column(String(255), primary_key=True)
+    father_id = Column(String(255))
+    mother_id = Column(String(255))
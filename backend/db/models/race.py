@@ -1,6 +1,7 @@
 from sqlalchemy.schema import Column
 from sqlalchemy.types import Integer, String
-from backend.db.settings import Base, ENGINE
+from backend.db.settings import Base
+from backend.db.main import create_table, delete_table
 
 
 class Race(Base):
@@ -20,14 +21,6 @@ class Race(Base):
     venue = Column(String(255))
 
 
-def create_table():
-    Base.metadata.create_all(bind=ENGINE)
-
-
-def delete_table():
-    Base.metadata.drop_all(bind=ENGINE)
-
-
 if __name__ == "__main__":
     # データの初期化
     delete_table()
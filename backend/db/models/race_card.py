@@ -1,13 +1,16 @@
 from sqlalchemy import Column, Integer, Float, String
-from backend.db.settings import Base, ENGINE
+from backend.db.settings import Base
+from backend.db.models.partition import partition_args
+from backend.db.main import create_table, delete_table
 
 
 class RaceCard(Base):
     __tablename__ = 'race_card'
+    __table_args__ = partition_args(__tablename__)
 
     horse_id = Column(String(255), primary_key=True)
-    race_id = Column(String(255), primary_key=True)
-    jockey_id = Column(String(255), nullable=False)
+    race_id = Column(String(255), primary_key=True, index=True)
+    jockey_id = Column(String(255), nullable=False, index=True)
     jockey_name = Column(String(255), nullable=False)
     bracket_number = Column(Integer, nullable=False)
     horse_number = Column(Integer)
@@ -18,14 +21,6 @@ class RaceCard(Base):
     diff_weight_horse = Column(Integer)
 
 
-def create_table():
-    Base.metadata.create_all(bind=ENGINE)
-
-
-def delete_table():
-    Base.metadata.drop_all(bind=ENGINE)
-
-
 if __name__ == "__main__":
     # データの初期化
     delete_table()
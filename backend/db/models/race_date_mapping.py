@@ -1,22 +1,17 @@
-from sqlalchemy import Column, String, Date
-from backend.db.settings import Base, ENGINE
+from sqlalchemy import Column, String, Date, Index
+from backend.db.settings import Base
+from backend.db.main import create_table, delete_table
 
 
 class RaceDateMapping(Base):
     __tablename__ = 'race_date_mapping'
+    # 期間での絞り込み及び(horse_id, date)での検索時に、resultの主キー(horse_id, race_id)と組み合わせて利用する
+    __table_args__ = (Index('ix_race_date_mapping_date_race_id', 'date', 'race_id'),)
 
     race_id = Column(String(255), primary_key=True)
     date = Column(Date)
 
 
-def create_table():
-    Base.metadata.create_all(bind=ENGINE)
-
-
-def delete_table():
-    Base.metadata.drop_all(bind=ENGINE)
-
-
 if __name__ == "__main__":
     # データの初期化
     delete_table()
@@ -1,23 +1,21 @@
-from sqlalchemy import Column, String
-from backend.db.settings import Base, ENGINE
+from sqlalchemy import Column, Integer, SmallInteger, String
+from backend.db.settings import Base
+from backend.db.models.partition import partition_args
+from backend.db.main import create_table, delete_table
 
 
 class Refund(Base):
     __tablename__ = 'refund'
+    __table_args__ = partition_args(__tablename__)
 
     race_id = Column(String(255), primary_key=True)
     betting = Column(String(255), primary_key=True)
-    horse_number = Column(String(255))
-    money = Column(String(255))
-    popular = Column(String(255))
-
-
-def create_table():
-    Base.metadata.create_all(bind=ENGINE)
-
-
-def delete_table():
-    Base.metadata.drop_all(bind=ENGINE)
+    # 馬番の組み合わせ(馬連・三連単など)は1頭ずつ分けて保存する (単勝・複勝はhorse_number_0のみ)
+    horse_number_0 = Column(SmallInteger)
+    horse_number_1 = Column(SmallInteger)
+    horse_number_2 = Column(SmallInteger)
+    money = Column(Integer)
+    popular = Column(Integer)
 
 
 if __name__ == "__main__":
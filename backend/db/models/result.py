@@ -1,31 +1,28 @@
 from sqlalchemy import Column, Integer, Float, String
-from backend.db.settings import Base, ENGINE
+from backend.db.settings import Base
+from backend.db.models.partition import partition_args
+from backend.db.main import create_table, delete_table
 
 
 class Result(Base):
     __tablename__ = 'result'
+    __table_args__ = partition_args(__tablename__)
 
     horse_id = Column(String(255), primary_key=True)
-    race_id = Column(String(255), primary_key=True)
-    order = Column(String(255))
+    race_id = Column(String(255), primary_key=True, index=True)
+    # 取消・除外・中止などの場合はNULL
+    order = Column(Integer)
     odds = Column(Float)
     last3F = Column(Float)
     time_idx = Column(Integer)
     ground_state_idx = Column(Integer)
     passing = Column(String(255))
     remark = Column(String(255))
-    diff_time = Column(String(255))
+    # 着差(馬身)
+    diff_time = Column(Float)
     prize = Column(Float)
 
 
-def create_table():
-    Base.metadata.create_all(bind=ENGINE)
-
-
-def delete_table():
-    Base.metadata.drop_all(bind=ENGINE)
-
-
 if __name__ == "__main__":
     # データの初期化
     delete_table()
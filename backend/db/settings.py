@@ -1,5 +1,6 @@
 import os
-from sqlalchemy import create_engine
+import threading
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy_utils import database_exists, create_database
@@ -22,15 +23,32 @@ SQLALCHEMY_DATABASE_URL = '{}://{}:{}@{}:{}/{}'.format(DATABASE, USER, PASSWORD,
 # DB接続するためのEngineインスタンス
 ENGINE = create_engine(
     SQLALCHEMY_DATABASE_URL,
-    echo=True  # Trueだと実行のたびにSQLが出力される
+    # Trueだと実行のたびにSQLが出力される (一括書き込み時は出力が膨大になるため、必要な時のみ環境変数で有効にする)
+    echo=os.environ.get('SQLALCHEMY_ECHO', 'false').lower() == 'true'
 )
 
 # DB_NAMEが名前であるdatabaseが存在しない場合は自動で作成
-if not database_exists(ENGINE.url):
-    try:
-        create_database(ENGINE.url)
-    except OperationalError:
-        pass
+# (import時に接続しないよう、ENGINEが初めて接続する直前に一度だけ確認する。
+#  サーバが起動していない場合もParquetMirrorから読み込めるよう、確認できなくても接続の失敗に任せる)
+# (取得と書き込みを並行に行うため、複数のスレッドから同時に接続されても一度だけ確認する)
+database_checked = threading.Event()
+database_lock = threading.Lock()
+
+
+@event.listens_for(ENGINE, 'do_connect')
+def ensure_database(dialect, connection_record, cargs, cparams) -> None:
+    if database_checked.is_set():
+        return
+    with database_lock:
+        if database_checked.is_set():
+            return
+        try:
+            if not database_exists(ENGINE.url):
+                create_database(ENGINE.url)
+            database_checked.set()
+        except OperationalError:
+            pass
+
 
 # DBに対してORM操作するときに利用
 SESSION = sessionmaker(
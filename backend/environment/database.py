@@ -0,0 +1,38 @@
+import dataclasses
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+@dataclasses.dataclass(frozen=True)
+class Database:
+    """
+    データベースの読み書きに関する設定
+    """
+
+    # 1回のINSERT文で書き込む行数
+    INSERT_CHUNK_SIZE = 5000
+
+    # この行数以上をまとめて書き込む場合は、COPYで一時テーブルに流し込んでから反映する
+    COPY_THRESHOLD = int(os.environ.get('NETKEIBA_COPY_THRESHOLD', 1000))
+
+    # read_*の読み込み元 ('db': データベース, 'mirror': ParquetMirrorのスナップショット)
+    READ_SOURCE = os.environ.get('NETKEIBA_READ_SOURCE', 'db')
+
+    # テーブルのスナップショット(Parquet)を保存するディレクトリ
+    MIRROR_DIR = os.environ.get('NETKEIBA_MIRROR_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'horse_race', 'mirror'))
+
+    # 成績の累積値を保存したマテリアライズドビュー (集計の単位となる列をkeyとする)
+    PERFORMANCE_VIEWS = {
+        'horse_id': 'performance_horse',
+        'jockey_id': 'performance_jockey',
+        'trainer_id': 'performance_trainer',
+        'owner_id': 'performance_owner',
+        'breeder_id': 'performance_breeder',
+    }
+
+    # race_idの先頭4文字(開催年)で範囲分割するテーブル
+    # (年毎のテーブルは書き込み時にcrud.update.ensure_partitionsで作成する)
+    PARTITIONED_TABLES = ['result', 'race_card', 'refund']
+    PARTITION_BY = 'RANGE (race_id)'
@@ -0,0 +1,20 @@
+import dataclasses
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+@dataclasses.dataclass(frozen=True)
+class Feature:
+    """
+    特徴量の作成に関する設定
+    """
+
+    # 過去成績の平均を計算する方法
+    # ('pandas': 開催日毎にpandasで計算, 'duckdb': DuckDBのウィンドウ関数でまとめて計算,
+    #  'view': データベースのマテリアライズドビューの累積値から取得 (n_last='all'の場合のみ、それ以外はpandas))
+    ENGINE = os.environ.get('NETKEIBA_FEATURE_ENGINE', 'pandas')
+
+    # DuckDBで利用するスレッド数
+    THREADS = os.cpu_count() or 1
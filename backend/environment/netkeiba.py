@@ -1,6 +1,5 @@
 import dataclasses
 import os
-import requests
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -8,14 +7,12 @@ load_dotenv()
 
 @dataclasses.dataclass(frozen=True)
 class Netkeiba:
-    USER = os.environ['private_gmail']
-    PASS = os.environ['netkeiba_pass']
+    # ログインはHttpClient.shared()の初回呼び出し時に行うため、未設定でもimportは成功させる
+    USER = os.environ.get('private_gmail', '')
+    PASS = os.environ.get('netkeiba_pass', '')
 
     LOGIN_URL = "https://regist.netkeiba.com/account/?pid=login&action=auth"
     PAYLOAD = {
         'login_id': USER,
         'pswd': PASS
     }
-
-    SESSION = requests.Session()
-    SESSION.post(LOGIN_URL, data=PAYLOAD)
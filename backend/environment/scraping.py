@@ -0,0 +1,82 @@
+import dataclasses
+import os
+from urllib.parse import urlparse
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+@dataclasses.dataclass(frozen=True)
+class Scraping:
+    """
+    スクレイピング時の通信に関する設定
+    """
+
+    # 同時に送信するリクエスト数の上限
+    MAX_CONCURRENCY = 8
+
+    # 一度にまとめて取得するページ数
+    CHUNK_SIZE = 48
+
+    # スクレイピング対象のURL (ベンチマーク用のローカルサーバなどに差し替える場合は環境変数で指定する)
+    DB_BASE_URL = os.environ.get('NETKEIBA_DB_BASE_URL', 'https://db.netkeiba.com')
+    RACE_BASE_URL = os.environ.get('NETKEIBA_RACE_BASE_URL', 'https://race.netkeiba.com')
+
+    # ホスト毎のリクエスト頻度の上限 (1秒あたりのリクエスト数, バースト幅)
+    HOST_RATE_LIMITS = {
+        urlparse(DB_BASE_URL).netloc: (2.0, 4),
+        urlparse(RACE_BASE_URL).netloc: (1.0, 2),
+    }
+    DEFAULT_RATE_LIMIT = (1.0, 1)
+
+    # 429/5xxが返ってきた場合のリトライ設定
+    RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+    MAX_RETRIES = 5
+    BACKOFF_BASE = 1.0
+    BACKOFF_MAX = 60.0
+
+    # 1リクエストあたりのタイムアウト(秒)
+    TIMEOUT = 30
+
+    # syncで保存済みの最新の開催日から何日遡って取得し直すか
+    # (中断した場合、最新の開催日以前にも書き込まれていないレースが残るため。保存済みのレースはKnownIds, ScrapeJournalで飛ばす)
+    SYNC_LOOKBACK_DAYS = int(os.environ.get('NETKEIBA_SYNC_LOOKBACK_DAYS', 7))
+
+    # ホスト毎にプールしておく接続数 (複数のFetcherが同時に動くため、MAX_CONCURRENCYより多めに確保する)
+    HTTP_POOL_SIZE = MAX_CONCURRENCY * 2
+
+    # 全てのリクエストに付与するヘッダ
+    HTTP_HEADERS = {
+        'Accept-Encoding': 'gzip, deflate',
+        'Connection': 'keep-alive',
+    }
+
+    # 取得したページを保存するディレクトリ
+    CACHE_DIR = os.environ.get('NETKEIBA_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'horse_race', 'pages'))
+
+    # BeautifulSoupで利用するパーサ ('lxml'が利用できない環境では'html.parser'を指定する)
+    HTML_PARSER = os.environ.get('NETKEIBA_HTML_PARSER', 'lxml')
+
+    # 開催日程(レースカレンダー)を保存するディレクトリ
+    CALENDAR_DIR = os.environ.get('NETKEIBA_CALENDAR_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'horse_race', 'calendar'))
+
+    # スクレイピングの進捗(取得済み・失敗したid)を記録するディレクトリ
+    JOURNAL_DIR = os.environ.get('NETKEIBA_JOURNAL_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'horse_race', 'journal'))
+
+    # 何件分取得する毎にデータベースへ書き込むか
+    FLUSH_SIZE = 100
+
+    # ページを解析するプロセス数
+    PARSE_WORKERS = os.cpu_count() or 1
+
+    # オッズの取得方法 ('api': オッズAPIからHTTPのみで取得, 'browser': headless Chromeでオッズページを表示して取得)
+    ODDS_SOURCE = os.environ.get('NETKEIBA_ODDS_SOURCE', 'api')
+
+    # スクレイピングの計測結果を書き出すディレクトリ
+    METRICS_DIR = os.environ.get('NETKEIBA_METRICS_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'horse_race', 'metrics'))
+
+    # 応答時間・解析時間のヒストグラムのバケットの上限(秒)
+    LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    # 同時に起動するheadless Chromeの上限
+    BROWSER_POOL_SIZE = 2
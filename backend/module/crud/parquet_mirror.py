@@ -0,0 +1,227 @@
+import argparse
+import json
+import os
+import shutil
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from datetime import date
+from typing import Iterator, Optional, Union
+from sqlalchemy import Date, Float, Integer, SmallInteger, inspect
+from backend.environment.database import Database
+from backend.db.settings import SESSION
+from backend.module.crud.read import MODELS, build_query, read_latest_race_date
+
+
+class ParquetMirror:
+    """
+    データベースの各テーブルのスナップショットをParquetでローカルに保存し、データベースの代わりに読み込む
+
+    race_id列を持つテーブルは year=<race_idの1-4文字目>/venue_id=<race_idの5, 6文字目> で分割して保存し、
+    年・開催地・race_idなどの条件はpyarrowのdatasetでファイル・行グループ単位で絞り込む。
+    refreshではrace_date_mappingの最新の開催日を記録しておき、次回はその日以降のレースを含む分割のみ書き直す。
+    (その日を含めて取得し直すため、同じ日のレースが後から保存された場合も反映される)
+
+    Attributes
+    ----------
+    mirror_dir: str
+        スナップショットを保存するディレクトリ
+    """
+
+    partitioning = ds.partitioning(pa.schema([('year', pa.string()), ('venue_id', pa.string())]), flavor='hive')
+
+    def __init__(self, mirror_dir: str = Database.MIRROR_DIR) -> None:
+        self.mirror_dir = mirror_dir
+        os.makedirs(mirror_dir, exist_ok=True)
+
+    @property
+    def meta_path(self) -> str:
+        return os.path.join(self.mirror_dir, 'meta.json')
+
+    def get_meta(self) -> dict:
+        """
+        Returns
+        -------
+        meta: dict[str, Optional[str]]
+            テーブル名をkeyとした、前回refreshした時点の最新の開催日
+        """
+        if not os.path.exists(self.meta_path):
+            return dict()
+        with open(self.meta_path) as f:
+            return json.load(f)
+
+    def refresh(self, table_names: Optional[list] = None, full: bool = False) -> None:
+        """
+        スナップショットをデータベースの内容に更新する
+
+        Parameters
+        ----------
+        table_names: Optional[list[str]]
+            対象のテーブル名 (指定しない場合は全てのテーブル)
+        full: bool default False
+            Trueの場合、前回の開催日に関わらずテーブル全体を書き直す
+        """
+        meta = self.get_meta()
+        latest_date = read_latest_race_date()
+        session = SESSION()
+        try:
+            inspector = inspect(session.bind)
+            for table_name in table_names or list(MODELS):
+                # マイグレーションを適用していないデータベースには存在しないテーブルがあるため飛ばす
+                if not inspector.has_table(table_name):
+                    print(f'{table_name}: データベースに存在しないため飛ばします。')
+                    continue
+                self.__refresh_table(table_name, session, meta, latest_date, full)
+        finally:
+            session.close()
+        with open(self.meta_path, 'w') as f:
+            json.dump(meta, f, indent=2)
+
+    def __refresh_table(self, table_name: str, session, meta: dict, latest_date: Optional[date], full: bool) -> None:
+        """
+        table_nameのスナップショットを更新し、metaに最新の開催日を記録する
+        (Database.READ_SOURCEが'mirror'でもスナップショット自身を読まないよう、read_tableを介さずデータベースから読み込む)
+        """
+        high_water_mark = meta.get(table_name)
+        # pedigreeはレースと対応しないため、常に全体を書き直す
+        if full or high_water_mark is None or table_name == 'pedigree':
+            df = pd.read_sql(build_query(table_name), session.bind)
+            shutil.rmtree(self.__get_table_dir(table_name), ignore_errors=True)
+        else:
+            df = pd.read_sql(build_query(table_name, start_date=date.fromisoformat(high_water_mark)), session.bind)
+        self.__merge(table_name, df)
+        meta[table_name] = latest_date.isoformat() if latest_date is not None else None
+        print(f'{table_name}: {len(df)}行を反映しました。')
+
+    def read(
+        self,
+        table_name: str,
+        columns: Optional[list] = None,
+        race_id_ls: Optional[list] = None,
+        horse_id_ls: Optional[list] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        venue_id_ls: Optional[list] = None,
+        chunksize: Optional[int] = None
+    ) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+        """
+        スナップショットからtable_nameのテーブルを読み込む
+        引数はcrud.read.read_tableと同じ
+        """
+        if start_date is not None or end_date is not None:
+            # 開催日はrace_date_mappingのスナップショットからrace_idに変換して絞り込む
+            date_df = self.read('race_date_mapping', venue_id_ls=venue_id_ls)
+            if start_date is not None:
+                date_df = date_df[date_df['date'] >= start_date]
+            if end_date is not None:
+                date_df = date_df[date_df['date'] <= end_date]
+            date_race_id_set = set(date_df['race_id'])
+            race_id_ls = list(date_race_id_set if race_id_ls is None else date_race_id_set & set(race_id_ls))
+        has_race_filter = race_id_ls is not None or venue_id_ls is not None
+        if self.__is_partitioned(table_name):
+            expression = self.__get_race_expression(race_id_ls, venue_id_ls)
+        elif has_race_filter:
+            # race_id列を持たないテーブルは、条件に合うレースに出走した馬に絞り込む
+            horse_id_set = set(self.read('result', columns=['horse_id'], race_id_ls=race_id_ls, venue_id_ls=venue_id_ls)['horse_id'])
+            horse_id_ls = list(horse_id_set if horse_id_ls is None else horse_id_set & set(horse_id_ls))
+            expression = None
+        else:
+            expression = None
+        if horse_id_ls is not None:
+            horse_expression = ds.field('horse_id').isin(horse_id_ls)
+            expression = horse_expression if expression is None else expression & horse_expression
+
+        # 分割のキー(year, venue_id)は列として返さない
+        columns = columns or [column.name for column in MODELS[table_name].__table__.columns]
+        dataset = self.__get_dataset(table_name)
+        if dataset is None:
+            df = pd.DataFrame(columns=columns)
+        else:
+            df = dataset.to_table(columns=columns, filter=expression).to_pandas()
+        if chunksize is not None:
+            return (df.iloc[i:i+chunksize] for i in range(0, len(df), chunksize))
+        return df
+
+    def __merge(self, table_name: str, df: pd.DataFrame) -> None:
+        """
+        dfを保存済みのスナップショットに反映する (主キーが重複する行はdfの値を優先する)
+        """
+        if df.empty:
+            return
+        primary_keys = [column.name for column in MODELS[table_name].__table__.primary_key.columns]
+        if self.__is_partitioned(table_name):
+            groups = df.groupby([df['race_id'].str[:4], df['race_id'].str[4:6]])
+            parts = {os.path.join(f'year={year}', f'venue_id={venue_id}'): part for (year, venue_id), part in groups}
+        else:
+            parts = {'': df}
+        for part_dir, part in parts.items():
+            path = os.path.join(self.__get_table_dir(table_name), part_dir, 'part-0.parquet')
+            if os.path.exists(path):
+                part = pd.concat([pd.read_parquet(path), part]).drop_duplicates(subset=primary_keys, keep='last')
+            self.__write(table_name, part, path)
+
+    def __write(self, table_name: str, df: pd.DataFrame, path: str) -> None:
+        schema = self.__get_schema(table_name)
+        _df = df[schema.names].copy()
+        for field in schema:
+            if pa.types.is_integer(field.type):
+                _df[field.name] = pd.to_numeric(_df[field.name]).astype('Int64')
+            elif pa.types.is_floating(field.type):
+                _df[field.name] = pd.to_numeric(_df[field.name]).astype(float)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 書き込み途中のファイルを読み込まないよう、一時ファイルに書き込んでから置き換える
+        pq.write_table(pa.Table.from_pandas(_df, schema=schema, preserve_index=False), path + '.tmp')
+        os.replace(path + '.tmp', path)
+
+    def __get_dataset(self, table_name: str) -> Optional[ds.Dataset]:
+        table_dir = self.__get_table_dir(table_name)
+        if not os.path.exists(table_dir):
+            return None
+        schema = self.__get_schema(table_name)
+        if self.__is_partitioned(table_name):
+            for field in self.partitioning.schema:
+                schema = schema.append(field)
+            return ds.dataset(table_dir, schema=schema, format='parquet', partitioning=self.partitioning)
+        return ds.dataset(table_dir, schema=schema, format='parquet')
+
+    def __get_race_expression(self, race_id_ls: Optional[list], venue_id_ls: Optional[list]):
+        expression = None
+        if race_id_ls is not None:
+            # 分割のキーでも絞り込み、対象外のファイルを読まないようにする
+            expression = ds.field('year').isin(sorted(set(race_id[:4] for race_id in race_id_ls))) \
+                & ds.field('race_id').isin(race_id_ls)
+        if venue_id_ls is not None:
+            venue_expression = ds.field('venue_id').isin(venue_id_ls)
+            expression = venue_expression if expression is None else expression & venue_expression
+        return expression
+
+    def __get_schema(self, table_name: str) -> pa.Schema:
+        fields = list()
+        for column in MODELS[table_name].__table__.columns:
+            if isinstance(column.type, SmallInteger):
+                pa_type = pa.int16()
+            elif isinstance(column.type, Integer):
+                pa_type = pa.int64()
+            elif isinstance(column.type, Float):
+                pa_type = pa.float64()
+            elif isinstance(column.type, Date):
+                pa_type = pa.date32()
+            else:
+                pa_type = pa.string()
+            fields.append(pa.field(column.name, pa_type))
+        return pa.schema(fields)
+
+    def __get_table_dir(self, table_name: str) -> str:
+        return os.path.join(self.mirror_dir, table_name)
+
+    def __is_partitioned(self, table_name: str) -> bool:
+        return 'race_id' in MODELS[table_name].__table__.columns
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='データベースのテーブルをParquetのスナップショットに反映する')
+    parser.add_argument('tables', nargs='*', help='対象のテーブル名 (指定しない場合は全てのテーブル)')
+    parser.add_argument('--full', action='store_true', help='テーブル全体を書き直す')
+    args = parser.parse_args()
+    ParquetMirror().refresh(args.tables or None, args.full)
@@ -1,4 +1,8 @@
 import pandas as pd
+from datetime import date
+from typing import Iterator, Optional, Union
+from sqlalchemy import func, select, text
+from backend.environment.database import Database
 from backend.db.settings import SESSION
 from backend.db.models import (
     Result,
@@ -6,9 +10,20 @@ from backend.db.models import (
     Race,
     Refund,
     RaceCard,
-    RaceDateMapping
+    RaceDateMapping,
+    Pedigree
 )
 
+MODELS = {
+    'horse_profile': HorseProfile,
+    'result': Result,
+    'race': Race,
+    'refund': Refund,
+    'race_card': RaceCard,
+    'race_date_mapping': RaceDateMapping,
+    'pedigree': Pedigree,
+}
+
 
 def read_race_id_ls() -> list[str]:
     session = SESSION()
@@ -17,74 +32,235 @@ def read_race_id_ls() -> list[str]:
     return list(set(race_id_ls))
 
 
-def read_horse_id_ls() -> list[str]:
+def read_horse_id_ls(race_id_ls: Optional[list] = None) -> list[str]:
+    """
+    race_id_lsを指定した場合は、それらのレースに出走した馬のみ取得する
+    """
     session = SESSION()
-    horse_id_ls = session.query(Result.horse_id).all()
+    query = session.query(Result.horse_id)
+    if race_id_ls is not None:
+        query = query.filter(Result.race_id.in_(race_id_ls))
+    horse_id_ls = query.all()
     session.close()
     return list(set(horse_id_ls))
 
 
-def read_horse_profile() -> pd.DataFrame:
+def read_id_set(table_name: str, key: str) -> set[str]:
+    """
+    table_nameのテーブルのkey列の値をSELECT DISTINCTで取得する
+    (スクレイピング済みかどうかの判定のみに利用するため、テーブル全体は読み込まない)
+
+    Parameters
+    ----------
+    table_name: str
+        対象のテーブル名
+    key: str
+        取得する列名 (race_id, horse_id など)
+    """
     session = SESSION()
-    sql_statement = session.query(HorseProfile).filter().statement
-    df = pd.read_sql(
-        sql_statement,
-        session.bind
-    )
+    column = getattr(MODELS[table_name], key)
+    id_set = set(row[0] for row in session.query(column).distinct())
     session.close()
-    return df
+    return id_set
 
 
-def read_result() -> pd.DataFrame:
+def read_latest_race_date() -> Optional[date]:
+    """
+    race_date_mappingに保存されている最も新しい開催日を取得する
+    保存されているレースがない場合はNoneを返す
+    """
     session = SESSION()
-    sql_statement = session.query(Result).filter().statement
-    df = pd.read_sql(
-        sql_statement,
-        session.bind
-    )
+    latest_date = session.query(func.max(RaceDateMapping.date)).scalar()
     session.close()
-    return df
+    return latest_date
 
 
-def read_race() -> pd.DataFrame:
-    session = SESSION()
-    sql_statement = session.query(Race).filter().statement
-    df = pd.read_sql(
-        sql_statement,
-        session.bind
-    )
-    session.close()
-    return df
+def build_query(
+    table_name: str,
+    columns: Optional[list] = None,
+    race_id_ls: Optional[list] = None,
+    horse_id_ls: Optional[list] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    venue_id_ls: Optional[list] = None
+):
+    """
+    table_nameのテーブルから、条件に合う行のcolumns列を取得するSELECT文を作成する
+    条件はSQLのWHERE句として組み立て、データベース側で絞り込む
 
+    race_id列を持たないテーブル(horse_profile, pedigree)にレースの条件を指定した場合は、
+    条件に合うレースに出走した馬に絞り込む
 
-def read_refund() -> pd.DataFrame:
+    Parameters
+    ----------
+    table_name: str
+        対象のテーブル名
+    columns: Optional[list[str]]
+        取得する列名 (指定しない場合は全ての列)
+    race_id_ls: Optional[list[str]]
+        対象のレースID
+    horse_id_ls: Optional[list[str]]
+        対象の馬ID
+    start_date: Optional[date]
+        この日以降に開催されたレースに絞り込む
+    end_date: Optional[date]
+        この日以前に開催されたレースに絞り込む
+    venue_id_ls: Optional[list[str]]
+        対象の開催地ID (Mapping.PLACE_ID_MAPPINGの値、race_idの5, 6文字目)
+    """
+    model = MODELS[table_name]
+    table = model.__table__
+    selected = [table.columns[column] for column in columns] if columns is not None else [table]
+    query = select(selected)
+
+    def filter_race(query, race_id_column):
+        if race_id_ls is not None:
+            query = query.where(race_id_column.in_(race_id_ls))
+        if venue_id_ls is not None:
+            query = query.where(func.substr(race_id_column, 5, 2).in_(venue_id_ls))
+        if start_date is not None or end_date is not None:
+            # race_idの先頭4文字は開催年のため、年で分割したテーブルを絞り込めるようrace_idの範囲も指定する
+            if start_date is not None:
+                query = query.where(race_id_column >= str(start_date.year))
+            if end_date is not None:
+                query = query.where(race_id_column < str(end_date.year + 1))
+            date_query = select([RaceDateMapping.race_id])
+            if start_date is not None:
+                date_query = date_query.where(RaceDateMapping.date >= start_date)
+            if end_date is not None:
+                date_query = date_query.where(RaceDateMapping.date <= end_date)
+            query = query.where(race_id_column.in_(date_query))
+        return query
+
+    has_race_filter = any(value is not None for value in [race_id_ls, venue_id_ls, start_date, end_date])
+    if 'race_id' in table.columns:
+        query = filter_race(query, table.columns['race_id'])
+    elif has_race_filter:
+        query = query.where(table.columns['horse_id'].in_(filter_race(select([Result.horse_id]), Result.race_id)))
+    if horse_id_ls is not None:
+        query = query.where(table.columns['horse_id'].in_(horse_id_ls))
+    return query
+
+
+def read_table(
+    table_name: str,
+    chunksize: Optional[int] = None,
+    **filters
+) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+    """
+    table_nameのテーブルから条件に合う行を読み込む
+
+    Parameters
+    ----------
+    table_name: str
+        対象のテーブル名
+    chunksize: Optional[int]
+        指定した場合はサーバサイドカーソルでchunksize行ずつ読み込み、DataFrameを順に返すイテレータを返す
+    **filters
+        build_queryの条件 (columns, race_id_ls, horse_id_ls, start_date, end_date, venue_id_ls)
+
+    Database.READ_SOURCEが'mirror'の場合は、データベースの代わりにParquetMirrorのスナップショットから読み込む
+    """
+    if Database.READ_SOURCE == 'mirror':
+        # データベースに接続せず、ParquetMirrorのスナップショットから読み込む
+        from backend.module.crud.parquet_mirror import ParquetMirror
+        return ParquetMirror().read(table_name, chunksize=chunksize, **filters)
+    query = build_query(table_name, **filters)
+    if chunksize is not None:
+        return iter_table(query, chunksize)
     session = SESSION()
-    sql_statement = session.query(Refund).filter().statement
-    df = pd.read_sql(
-        sql_statement,
-        session.bind
-    )
+    df = pd.read_sql(query, session.bind)
     session.close()
     return df
 
 
-def read_race_card() -> pd.DataFrame:
+def iter_table(query, chunksize: int) -> Iterator[pd.DataFrame]:
     session = SESSION()
-    sql_statement = session.query(RaceCard).filter().statement
-    df = pd.read_sql(
-        sql_statement,
-        session.bind
-    )
-    session.close()
-    return df
+    # 全ての行をクライアントに読み込まないよう、サーバサイドカーソルを利用する
+    connection = session.connection(execution_options={'stream_results': True})
+    try:
+        for df in pd.read_sql(query, connection, chunksize=chunksize):
+            yield df
+    finally:
+        session.close()
 
 
-def read_race_date_mapping() -> pd.DataFrame:
+def read_horse_profile(**filters) -> pd.DataFrame:
+    return read_table('horse_profile', **filters)
+
+
+def read_result(**filters) -> pd.DataFrame:
+    return read_table('result', **filters)
+
+
+def read_race(**filters) -> pd.DataFrame:
+    return read_table('race', **filters)
+
+
+def read_refund(**filters) -> pd.DataFrame:
+    return read_table('refund', **filters)
+
+
+def read_race_card(**filters) -> pd.DataFrame:
+    return read_table('race_card', **filters)
+
+
+def read_race_date_mapping(**filters) -> pd.DataFrame:
+    return read_table('race_date_mapping', **filters)
+
+
+def read_pedigree(**filters) -> pd.DataFrame:
+    return read_table('pedigree', **filters)
+
+
+def read_performance_average(df: pd.DataFrame, col: str, target_ls: list) -> pd.DataFrame:
+    """
+    dfの各行に、同じcolの値を持つ開催日より前の全てのレースのtarget_lsの平均を列として追加する
+    (DataMerger.merge_all_averageのn_last='all'と同じ値)
+
+    平均はマテリアライズドビュー(Database.PERFORMANCE_VIEWS)の累積値から、
+    (entity_id, date)のインデックスで開催日より前の最後の行を引いて求める。
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        平均を追加する対象 (col, date列を持つ)
+    col: str
+        平均を取る単位 (horse_id, jockey_id, trainer_id, owner_id, breeder_id)
+    target_ls: list[str]
+        平均を取る列
+
+    Returns
+    -------
+    merged_df: pd.DataFrame
+        avg_<列名>_for_allR_by_<col> の列を追加したdf
+    """
+    target = df[[col, 'date']].dropna().drop_duplicates()
+    averages = ', '.join(
+        f'p."sum_{target_col}" / NULLIF(p."count_{target_col}", 0) AS "avg_{target_col}_for_allR_by_{col}"'
+        for target_col in target_ls
+    )
+    query = text(f"""
+        SELECT t.entity_id AS "{col}", t.date, {averages}
+        FROM unnest(CAST(:entity_ids AS text[]), CAST(:dates AS date[])) AS t(entity_id, date)
+        LEFT JOIN LATERAL (
+            SELECT * FROM {Database.PERFORMANCE_VIEWS[col]} v
+            WHERE v.entity_id = t.entity_id AND v.date < t.date
+            ORDER BY v.date DESC
+            LIMIT 1
+        ) p ON true
+    """)
     session = SESSION()
-    sql_statement = session.query(RaceDateMapping).filter().statement
-    df = pd.read_sql(
-        sql_statement,
-        session.bind
+    avg_df = pd.read_sql(
+        query,
+        session.bind,
+        params={'entity_ids': list(target[col]), 'dates': list(pd.to_datetime(target['date']).dt.date)}
     )
     session.close()
-    return df
+    avg_df['date'] = pd.to_datetime(avg_df['date']).dt.date
+    _df = df.copy()
+    _df['date'] = pd.to_datetime(_df['date']).dt.date
+    merged_df = _df.merge(avg_df, on=[col, 'date'], how='left')
+    merged_df['date'] = df['date'].values
+    merged_df.index = df.index
+    return merged_df
@@ -1,149 +1,225 @@
+import io
+import logging
 import pandas as pd
 from typing import Callable
-from backend.db.settings import SESSION
+from backend.environment.database import Database
+from backend.db.settings import SESSION, ENGINE
 from backend.db.models import (
     HorseProfile,
     Result,
     Race,
     Refund,
     RaceCard,
-    RaceDateMapping
+    RaceDateMapping,
+    Pedigree
 )
-from sqlalchemy.exc import OperationalError
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
 from sqlalchemy.orm.session import Session
 
+logger = logging.getLogger(__name__)
 
-def update(func: Callable[[pd.DataFrame, Session], None]) -> Callable[[pd.DataFrame], None]:
-    def wrapper(df: pd.DataFrame) -> None:
+
+def update(func: Callable[[pd.DataFrame, Session], None]) -> Callable[[pd.DataFrame], bool]:
+    """
+    書き込みに成功した場合はTrue、サーバが起動していない場合や書き込みに失敗した場合はFalseを返す
+    (失敗したデータは書き込まず、呼び出し元(BatchWriterなど)で再開時に取得し直す)
+    """
+    def wrapper(df: pd.DataFrame) -> bool:
+        session = SESSION()
         try:
-            session = SESSION()
             func(df, session)
-            session.close()
+            return True
         except OperationalError:
-            print('サーバが起動していません。')
+            session.rollback()
+            logger.error('%s: サーバが起動していません。', func.__name__)
+            return False
+        except SQLAlchemyError:
+            # NOT NULLの列が欠けた行などで失敗した場合も、パイプライン全体は止めない
+            session.rollback()
+            logger.exception('%s: %d行の書き込みに失敗しました。', func.__name__, len(df))
+            return False
+        finally:
+            session.close()
     return wrapper
 
 
+def bulk_insert(model, df: pd.DataFrame, session: Session, on_conflict: str = 'nothing') -> None:
+    """
+    dfをまとめてmodelのテーブルに書き込む
+    主キーが重複する行は、INSERT ... ON CONFLICT により1回の文の中で処理する
+
+    Parameters
+    ----------
+    model: Base
+        書き込み先のテーブルのモデル
+    df: pd.DataFrame
+        書き込むデータ (モデルにない列は無視する)
+    session: Session
+        書き込みに利用するセッション
+    on_conflict: str default 'nothing'
+        'nothing': 保存済みの行を残す, 'update': 保存済みの行を上書きする
+    """
+    if df.empty:
+        return
+    ensure_partitions(model, df, session)
+    primary_keys = [column.name for column in model.__table__.primary_key.columns]
+    columns = [column.name for column in model.__table__.columns if column.name in df.columns]
+    # 同じ文の中で主キーが重複するとON CONFLICT DO UPDATEが失敗するため、後の行を優先する
+    _df = df[columns].drop_duplicates(subset=primary_keys, keep='last')
+    if len(_df) >= Database.COPY_THRESHOLD:
+        copy_insert(model, _df, session, on_conflict)
+        return
+    # NaNはNULLとして書き込み、numpyの型はpythonの型に変換する
+    _df = _df.astype(object).where(_df.notna(), None)
+    for i in range(0, len(_df), Database.INSERT_CHUNK_SIZE):
+        statement = insert(model.__table__).values(_df.iloc[i:i+Database.INSERT_CHUNK_SIZE].to_dict(orient='records'))
+        if on_conflict == 'update':
+            statement = statement.on_conflict_do_update(
+                index_elements=primary_keys,
+                set_={column: statement.excluded[column] for column in columns if column not in primary_keys}
+            )
+        else:
+            statement = statement.on_conflict_do_nothing(index_elements=primary_keys)
+        session.execute(statement)
+    session.commit()
+
+
+# 作成済みであることを確認した(テーブル名, 年)
+created_partitions: set = set()
+
+
+def ensure_partitions(model, df: pd.DataFrame, session: Session) -> None:
+    """
+    年で分割したテーブル(Database.PARTITIONED_TABLES)に書き込む前に、dfのrace_idの年のテーブルを作成する
+    (DEFAULTのテーブルに書き込まれると、後からその年のテーブルを作成できなくなるため)
+    """
+    table_name = model.__table__.name
+    if table_name not in Database.PARTITIONED_TABLES:
+        return
+    years = set(df['race_id'].str[:4]) - set(year for _table_name, year in created_partitions if _table_name == table_name)
+    if not years:
+        return
+    is_partitioned = session.execute(
+        text('SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table_name)'),
+        {'table_name': table_name}
+    ).first() is not None
+    # 分割前のテーブル(v004のマイグレーションを適用していない場合)には何もせず、適用後に作成できるよう記録もしない
+    if not is_partitioned:
+        return
+    for year in sorted(years):
+        if year.isdigit():
+            session.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {table_name}_{year} PARTITION OF {table_name} "
+                f"FOR VALUES FROM ('{year}') TO ('{int(year) + 1}')"
+            ))
+        created_partitions.add((table_name, year))
+
+
+def copy_insert(model, df: pd.DataFrame, session: Session, on_conflict: str = 'nothing') -> None:
+    """
+    dfをCOPY FROM STDINで一時テーブルに流し込み、主キーで対象のテーブルに反映する
+    過去数年分をまとめて書き込む場合など、行数が多い場合はINSERTより大幅に速い
+
+    Parameters
+    ----------
+    model: Base
+        書き込み先のテーブルのモデル
+    df: pd.DataFrame
+        書き込むデータ (モデルにない列は無視する)
+    session: Session
+        書き込みに利用するセッション (一時テーブルへの流し込みと反映を同じトランザクションで行う)
+    on_conflict: str default 'nothing'
+        'nothing': 保存済みの行を残す, 'update': 保存済みの行を上書きする
+    """
+    if df.empty:
+        return
+    ensure_partitions(model, df, session)
+    table = model.__table__
+    primary_keys = [column.name for column in table.primary_key.columns]
+    columns = [column.name for column in table.columns if column.name in df.columns]
+    _df = df[columns].copy()
+    # 欠損値を含む整数の列はfloatになっているため、整数として書き出す
+    for column in columns:
+        if table.columns[column].type.python_type is int and _df[column].dtype.kind == 'f':
+            _df[column] = _df[column].astype('Int64')
+    buffer = io.StringIO()
+    _df.to_csv(buffer, index=False, header=False, na_rep='\\N')
+    buffer.seek(0)
+
+    quoted_columns = ', '.join(f'"{column}"' for column in columns)
+    quoted_keys = ', '.join(f'"{column}"' for column in primary_keys)
+    staging = f'staging_{table.name}'
+    if on_conflict == 'update':
+        conflict = 'DO UPDATE SET ' + ', '.join(
+            f'"{column}" = EXCLUDED."{column}"' for column in columns if column not in primary_keys
+        )
+    else:
+        conflict = 'DO NOTHING'
+    cursor = session.connection().connection.cursor()
+    cursor.execute(f'CREATE TEMP TABLE IF NOT EXISTS {staging} (LIKE "{table.name}" INCLUDING DEFAULTS) ON COMMIT DROP')
+    cursor.copy_expert(f"COPY {staging} ({quoted_columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer)
+    cursor.execute(
+        f'INSERT INTO "{table.name}" ({quoted_columns}) '
+        f'SELECT DISTINCT ON ({quoted_keys}) {quoted_columns} FROM {staging} '
+        f'ON CONFLICT ({quoted_keys}) {conflict}'
+    )
+    cursor.close()
+    session.commit()
+
+
 @update
 def update_horse_profile(df: pd.DataFrame, session: Session) -> None:
-    datas: list = list()
-    for _, row in df.iterrows():
-        if not session.query(HorseProfile).filter(HorseProfile.horse_id == row['horse_id']).all():
-            data = dict()
-            data['horse_id'] = row['horse_id']
-            data['breeder_id'] = row['breeder_id']
-            data['owner_id'] = row['owner_id']
-            data['trainer_id'] = row['trainer_id']
-            data['near_relation_horse_id_0'] = row['near_relation_horse_id_0']
-            data['near_relation_horse_id_1'] = row['near_relation_horse_id_1']
-            data['horse_name'] = row['horse_name']
-            data['breeder_name'] = row['breeder_name']
-            data['owner_name'] = row['owner_name']
-            data['trainer_name'] = row['trainer_name']
-            data['near_relation_horse_name_0'] = row['near_relation_horse_name_0']
-            data['near_relation_horse_name_1'] = row['near_relation_horse_name_1']
-            data['sex'] = row['sex']
-            data['birthday'] = row['birthday']
-            data['father_id'] = row['father_id']
-            data['father_name'] = row['father_name']
-            data['mother_id'] = row['mother_id']
-            data['mother_name'] = row['mother_name']
-            datas.append(data)
-    session.execute(HorseProfile.__table__.insert(), datas)
-    session.commit()
+    bulk_insert(HorseProfile, df, session)
 
 
 @update
 def update_result(df: pd.DataFrame, session: Session) -> None:
-    datas: list = list()
-    for _, row in df.iterrows():
-        if not session.query(Result).filter(Result.race_id == row['race_id'] and Result.horse_id == row['horse_id']).all():
-            data = dict()
-            data['race_id'] = row['race_id']
-            data['horse_id'] = row['horse_id']
-            data['order'] = row['order']
-            data['odds'] = row['odds']
-            data['last3F'] = row['last3F']
-            data['time_idx'] = row['time_idx']
-            data['ground_state_idx'] = row['ground_state_idx']
-            data['passing'] = row['passing']
-            data['remark'] = row['remark']
-            data['diff_time'] = row['diff_time']
-            data['prize'] = row['prize']
-            datas.append(data)
-    session.execute(Result.__table__.insert(), datas)
-    session.commit()
+    bulk_insert(Result, df, session)
 
 
 @update
 def update_race_card(df: pd.DataFrame, session: Session) -> None:
-    datas: list = list()
-    for _, row in df.iterrows():
-        if not session.query(RaceCard).filter(RaceCard.race_id == row['race_id'] and RaceCard.horse_id == row['horse_id']).all():
-            data = dict()
-            data['race_id'] = row['race_id']
-            data['horse_id'] = row['horse_id']
-            data['jockey_id'] = row['jockey_id']
-            data['jockey_name'] = row['jockey_name']
-            data['bracket_number'] = row['bracket_number']
-            data['horse_number'] = row['horse_number']
-            data['weight_carry'] = row['weight_carry']
-            data['popular'] = row['popular']
-            data['age'] = row['age']
-            data['weight_horse'] = row['weight_horse']
-            data['diff_weight_horse'] = row['diff_weight_horse']
-            datas.append(data)
-    session.execute(RaceCard.__table__.insert(), datas)
-    session.commit()
+    bulk_insert(RaceCard, df, session)
 
 
 @update
 def update_race(df: pd.DataFrame, session: Session) -> None:
-    datas: list = list()
-    for _, row in df.iterrows():
-        if not session.query(Race).filter(Race.race_id == row['race_id']).all():
-            data = dict()
-            data['race_id'] = row['race_id']
-            data['race_name'] = row['race_name']
-            data['turn'] = row['turn']
-            data['weather'] = row['weather']
-            data['course_len'] = row['course_len']
-            data['course_type'] = row['course_type']
-            data['ground_state'] = row['ground_state']
-            data['race_class'] = row['race_class']
-            data['nth_race'] = row['nth_race']
-            data['nth_day'] = row['nth_day']
-            data['nth_time'] = row['nth_time']
-            data['venue'] = row['venue']
-            datas.append(data)
-    session.execute(Race.__table__.insert(), datas)
-    session.commit()
+    bulk_insert(Race, df, session)
 
 
 @update
 def update_race_date_mapping(df: pd.DataFrame, session: Session) -> None:
-    datas: list = list()
-    for _, row in df.iterrows():
-        if not session.query(RaceDateMapping).filter(RaceDateMapping.race_id == row['race_id']).all():
-            data = dict()
-            data['race_id'] = row['race_id']
-            data['date'] = row['date']
-            datas.append(data)
-    session.execute(RaceDateMapping.__table__.insert(), datas)
-    session.commit()
+    bulk_insert(RaceDateMapping, df, session)
 
 
 @update
 def update_refund(df: pd.DataFrame, session: Session) -> None:
-    datas: list = list()
-    for _, row in df.iterrows():
-        if not session.query(Refund).filter(Refund.race_id == row['race_id'] and Refund.betting == row['betting']).all():
-            data = dict()
-            data['race_id'] = row['race_id']
-            data['betting'] = row['betting']
-            data['horse_number'] = row['horse_number']
-            data['money'] = row['money']
-            data['popular'] = row['popular']
-            datas.append(data)
-    session.execute(Refund.__table__.insert(), datas)
-    session.commit()
+    bulk_insert(Refund, df, session)
+
+
+@update
+def update_pedigree(df: pd.DataFrame, session: Session) -> None:
+    bulk_insert(Pedigree, df, session)
+
+
+def refresh_performance_views(concurrently: bool = True) -> None:
+    """
+    成績の累積値のマテリアライズドビュー(Database.PERFORMANCE_VIEWS)を更新する
+    スクレイピングでresultなどを更新した後に実行する
+    ビューが作成されていない(v003のマイグレーションを適用していない)場合は何もしない
+
+    Parameters
+    ----------
+    concurrently: bool default True
+        Trueの場合、更新中もビューを読み込めるようにする (一意なインデックスを利用する)
+    """
+    with ENGINE.begin() as connection:
+        for view_name in Database.PERFORMANCE_VIEWS.values():
+            if connection.exec_driver_sql('SELECT to_regclass(%s)', (view_name,)).scalar() is None:
+                print(f'{view_name}が存在しないため更新しません。(backend.db.migrations.migratorで作成してください)')
+                continue
+            connection.exec_driver_sql(
+                f'REFRESH MATERIALIZED VIEW {"CONCURRENTLY " if concurrently else ""}{view_name}'
+            )
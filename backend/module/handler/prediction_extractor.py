@@ -1,15 +1,27 @@
 import numpy as np
 import pandas as pd
+from typing import Optional
 from backend.environment.columns import Columns
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
+from backend.environment.scraping import Scraping
+from backend.module.scraping import make_soup, OddsClient, BrowserPool
 
 
 class PredictionExtractor:
-    def __init__(self, prediction_handler):
+
+    # 起動したheadless Chromeはレースを跨いで使い回す
+    browser_pool: Optional[BrowserPool] = None
+
+    def __init__(self, prediction_handler, odds_source=Scraping.ODDS_SOURCE):
+        """
+        Parameters
+        ----------
+        prediction_handler: PredictionBrancher
+            整形した予測結果の処理を行う
+        odds_source: str default Scraping.ODDS_SOURCE
+            'api'の場合はオッズAPIからHTTPのみで、'browser'の場合はheadless Chromeでオッズを取得する
+        """
         self.prediction_handler = prediction_handler
+        self.odds_source = odds_source
 
     def __call__(self, predictions, fukusho_odds):
         """
@@ -32,12 +44,16 @@ class PredictionExtractor:
             columns = ["本命馬ランク", "1着予想◎", "2着予想○", "3着予想▲", "4着予想△", "5着予想☆", "6着予想×", "頭数"]
         """
         shaped_predictions = pd.DataFrame(index=[], columns=Columns.PREDICTION_COLUMNS)
+        # APIから取得する場合は、全レースのオッズをまとめて並行に取得しておく
+        raw_oddses = dict()
+        if self.odds_source == 'api':
+            raw_oddses = OddsClient().fetch_all(sorted(set(predictions.index.get_level_values(0))))
         for one_race in predictions.groupby(level=0):
 
             race_id = one_race[0]
             one_race = one_race[1].sort_values('score', ascending=False)
 
-            oddses = self.__scrape_oddses(race_id, one_race)
+            oddses = self.__scrape_oddses(race_id, one_race, raw_oddses.get(race_id))
             fukusho_odds.update_recommendation(oddses)
             one_race = self.__shape_one_race(race_id, fukusho_odds.recommendation, one_race)
             fav_rank = self.__get_fav_rank(one_race)
@@ -58,7 +74,7 @@ class PredictionExtractor:
 
         return fukusho_odds
 
-    def __scrape_oddses(self, race_id, one_race):
+    def __scrape_oddses(self, race_id, one_race, raw_oddses=None):
         """
         race_idが示すレースの単勝及び複勝オッズを取得する。
 
@@ -69,6 +85,9 @@ class PredictionExtractor:
         one_race: pd.DataFrame
             1レース分の予測結果
             columns = ['horse_number', 'score']
+        raw_oddses: Optional[pd.DataFrame] default None
+            OddsClientで取得済みのオッズ
+            columns = ['horse_number', 'tansho', 'fukusho']
 
         Returns
         -------
@@ -81,15 +100,13 @@ class PredictionExtractor:
         KeyError
             スクレイプ対象のwebサイトが確立していない場合
         """
-        oddses = pd.DataFrame()
-        driver = self.__set_selenium()
-        driver.get('https://race.netkeiba.com/odds/index.html?type=b1&race_id='+race_id+'&rf=shutuba_submenu')
-        html = driver.page_source.encode('utf-8')
-        _dfs = pd.read_html(str(BeautifulSoup(html, "html.parser").html))
-        oddses['race_id'] = [race_id] * len(_dfs[0])
-        oddses['horse_number'] = _dfs[0]['馬番']
-        oddses['tansho'] = _dfs[0]['オッズ']
-        oddses['fukusho'] = _dfs[1]['オッズ']
+        if self.odds_source == 'api':
+            if raw_oddses is None:
+                raise KeyError(race_id)
+            oddses = raw_oddses.copy()
+        else:
+            oddses = self.__scrape_oddses_by_browser(race_id)
+        oddses.insert(0, 'race_id', [race_id] * len(oddses))
         oddses.set_index('horse_number', inplace=True)
         oddses['fukusho'] = oddses.loc[:, 'fukusho']
         oddses['score'] = list(one_race.sort_values('horse_number')['score'])
@@ -98,22 +115,26 @@ class PredictionExtractor:
         oddses['popular'] = [i+1 for i in range(len(oddses))]
         return oddses.sort_index()
 
-    def __set_selenium(self):
+    def __scrape_oddses_by_browser(self, race_id):
         """
-        Seleniumライブラリを用いたスクレイピングの準備を行う
+        headless Chromeでオッズページを表示し、単勝及び複勝オッズを取得する
 
         Returns
         -------
-        driver : webdriver.chrome.webdriver.WebDriver
-            chromeの操作のためのドライバ
+        oddses: pd.DataFrame
+            columms = ['horse_number', 'tansho', 'fukusho']
         """
-        options = webdriver.ChromeOptions()
-        options.add_argument('--headless')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-        driver.implicitly_wait(15)
-        return driver
+        if PredictionExtractor.browser_pool is None:
+            PredictionExtractor.browser_pool = BrowserPool()
+        with PredictionExtractor.browser_pool.acquire() as driver:
+            driver.get(Scraping.RACE_BASE_URL + '/odds/index.html?type=b1&race_id='+race_id+'&rf=shutuba_submenu')
+            html = driver.page_source.encode('utf-8')
+        _dfs = pd.read_html(str(make_soup(html, 'utf-8').html))
+        oddses = pd.DataFrame()
+        oddses['horse_number'] = _dfs[0]['馬番']
+        oddses['tansho'] = _dfs[0]['オッズ']
+        oddses['fukusho'] = _dfs[1]['オッズ']
+        return oddses
 
     def __determine_fukusho_odds(self, oddses, one_race):
         """
@@ -1,9 +1,10 @@
 from backend.module.crud.read import read_race_date_mapping
+from backend.module.utils.lazy import Lazy
 
 
 class RaceDateMapping:
 
-    df = read_race_date_mapping()
+    df = Lazy(read_race_date_mapping)
 
     def get_date(self, race_id: str):
         return self.df[self.df['race_id'] == race_id].iat[0, 1]
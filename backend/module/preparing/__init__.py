@@ -1,3 +1,12 @@
 # flake8: noqa
+from .window_aggregator import WindowAggregator
 from .data_merger import DataMerger
-from .table_merger import TableMerger
+
+
+def __getattr__(name: str):
+    # table_mergerはrepositoryをimportし、repositoryはDataMergerをimportするため、
+    # 循環importにならないようTableMergerは参照された時に初めてimportする
+    if name == 'TableMerger':
+        from .table_merger import TableMerger
+        return TableMerger
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -2,6 +2,9 @@ import pandas as pd
 from tqdm import tqdm
 from typing import Any
 from datetime import date
+from backend.environment.feature import Feature
+from backend.module.preparing.window_aggregator import WindowAggregator
+from backend.module.crud.read import read_performance_average
 
 
 class DataMerger:
@@ -25,6 +28,13 @@ class DataMerger:
         self.added_date_df = added_date_df
 
     def merge_all_average(self, df: pd.DataFrame, col: str, n_last: Any = 'all') -> pd.DataFrame:
+        target_ls = self.horse_target_ls if col == 'horse_id' else self.target_ls
+        if Feature.ENGINE == 'duckdb':
+            # 全ての開催日の平均をウィンドウ関数でまとめて計算する
+            return WindowAggregator(self.added_date_df).merge_average(df, col, target_ls, n_last)
+        if Feature.ENGINE == 'view' and n_last == 'all':
+            # データベースのマテリアライズドビューに保存された累積値から求める
+            return read_performance_average(df, col, target_ls)
         date_ls = df['date'].unique()
         temp_ls = list()
         pbar = tqdm(total=len(date_ls))
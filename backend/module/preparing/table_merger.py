@@ -7,15 +7,16 @@ from backend.module.repository import (
     HorseProfile,
     RaceCard,
 )
+from backend.module.utils.lazy import Lazy
 
 
 class TableMerger:
 
-    race = Race()
-    race_card = RaceCard()
-    result = Result()
-    horse_profile = HorseProfile()
-    race_date_mapping = RaceDateMapping()
+    race = Lazy(Race)
+    race_card = Lazy(RaceCard)
+    result = Lazy(Result)
+    horse_profile = Lazy(HorseProfile)
+    race_date_mapping = Lazy(RaceDateMapping)
 
     def __init__(self, type: str = 'train') -> None:
         self.type = type
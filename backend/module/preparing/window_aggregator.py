@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+from typing import Any
+from backend.environment.feature import Feature
+
+
+class WindowAggregator:
+    """
+    DataMerger.merge_all_average と同じ過去成績の平均を、DuckDBのウィンドウ関数でまとめて計算する
+
+    keyごとに開催日順の累積和・累積件数を1度だけ計算し、
+    各行の開催日より前の最後のレース(ASOF JOIN)までの累積値から、直近n_last件(または全件)の平均を求める。
+    開催日毎にpandasで絞り込む場合と異なり、全ての開催日を1つのクエリで複数スレッドで計算する。
+
+    Attributes
+    ----------
+    history_df: pd.DataFrame
+        平均の対象となる過去成績 (DataMerger.added_date_df)
+    """
+
+    def __init__(self, history_df: pd.DataFrame, threads: int = Feature.THREADS) -> None:
+        # duckdbはFeature.ENGINEに"duckdb"を指定した場合のみ使うため、インスタンス化する時に初めてimportする
+        try:
+            import duckdb
+        except ImportError:
+            raise ImportError('Feature.ENGINEに"duckdb"を指定する場合は、duckdbをインストールしてください。')
+        self.history_df = history_df
+        self.connection = duckdb.connect()
+        self.connection.execute(f'SET threads TO {threads}')
+
+    def merge_average(self, df: pd.DataFrame, col: str, target_ls: list, n_last: Any = 'all') -> pd.DataFrame:
+        """
+        dfの各行に、同じcolの値を持つ開催日より前のレースのtarget_lsの平均を列として追加する
+
+        Parameters
+        ----------
+        df: pd.DataFrame
+            平均を追加する対象 (col, date列を持つ)
+        col: str
+            平均を取る単位 (horse_id, jockey_id など)
+        target_ls: list[str]
+            平均を取る列
+        n_last: Any default 'all'
+            直近何レース分の平均を取るか ('all'の場合は全てのレース)
+
+        Returns
+        -------
+        merged_df: pd.DataFrame
+            avg_<列名>_for_<n_last>R_by_<col> の列を追加したdf
+        """
+        if n_last != 'all' and not (isinstance(n_last, int) and n_last > 0):
+            raise TypeError
+        # 日付はエポックからの日数に変換し、SQLでは整数として比較する
+        history = self.history_df[[col] + target_ls].copy()
+        history['day'] = self.__to_day(self.history_df['date'])
+        history = history.astype({target: float for target in target_ls})
+        target = pd.DataFrame({'key': df[col].values, 'day': self.__to_day(df['date'])}).drop_duplicates()
+        self.connection.register('history', history)
+        self.connection.register('target', target)
+
+        columns = [f'"{target}"' for target in target_ls]
+        cumulative = ', '.join(
+            f'SUM({column}) OVER w AS "s_{i}", COUNT({column}) OVER w AS "c_{i}"' for i, column in enumerate(columns)
+        )
+        if n_last == 'all':
+            averages = ', '.join(
+                f'cur."s_{i}" / NULLIF(cur."c_{i}", 0) AS "avg_{i}"' for i in range(len(columns))
+            )
+            previous = ''
+        else:
+            averages = ', '.join(
+                f'(cur."s_{i}" - COALESCE(prev."s_{i}", 0)) / NULLIF(cur."c_{i}" - COALESCE(prev."c_{i}", 0), 0) AS "avg_{i}"'
+                for i in range(len(columns))
+            )
+            previous = f'LEFT JOIN cumulative prev ON prev.key = last_row.key AND prev.rn = last_row.rn - {int(n_last)}'
+        query = f"""
+            WITH cumulative AS (
+                SELECT "{col}" AS key, day, ROW_NUMBER() OVER w AS rn, {cumulative}
+                FROM history
+                WHERE "{col}" IS NOT NULL
+                WINDOW w AS (PARTITION BY "{col}" ORDER BY day ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW)
+            ),
+            daily AS (
+                SELECT key, day, MAX(rn) AS rn FROM cumulative GROUP BY key, day
+            ),
+            last_row AS (
+                -- 開催日より前(当日は含まない)の最後のレース
+                SELECT target.key, target.day, daily.rn
+                FROM target ASOF JOIN daily ON target.key = daily.key AND target.day > daily.day
+            )
+            SELECT last_row.key, last_row.day, {averages}
+            FROM last_row
+            JOIN cumulative cur ON cur.key = last_row.key AND cur.rn = last_row.rn
+            {previous}
+        """
+        avg_df = self.connection.execute(query).df()
+        self.connection.unregister('history')
+        self.connection.unregister('target')
+
+        avg_df.columns = ['key', 'day'] + [
+            'avg_{}_for_{}R_by_{}'.format(target, n_last, col) for target in target_ls
+        ]
+        _df = df.copy()
+        _df['_day'] = self.__to_day(df['date'])
+        merged_df = _df.merge(
+            avg_df.rename(columns={'key': col, 'day': '_day'}),
+            on=[col, '_day'],
+            how='left'
+        ).drop('_day', axis=1)
+        merged_df.index = df.index
+        return merged_df
+
+    def __to_day(self, dates: pd.Series) -> np.ndarray:
+        return pd.to_datetime(dates).values.astype('datetime64[D]').astype(np.int64)
@@ -3,12 +3,13 @@ from backend.environment.path import Path
 from backend.module.mapping import RaceDateMapping
 from backend.module.record import ExcelDecorator, BasicExcelWriter
 from backend.environment.mapping import Mapping
+from backend.module.utils.lazy import Lazy
 
 
 class PredictionWriter(BasicExcelWriter):
 
     path = Path()
-    race_date_mapping = RaceDateMapping()
+    race_date_mapping = Lazy(RaceDateMapping)
 
     def __init__(self, refund_calculator):
         self.refund_calculator = refund_calculator
@@ -1,10 +1,9 @@
 import pandas as pd
-import numpy as np
-import time
-import requests
 from tqdm import tqdm
-from sklearn.preprocessing import LabelEncoder
-from bs4 import BeautifulSoup
+from backend.environment.scraping import Scraping
+from backend.module.scraping import Fetcher, PageCache, PedigreeStore
+from backend.module.crud.read import read_pedigree, read_horse_profile
+from backend.module.crud.update import update_pedigree
 
 
 class Peds:
@@ -34,46 +33,40 @@ class Peds:
             全血統データをまとめてDataFrame型にしたもの
         """
 
-        peds_dict = {}
-        for horse_id in tqdm(horse_id_list):
-            if len(pre_ped_results) and horse_id in pre_ped_results.index:
-                continue
-            try:
-                time.sleep(1)
-                transrate_num = [
-                    0, 2, 6, 14, 30, 31, 15, 32, 33, 7, 16, 34,
-                    35, 17, 36, 37, 3, 8, 18, 38, 39, 19, 40,
-                    41, 9, 20, 42, 43, 21, 44, 45, 1, 4, 10, 22,
-                    46, 47, 23, 48, 49, 11, 24, 50, 51, 25, 52,
-                    53, 5, 12, 26, 54, 55, 27, 56, 57, 13, 28,
-                    58, 59, 29, 60, 61
-                    ]
-                ped = pd.Series([0] * len(transrate_num)).rename(horse_id)
-                url = "https://db.netkeiba.com/horse/ped/" + horse_id
-                # 自作
-                html = requests.get(url)
-                soup = BeautifulSoup(html.content, "html.parser")
-                texts = soup.find("table").find_all("td")
-                for idx, t in enumerate(texts):
-                    try:
-                        if len(t.find("a").get('href')[7:-1]) != 0:
-                            ped[transrate_num[idx]] = t.find("a").get('href')[7:-1]
-                        else:
-                            ped[transrate_num[idx]] = np.nan
-                    except Exception:
-                        ped[transrate_num[idx]] = np.nan
-                ped = ped.rename(horse_id)
-                peds_dict[horse_id] = ped.reset_index(drop=True)
-            except IndexError:
-                continue
-            except Exception as e:
-                print(e)
-                break
-            except Exception:
-                break
+        horse_id_list = [horse_id for horse_id in horse_id_list if not (len(pre_ped_results) and horse_id in pre_ped_results.index)]
+        # 保存済みの父・母の対応(horse_profileの父・母を含む)から血統表を組み立て、分からない祖先のページのみ取得する
+        store = PedigreeStore(pd.concat([
+            read_horse_profile(columns=['horse_id', 'father_id', 'mother_id']),
+            read_pedigree()
+        ]))
+        fetcher = Fetcher(cache=PageCache())
+        pbar = tqdm(total=len(horse_id_list))
+        remaining = horse_id_list
+        try:
+            while remaining:
+                missing_ls: list = list()
+                pending_ls: list = list()
+                for horse_id in remaining:
+                    missing = store.get_missing(horse_id)
+                    if missing is None:
+                        pbar.update(1)
+                        continue
+                    pending_ls.append(horse_id)
+                    if missing not in missing_ls:
+                        missing_ls.append(missing)
+                remaining = pending_ls
+                missing_ls = missing_ls[:Scraping.CHUNK_SIZE]
+                contents = fetcher.fetch_all([Scraping.DB_BASE_URL + "/horse/ped/" + horse_id for horse_id in missing_ls])
+                for horse_id in missing_ls:
+                    store.add_page(horse_id, contents[Scraping.DB_BASE_URL + "/horse/ped/" + horse_id])
+                # 取得した対応をデータベースに反映させる。
+                update_pedigree(store.pop_added())
+        except KeyboardInterrupt:
+            update_pedigree(store.pop_added())
+        pbar.close()
         # 列名をpeds_0, ..., peds_61にする
         try:
-            peds_df = pd.concat([peds_dict[key] for key in peds_dict], axis=1).T.add_prefix('peds_')
+            peds_df = pd.concat([store.get_vector(horse_id) for horse_id in horse_id_list], axis=1).T.add_prefix('peds_')
         except ValueError:
             return pre_ped_results
         if len(pre_ped_results.index):
@@ -82,6 +75,8 @@ class Peds:
             return peds_df
 
     def encode(self):
+        # sklearnは読み込みに時間がかかるため、使用する時に初めてimportする
+        from sklearn.preprocessing import LabelEncoder
         df = self.peds.copy()
         for column in df.columns:
             df = df.astype('str')
@@ -1,121 +1,104 @@
 import pandas as pd
-import time
 from typing import Union
 from tqdm import tqdm
-from urllib.request import urlopen
+from backend.environment.scraping import Scraping
+from backend.module.scraping import Fetcher, PageCache, RacePageExtractor, ScrapeJournal, BatchWriter
 from backend.module.crud.update import update_refund
 from backend.module.crud.read import read_refund
 
 
 class Refund:
-    def __init__(self, df=pd.DataFrame()) -> None:
+    def __init__(self, df=pd.DataFrame(), **filters) -> None:
+        """
+        dfを指定しない場合は、データベースからfilters(race_id_ls, start_date, end_date など)に合う払い戻しのみ読み込む
+        """
         if len(df):
             self.df = df
         else:
-            self.df = read_refund()
+            self.df = read_refund(**filters)
         self.df.set_index('race_id', inplace=True)
 
     @classmethod
     def scrape(cls, race_id_ls, mode='save') -> Union[None, pd.DataFrame]:
         refunds = {}
-        for race_id in tqdm(race_id_ls):
-            # TODO databaseから得られた値の型を調べる。
-            if not isinstance(race_id, str):
-                race_id = race_id.race_id
+        # TODO databaseから得られた値の型を調べる。
+        race_id_ls = [race_id if isinstance(race_id, str) else race_id.race_id for race_id in race_id_ls]
+        # 当日の払い戻しは確定前の可能性があるため、保存する場合のみキャッシュ及びジャーナルを利用する
+        if mode == 'save':
+            cache = PageCache()
+            journal = ScrapeJournal('refund')
+            done_keys = journal.done_keys()
+            race_id_ls = [race_id for race_id in race_id_ls if race_id not in done_keys]
+            # Scraping.FLUSH_SIZE件毎にデータベースに反映させる。
+            writer = BatchWriter({'refund': update_refund}, journal)
+        elif mode == 'return':
+            cache = None
+        else:
+            raise TypeError
+        urls = [Scraping.DB_BASE_URL + "/race/" + race_id for race_id in race_id_ls]
+        extractor = RacePageExtractor()
+        for race_id, html in zip(tqdm(race_id_ls), Fetcher(cache=cache).iter_fetch(urls)):
             try:
-                time.sleep(1)
-                url = "https://db.netkeiba.com/race/" + race_id
-                # 普通にスクレイピングすると複勝やワイドなどが区切られないで繋がってしまう。
-                # そのため、改行コードを文字列brに変換して後でsplitする
-                f = urlopen(url)
-                html = f.read()
-                html = html.replace(b'<br />', b'br')
-                df1 = pd.read_html(html, match='単勝')[1]
-                df2 = pd.read_html(html, match='三連複')[0]
-                # dfの1番目に単勝〜馬連、2番目にワイド〜三連単がある
-                df = pd.concat([df1, df2])
-                df.columns = ['betting', 'horse_number', 'money', 'popular']
-                df.set_index('betting', inplace=True)
-                # 複勝払い戻しの行を分割する
-                fukusho_row = df.loc['複勝', :].str.split('br', expand=True).T
-                fukusho_row.index = pd.Series([f'複勝_{i+1}' for i in range(len(fukusho_row))], name='betting')
-                df = pd.concat([df, fukusho_row]).drop('複勝')
-                # ワイド払い戻しの行を分割する
-                wide_row = df.loc['ワイド', :].str.split('br', expand=True).T
-                wide_row.index = pd.Series(['ワイド_12', 'ワイド_13', 'ワイド_23'], name='betting')
-                df = pd.concat([df, wide_row]).drop('ワイド')
-                df['race_id'] = [race_id] * len(df)
-                df.reset_index(inplace=True)
-                refunds[race_id] = df
-            except ValueError:
+                tree = extractor.parse(html or b'')
+                refund_df = extractor.extract_refund(race_id, tree)
+            except (AttributeError, IndexError, ValueError):
+                if mode == 'save':
+                    if cache is not None:
+                        cache.discard(Scraping.DB_BASE_URL + "/race/" + race_id)
+                    writer.fail(race_id)
+                    writer.flush()
                 return 'not found'
             except KeyboardInterrupt:
                 break
-        # pd.DataFrame型にして一つのデータにまとめる
-        refunds_df = pd.concat([refunds[key] for key in refunds])
+            if mode == 'save':
+                writer.add(race_id, {'refund': refund_df})
+            else:
+                refunds[race_id] = refund_df
         if mode == 'save':
-            update_refund(refunds_df)
+            writer.flush()
             return None
-        elif mode == 'return':
-            return cls(refunds_df)
-        else:
-            raise TypeError
+        # pd.DataFrame型にして一つのデータにまとめる
+        refunds_df = pd.concat([refunds[key] for key in refunds])
+        return cls(refunds_df)
 
     @property
     def fukusho(self):
         _ls = list()
         for i in range(3):
-            _ls.append(self.df[self.df['betting'] == f'複勝_{i+1}'][['horse_number', 'money']].add_suffix(f'{i+1}'))
-        _df = pd.concat(_ls, axis=1)
-        return self.__to_int(_df)
+            _df = self.df[self.df['betting'] == f'複勝_{i+1}'][['horse_number_0', 'money']]
+            _ls.append(_df.rename(columns={'horse_number_0': 'horse_number'}).add_suffix(f'{i+1}'))
+        return pd.concat(_ls, axis=1)
 
     @property
     def tansho(self):
-        _df = self.df[self.df['betting'] == '単勝'][['horse_number', 'money']]
-        return self.__to_int(_df)
+        _df = self.df[self.df['betting'] == '単勝'][['horse_number_0', 'money']]
+        return _df.rename(columns={'horse_number_0': 'horse_number'})
 
     @property
     def umaren(self):
-        _df = self.df[self.df['betting'] == '馬連'][['horse_number', 'money']]
-        _horse_number = _df['horse_number'].str.split('-', expand=True)[[0, 1]].add_prefix('horse_number')
-        _money = _df['money']
-        _df = pd.concat([_horse_number, _money], axis=1)
-        return self.__to_int(_df)
+        return self.__get_combination('馬連', 2)
 
     @property
     def umatan(self):
-        _df = self.df[self.df['betting'] == '馬単'][['horse_number', 'money']]
-        _horse_number = _df['horse_number'].str.split('→', expand=True)[[0, 1]].add_prefix('horse_number')
-        _money = _df['money']
-        _df = pd.concat([_horse_number, _money], axis=1)
-        return self.__to_int(_df)
+        return self.__get_combination('馬単', 2)
 
     @property
     def wide(self):
-        _ls = [list(), list()]
-        for i in ['12', '13', '23']:
-            for j, col in enumerate(['horse_number', 'money']):
-                _ls[j].append(self.df[self.df['betting'] == f'ワイド_{i}'][[col]].rename(columns={col: i}))
-        _horse_number = pd.concat(_ls[0], axis=1).stack().str.split('-', expand=True).add_prefix('horse_number_')
-        _money = pd.concat(_ls[1], axis=1).stack().rename('money')
-        _df = pd.concat([_horse_number, _money], axis=1)
-        return self.__to_int(_df)
+        _df = self.df[self.df['betting'].str.startswith('ワイド_')]
+        # (race_id, '12'/'13'/'23')をindexとする
+        _df = _df.set_index(_df['betting'].str[-2:].rename(None), append=True).sort_index()
+        return _df[['horse_number_0', 'horse_number_1', 'money']]
 
     @property
     def sanrentan(self):
-        _df = self.df[self.df['betting'] == '三連単'][['horse_number', 'money']]
-        _horse_number = _df['horse_number'].str.split('→', expand=True)[[0, 1, 2]].add_prefix('horse_number')
-        _money = _df['money']
-        _df = pd.concat([_horse_number, _money], axis=1)
-        return self.__to_int(_df)
+        return self.__get_combination('三連単', 3)
 
     @property
     def sanrenpuku(self):
-        _df = self.df[self.df['betting'] == '三連複'][['horse_number', 'money']]
-        _horse_number = _df['horse_number'].str.split('-', expand=True)[[0, 1, 2]].add_prefix('horse_number')
-        _money = _df['money']
-        _df = pd.concat([_horse_number, _money], axis=1)
-        return self.__to_int(_df)
+        return self.__get_combination('三連複', 3)
 
-    def __to_int(self, df: pd.DataFrame):
-        return df.apply(lambda x: pd.to_numeric(x.str.replace(',', ''), errors='coerce'))
+    def __get_combination(self, betting: str, n: int) -> pd.DataFrame:
+        # 馬番の組み合わせは取り込み時にhorse_number_0, horse_number_1, ...に分けて保存されている
+        columns = [f'horse_number_{i}' for i in range(n)]
+        _df = self.df[self.df['betting'] == betting][columns + ['money']]
+        return _df.rename(columns={column: f'horse_number{i}' for i, column in enumerate(columns)})
@@ -1,26 +1,36 @@
 import re
-import time
-import numpy as np
 import pandas as pd
 import copy
-from datetime import datetime, date
-from bs4 import BeautifulSoup
+from datetime import date
 from tqdm import tqdm
 from backend.environment.mapping import Mapping
-from backend.environment.netkeiba import Netkeiba
+from backend.environment.scraping import Scraping
 from backend.module.mapping import RaceDateMapping
+from backend.module.scraping import (
+    Fetcher,
+    PageCache,
+    RacePageExtractor,
+    KnownIds,
+    ScrapeJournal,
+    BatchWriter,
+    run_pipeline
+)
 from backend.module.preparing import DataMerger
 from backend.module.crud.update import (
     update_result,
-    update_race_date_mapping
+    update_race_date_mapping,
+    update_race,
+    update_race_card,
+    update_refund
 )
 from backend.module.crud.read import read_result
+from backend.module.utils.lazy import Lazy
 
 
 class Result(DataMerger):
 
-    race_date_mapping = RaceDateMapping()
-    raw_df = read_result()
+    race_date_mapping = Lazy(RaceDateMapping)
+    raw_df = Lazy(read_result)
 
     def __init__(self) -> None:
         # 取得したデータの処理
@@ -33,6 +43,8 @@ class Result(DataMerger):
     def scrape(race_id_dict: dict):
         """
         馬の過去成績データをスクレイピングする関数
+        レースページは一度だけ取得・解析し、race, race_card, refund, race_date_mapping も同時に更新する
+        取得したデータはScraping.FLUSH_SIZE件毎にデータベースへ書き込み、書き込み済みのレースは再開時に飛ばす
         Parameters:
         ----------
         race_id_dict : {place: race_id_place}
@@ -48,10 +60,21 @@ class Result(DataMerger):
             全レースの過去成績データ
         """
 
-        # race_idをkeyにしてDataFrame型を格納
-        results = {}
-        bf_upd_df = read_result()
-        idx_set = set(bf_upd_df['race_id'])
+        # 保存済みのrace_idはkey列のみ読み込み、集合で判定する
+        idx_set = KnownIds('result', 'race_id')
+        journal = ScrapeJournal('result')
+        idx_set.add(journal.done_keys())
+        writer = BatchWriter({
+            'result': update_result,
+            'race_date_mapping': update_race_date_mapping,
+            'race': update_race,
+            'race_card': update_race_card,
+            'refund': update_refund,
+        }, journal, known_ids=idx_set)
+        cache = PageCache()
+        fetcher = Fetcher(cache=cache)
+        extractor = RacePageExtractor()
+        contents: dict = dict()
         for place, race_id_place in race_id_dict.items():
             pre_kai = False
             for kai, race_id_kai in race_id_place.items():
@@ -69,100 +92,20 @@ class Result(DataMerger):
                     if race_id in idx_set:
                         continue
                     try:
-                        time.sleep(1)
-                        url = "https://db.netkeiba.com/race/" + race_id
-                        html = Netkeiba.session.get(url)
-                        html.encoding = "EUC-JP"
-                        soup = BeautifulSoup(html.text, "html.parser")
-                        # 馬IDをスクレイピング
-                        horse_id_ls = []
-                        horse_a_ls = soup.find("table", attrs={"summary": "レース結果"}).find_all(
-                            "a", attrs={"href": re.compile("^/horse")}
-                        )
-                        for a in horse_a_ls:
-                            horse_id = re.findall(r"\d+", a["href"])
-                            horse_id_ls.append(horse_id[0])
-                        # メインとなるテーブルデータを取得
-                        _df = pd.read_html(url)[0]
-                        # _df.drop(['馬名', '調教師', '枠', '馬番', '性齢', '斤量', '騎手', 'タイム', '人気'], axis=1, inplace=True)
-                        _df = _df[['着順', '着差', '単勝']]
-                        _df.columns = [
-                            'order',
-                            'diff_time',
-                            'odds'
-                        ]
-                        # 単勝オッズ列の'---'をNaNに変換
-                        _df.replace({'odds': {'---': np.nan}}, inplace=True)
-                        # 日付の抽出
-                        for info in soup.find_all('li'):
-                            if 'race/list' in info.find('a').get('href'):
-                                d = datetime.strptime(re.sub('race/list|/', '', info.find('a').get('href')), '%Y%m%d')
-                                _df['date'] = [date(d.year, d.month, d.day)] * len(_df)
-                                break
-                        # 賞金の抽出
-                        hoge = 0
-                        prize_ls = []
-                        for info in soup.find_all('td'):
-                            if info.get('class') == ['txt_r'] and info.get('nowrap') == 'nowrap':
-                                if hoge % 5 == 4:
-                                    if info.text:
-                                        prize_ls.append(float(info.text.replace(',', '')))
-                                    else:
-                                        prize_ls.append(0)
-                                hoge += 1
-                        _df['prize'] = prize_ls
-                        # ﾀｲﾑ指数の抽出
-                        time_idx_ls = []
-                        for info in soup.find_all('td'):
-                            if info.get('class') and 'speed_index' in info.get('class'):
-                                try:
-                                    time_idx_ls.append(int(info.text.replace('\n', '')))
-                                except ValueError:
-                                    time_idx_ls.append(0)
-                        _df['time_idx'] = time_idx_ls
-                        # 馬場指数
-                        _df["ground_state_idx"] = [0] * len(_df)
-                        for i in soup.find_all('tr'):
-                            if i.find('th') and i.find('th').text == '馬場指数':
-                                _df["ground_state_idx"] = [int(i.find('td').text.replace('\xa0(?)', ''))] * len(_df)
-                        # 上りの抽出
-                        last3F_ls = []
-                        for i in soup.find_all('td'):
-                            if i.get('class') == ['txt_c'] and i.get('nowrap') == 'nowrap':
-                                if i.find('span'):
-                                    if i.text:
-                                        last3F_ls.append(i.text)
-                                    else:
-                                        last3F_ls.append(np.nan)
-                        _df['last3F'] = last3F_ls
-                        # 備考の抽出
-                        hoge = 0
-                        remark_ls = []
-                        passing_ls = []
-                        for info in soup.find_all('td'):
-                            if not info.get('class') and info.get('nowrap') == 'nowrap':
-                                if hoge % 3 == 0:
-                                    if info.text:
-                                        passing_ls.append(info.text)
-                                    else:
-                                        passing_ls.append(np.nan)
-                                if hoge % 3 == 2:
-                                    text = info.text.replace('\n', '')
-                                    if text:
-                                        remark_ls.append(text)
-                                    else:
-                                        remark_ls.append(np.nan)
-                                hoge += 1
-                        _df['remark'] = remark_ls
-                        _df['passing'] = passing_ls
-                        # 型を変更する
-                        _df = _df.astype({'order': 'str'})
-                        _df["horse_id"] = horse_id_ls
-                        # インデックスをrace_idとhorse_idのMultiIndexにする
-                        _df['race_id'] = [race_id] * len(_df)
-                        results[race_id] = _df
-                    # 存在しないrace_idを飛ばし次のスクレイピングに移す
+                        if race_id not in contents:
+                            contents = Result.__fetch_day(fetcher, race_id, idx_set)
+                        html = contents[race_id]
+                        # リトライしても取得できなかった場合は、開催されていないとはみなさず再開時に取得し直す
+                        if html is None:
+                            writer.fail(race_id)
+                            continue
+                        # 1回の解析でresult以外のテーブルもまとめて抽出する
+                        writer.add(race_id, extractor(race_id, html))
+                    # 存在しないrace_id(取得できたが成績の表がないページ)を飛ばし次のスクレイピングに移す
                     except AttributeError:
+                        # 開催前のページなどを保存しないようにする
+                        cache.discard(Scraping.DB_BASE_URL + "/race/" + race_id)
+                        writer.fail(race_id)
                         # 第1回のレースにてIndexErrorが生じた場合
                         if race_id[8:10] == '01':
                             pre_kai = True
@@ -188,14 +131,37 @@ class Result(DataMerger):
             else:
                 continue
             break
-        try:
-            # pd.DataFrame型にして一つのデータにまとめる
-            results_df = pd.concat([results[key] for key in results])
-            # スクレイピングしたデータをデータベースに反映させる。
-            update_result(results_df)
-            update_race_date_mapping(results_df[['race_id', 'date']])
-        except ValueError:
-            pass
+        # 残りのスクレイピングしたデータをデータベースに反映させる。
+        writer.flush()
+
+    @staticmethod
+    def scrape_race_ids(race_id_ls: list) -> None:
+        """
+        開催済みであることが分かっているレース(RaceCalendarから取得したもの)をまとめてスクレイピングする
+        scrapeと異なり存在しないレースを推測する必要がないため、取得と解析を分離し、解析は複数プロセスで行う
+
+        Parameters
+        ----------
+        race_id_ls: list[str]
+            レースIDのリスト
+        """
+        run_pipeline('result', 'race_id', Scraping.DB_BASE_URL + '/race/', RacePageExtractor(), {
+            'result': update_result,
+            'race_date_mapping': update_race_date_mapping,
+            'race': update_race,
+            'race_card': update_race_card,
+            'refund': update_refund,
+        }, race_id_ls)
+
+    @staticmethod
+    def __fetch_day(fetcher: Fetcher, race_id: str, idx_set: KnownIds) -> dict:
+        """
+        race_id以降の同じ開催日のレースをまとめて並行に取得する
+        """
+        race_id_day = [race_id[:10] + str(r).zfill(2) for r in range(int(race_id[10:12]), 13)]
+        race_id_day = [_race_id for _race_id in race_id_day if _race_id not in idx_set]
+        contents = fetcher.fetch_all([Scraping.DB_BASE_URL + "/race/" + _race_id for _race_id in race_id_day])
+        return {_race_id: contents[Scraping.DB_BASE_URL + "/race/" + _race_id] for _race_id in race_id_day}
 
     def preprocessing(self) -> None:
         _df = copy.deepcopy(self.raw_df)
@@ -216,44 +182,7 @@ class Result(DataMerger):
             else:
                 return '0'
 
-        # diff_time
-        def diff_time2num(x):
-            if x == '同着':
-                return 0
-            elif x == 'ハナ':
-                return 0.08
-            elif x == 'アタマ':
-                return 0.15
-            elif x == 'クビ':
-                return 0.30
-            elif x == '大':
-                return 10
-            elif '.' in x:
-                x = x.split('.')
-            else:
-                x = [x]
-            ans = 0
-            for num in x:
-                if '/' in num:
-                    numerator, denominator = num.split('/')
-                    ans += float(numerator) / float(denominator)
-                else:
-                    ans += float(num)
-            return ans
-
-        def difference_horses(x):
-            ans = 0
-            x = str(x)
-            if '+' in x:
-                x = x.split('+')
-            else:
-                x = [x]
-            for num in x:
-                ans += diff_time2num(num)
-            return ans
-
-        # 数字以外の値('除', '中'など)を取り除く
-        _df['order'] = pd.to_numeric(_df['order'], errors='coerce')
+        # 着順が数字でない('除', '中'など)場合はNULLとして保存されているため取り除く
         _df.dropna(subset=['order', 'odds'], inplace=True)
         _df['order'] = _df['order'].astype(int)
         # 第1コーナー通過時の着順
@@ -268,8 +197,8 @@ class Result(DataMerger):
         _df['first_to_final'] = _df['first_corner'] - _df['final_corner']
         # df['remark']の整形
         _df['remark'] = _df['remark'].map(lambda x: remarks(x))
-        # df['diff_time']の整形
-        _df['diff_time'] = _df['diff_time'].map(lambda x: difference_horses(x)).fillna(0)
+        # 着差は馬身の数値として保存されている (1着馬はNULL)
+        _df['diff_time'] = _df['diff_time'].fillna(0)
         # 目的関数の設定
         _df['rank'] = _df['order'].map(lambda x: 4-x if x < 4 else 0) * (_df["odds"])**0.2
 
@@ -0,0 +1,17 @@
+# flake8: noqa
+from .html_parser import make_soup, make_tree
+from .rate_limiter import TokenBucket
+from .page_cache import PageCache
+from .http_client import HttpClient
+from .scrape_metrics import ScrapeMetrics
+from .fetcher import Fetcher
+from .race_page_extractor import RacePageExtractor
+from .race_calendar import RaceCalendar
+from .known_ids import KnownIds
+from .scrape_journal import ScrapeJournal, BatchWriter
+from .horse_profile_extractor import HorseProfileExtractor
+from .scrape_pipeline import ScrapePipeline, run_pipeline
+from .odds_client import OddsClient
+from .browser_pool import BrowserPool
+from .pedigree_store import PedigreeStore
+from .shutuba_extractor import ShutubaExtractor
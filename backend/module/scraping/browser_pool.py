@@ -0,0 +1,88 @@
+import atexit
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+from backend.environment.scraping import Scraping
+
+
+class BrowserPool:
+    """
+    起動済みのheadless Chromeを使い回すためのプール
+
+    ChromeDriverManager().install()はプロセス内で一度だけ実行し、起動したドライバは終了時にまとめてquitする。
+    seleniumはドライバを起動する時に初めてimportする。
+
+    Attributes
+    ----------
+    size: int
+        同時に起動するドライバ数の上限
+    """
+
+    driver_path: Optional[str] = None
+
+    def __init__(self, size: int = Scraping.BROWSER_POOL_SIZE) -> None:
+        self.size = size
+        self.idle: queue.Queue = queue.Queue()
+        self.drivers: list = list()
+        self.lock = threading.Lock()
+        atexit.register(self.close)
+
+    @contextmanager
+    def acquire(self) -> Iterator[Any]:
+        """
+        空いているドライバを借りる。全て使用中の場合は、上限までは新たに起動し、それ以降は返却を待つ。
+        """
+        driver = self.__get()
+        try:
+            yield driver
+        except Exception:
+            # 状態の分からないドライバは使い回さない
+            self.__quit(driver)
+            raise
+        else:
+            self.idle.put(driver)
+
+    def close(self) -> None:
+        with self.lock:
+            drivers, self.drivers = self.drivers, list()
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+    def __get(self) -> Any:
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self.lock:
+            if len(self.drivers) < self.size:
+                driver = self.__launch()
+                self.drivers.append(driver)
+                return driver
+        return self.idle.get()
+
+    def __launch(self) -> Any:
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        from webdriver_manager.chrome import ChromeDriverManager
+        if BrowserPool.driver_path is None:
+            BrowserPool.driver_path = ChromeDriverManager().install()
+        options = webdriver.ChromeOptions()
+        options.add_argument('--headless')
+        options.add_argument('--no-sandbox')
+        options.add_argument('--disable-dev-shm-usage')
+        # 画像を読み込まない
+        options.add_argument('--blink-settings=imagesEnabled=false')
+        return webdriver.Chrome(service=Service(BrowserPool.driver_path), options=options)
+
+    def __quit(self, driver: Any) -> None:
+        with self.lock:
+            if driver in self.drivers:
+                self.drivers.remove(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
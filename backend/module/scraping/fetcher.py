@@ -0,0 +1,156 @@
+import asyncio
+import random
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional
+from urllib.parse import urlparse
+from backend.environment.scraping import Scraping
+from backend.module.scraping.http_client import HttpClient
+from backend.module.scraping.page_cache import PageCache
+from backend.module.scraping.rate_limiter import TokenBucket
+from backend.module.scraping.scrape_metrics import ScrapeMetrics
+
+
+class Fetcher:
+    """
+    netkeibaのページを並行して取得する
+
+    同時に送信するリクエスト数をmax_concurrencyで制限し、
+    ホスト毎にTokenBucketでリクエスト頻度を制限する。
+    429/5xxが返ってきた場合は指数バックオフしながらリトライする。
+    cacheが指定されている場合は、保存済みのページを通信せずに返し、新たに取得したページを保存する。
+
+    Attributes
+    ----------
+    client: HttpClient
+        接続プールを持つHTTPクライアント (指定しない場合はログイン済みの共有クライアント)
+    max_concurrency: int
+        同時に送信するリクエスト数の上限
+    buckets: dict[str, TokenBucket]
+        ホスト毎のトークンバケット
+    cache: Optional[PageCache]
+        取得したページのキャッシュ
+    rate_limits: dict[str, tuple[float, int]]
+        ホスト毎のリクエスト頻度の上限 (指定しない場合はScraping.HOST_RATE_LIMITS)
+    metrics: ScrapeMetrics
+        応答時間・リトライ回数などの記録先 (指定しない場合はプロセス内で共有するもの)
+    """
+
+    def __init__(
+        self,
+        client: Optional[HttpClient] = None,
+        max_concurrency: int = Scraping.MAX_CONCURRENCY,
+        cache: Optional[PageCache] = None,
+        rate_limits: Optional[dict] = None,
+        metrics: Optional[ScrapeMetrics] = None
+    ) -> None:
+        # ログインが必要になった時に初めてnetkeibaにログインする
+        self.client = client if client is not None else HttpClient.shared()
+        self.max_concurrency = max_concurrency
+        self.buckets: dict = dict()
+        self.cache = cache
+        self.rate_limits = rate_limits if rate_limits is not None else Scraping.HOST_RATE_LIMITS
+        self.metrics = metrics if metrics is not None else ScrapeMetrics.shared()
+
+    def fetch(self, url: str) -> Optional[bytes]:
+        return self.fetch_all([url])[url]
+
+    def fetch_all(self, urls: list) -> dict:
+        """
+        urlsのページを並行して取得する
+
+        Parameters
+        ----------
+        urls: list[str]
+            取得するページのurl
+
+        Returns
+        -------
+        contents: dict[str, Optional[bytes]]
+            urlをkeyとしたページの内容
+            取得できなかった場合はNone
+        """
+        if not urls:
+            return dict()
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.__fetch_all(urls))
+        # Jupyterなどイベントループが実行中のスレッドではasyncio.runを呼べないため、別のスレッドで実行する
+        # (コルーチンから呼び出す場合はfetch_all_asyncを利用する)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, self.__fetch_all(urls)).result()
+
+    async def fetch_all_async(self, urls: list) -> dict:
+        """
+        fetch_allのコルーチン版 (実行中のイベントループから呼び出す)
+        """
+        if not urls:
+            return dict()
+        return await self.__fetch_all(urls)
+
+    def iter_fetch(self, urls: list, chunk_size: int = Scraping.CHUNK_SIZE) -> Iterator[Optional[bytes]]:
+        """
+        urlsのページをchunk_size毎に並行して取得し、urlsの順番で返す
+        途中で中断された場合は、それまでに取得したページのみ返す
+        """
+        for i in range(0, len(urls), chunk_size):
+            try:
+                contents = self.fetch_all(urls[i:i+chunk_size])
+            except KeyboardInterrupt:
+                return
+            for url in urls[i:i+chunk_size]:
+                yield contents[url]
+
+    async def __fetch_all(self, urls: list) -> dict:
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        contents = await asyncio.gather(*[self.__fetch(url, semaphore) for url in urls])
+        return dict(zip(urls, contents))
+
+    async def __fetch(self, url: str, semaphore: asyncio.Semaphore) -> Optional[bytes]:
+        if self.cache is not None:
+            content = self.cache.get(url)
+            if content is not None:
+                self.metrics.record_cache_hit(url)
+                return content
+        bucket = self.__get_bucket(url)
+        async with semaphore:
+            for n_retry in range(Scraping.MAX_RETRIES + 1):
+                started_at = time.perf_counter()
+                await bucket.acquire()
+                self.metrics.record_throttle(url, time.perf_counter() - started_at)
+                retry_after = None
+                started_at = time.perf_counter()
+                try:
+                    response = await asyncio.to_thread(self.client.get, url)
+                except requests.RequestException:
+                    self.metrics.record_request(url, None, time.perf_counter() - started_at)
+                else:
+                    self.metrics.record_request(url, response.status_code, time.perf_counter() - started_at, len(response.content))
+                    if response.status_code == 200:
+                        bucket.speed_up()
+                        if self.cache is not None:
+                            self.cache.put(url, response.content)
+                        return response.content
+                    if response.status_code not in Scraping.RETRY_STATUS_CODES:
+                        return None
+                    retry_after = response.headers.get('Retry-After')
+                bucket.slow_down()
+                backoff = self.__get_backoff(n_retry, retry_after)
+                self.metrics.record_retry(url, backoff)
+                await asyncio.sleep(backoff)
+        return None
+
+    def __get_bucket(self, url: str) -> TokenBucket:
+        host = urlparse(url).netloc
+        if host not in self.buckets:
+            rate, capacity = self.rate_limits.get(host, Scraping.DEFAULT_RATE_LIMIT)
+            self.buckets[host] = TokenBucket(rate, capacity)
+        return self.buckets[host]
+
+    def __get_backoff(self, n_retry: int, retry_after: Optional[str]) -> float:
+        if retry_after is not None and retry_after.isdigit():
+            return min(float(retry_after), Scraping.BACKOFF_MAX)
+        backoff = min(Scraping.BACKOFF_BASE * 2 ** n_retry, Scraping.BACKOFF_MAX)
+        return backoff * random.uniform(0.5, 1.0)
@@ -0,0 +1,77 @@
+import re
+import pandas as pd
+from datetime import datetime, date
+from backend.module.scraping.html_parser import make_soup
+
+
+class HorseProfileExtractor:
+    """
+    db.netkeibaの馬のページ(https://db.netkeiba.com/horse/<horse_id>)からhorse_profileの行を抽出する
+    ScrapePipelineの解析プロセスで実行できるよう、状態を持たない
+    """
+
+    def __call__(self, horse_id: str, html: bytes) -> dict:
+        """
+        Returns
+        -------
+        tables: dict[str, pd.DataFrame]
+            horse_profileをkeyとした抽出結果
+        """
+        df = pd.read_html(html)[1]
+        # dfのカラム名を英語に変更
+        df = df.set_index(0).T
+        df = df.loc[:, ['生年月日', '調教師', '馬主', '生産者', '近親馬']]  # 使用するデータのみ抽出
+        df.columns = ['birthday', 'trainer_name', 'owner_name', 'breeder_name', 'near_relation_horses']
+        df = pd.concat([df, df['near_relation_horses'].str.split('、', expand=True)], axis=1).drop('near_relation_horses', axis=1)
+        df.rename(columns={0: 'near_relation_horse_name_0', 1: 'near_relation_horse_name_1'}, inplace=True)
+        soup = make_soup(html)
+        info_list = soup.find_all('table')[1].find_all('td')
+        # 調教師id, 馬主id, 生産者id、誕生日の取得
+        for info in info_list:
+            text = info.text
+            if re.sub('[年月日]', '', text).isdigit():
+                d = datetime.strptime(text, "%Y年%m月%d日")
+                df['birthday'] = [date(d.year, d.month, d.day)]
+            try:
+                if "/trainer/" in info.find('a').get('href'):
+                    df['trainer_id'] = [re.sub('trainer|/', '', info.find('a').get('href'))]
+                if "/owner/" in info.find('a').get('href'):
+                    df['owner_id'] = [re.sub('owner|/', '', info.find('a').get('href'))]
+                if "/breeder/" in info.find('a').get('href'):
+                    df['breeder_id'] = [re.sub('breeder|/', '', info.find('a').get('href'))]
+                if "/horse/" in info.find('a').get('href') and "/horse/result/" not in info.find('a').get('href'):
+                    for i, _info in enumerate(info.find_all('a')):
+                        df['near_relation_horse_id_{}'.format(i)] = [re.sub('horse|/', '', _info.get('href'))]
+            except AttributeError:
+                continue
+        # 母id, 父idの取得
+        info_list = soup.find_all('dd')
+        parent_chk = [0, 0]
+        for info in info_list[3].find_all('td'):
+            if info.get('rowspan') == '2' and info.get('class') == ['b_ml']:
+                df['father_id'] = [re.sub('/horse/ped/|/', '', info.find('a').get('href'))]
+                df['father_name'] = [info.find('a').text]
+                parent_chk[0] = 1
+            if info.get('rowspan') == '2' and info.get('class') == ['b_fml']:
+                df['mother_id'] = [re.sub('/horse/ped/|/', '', info.find('a').get('href'))]
+                df['mother_name'] = [info.find('a').text]
+                parent_chk[1] = 1
+        # 母id及び父idが存在しない場合
+        if not parent_chk[0]:
+            df['father_id'] = [None]
+        if not parent_chk[1]:
+            df['mother_id'] = [None]
+        # 名前の取得
+        info_list = soup.find_all('h1')
+        for info in info_list:
+            if not info.find_all('a'):
+                df['horse_name'] = [info.text]
+        # 性別の取得
+        info_list = soup.find_all('p')
+        for info in info_list:
+            if info.get('class') == ['txt_01']:
+                for sex in ['牝', '牡', 'セ']:
+                    if sex in info.text:
+                        df['sex'] = [sex]
+        df['horse_id'] = [horse_id]
+        return {'horse_profile': df}
@@ -0,0 +1,53 @@
+import lxml.html
+from typing import Optional
+from bs4 import BeautifulSoup
+from backend.environment.scraping import Scraping
+
+
+def make_soup(html: bytes, encoding: Optional[str] = "EUC-JP") -> BeautifulSoup:
+    """
+    Scraping.HTML_PARSERで指定されたパーサを用いてBeautifulSoupを作成する
+    """
+    return BeautifulSoup(html, Scraping.HTML_PARSER, from_encoding=encoding)
+
+
+def make_tree(html: bytes, encoding: str = "EUC-JP") -> lxml.html.HtmlElement:
+    """
+    lxmlを用いてページを解析する
+    BeautifulSoupを経由しないため、全体を走査する必要がない箇所はこちらを利用する
+
+    Raises
+    ------
+    AttributeError
+        ページが空の場合
+    """
+    if not html:
+        raise AttributeError('ページが空です。')
+    return lxml.html.fromstring(html, parser=lxml.html.HTMLParser(encoding=encoding))
+
+
+def get_text(element: lxml.html.HtmlElement, br: str = '') -> str:
+    """
+    要素内のテキストを取得する
+
+    Parameters
+    ----------
+    element: lxml.html.HtmlElement
+        対象の要素
+    br: str default ''
+        改行(<br />)を置き換える文字列
+    """
+    if not br:
+        return element.text_content().strip()
+    text = element.text or ''
+    for child in element:
+        text += br if child.tag == 'br' else child.text_content()
+        text += child.tail or ''
+    return text.strip()
+
+
+def has_class(class_name: str) -> str:
+    """
+    class属性にclass_nameを含む要素を選択するxpathの条件式
+    """
+    return f'contains(concat(" ", normalize-space(@class), " "), " {class_name} ")'
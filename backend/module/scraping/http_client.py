@@ -0,0 +1,52 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Optional
+from backend.environment.scraping import Scraping
+
+
+class HttpClient:
+    """
+    全てのスクレイパで共有するHTTPクライアント
+
+    ホスト毎にkeep-aliveした接続をプールし、ページ毎のTCP/TLSのハンドシェイクを省く。
+    gzipで圧縮された応答を要求する。(取得時間・転送量はFetcherがScrapeMetricsに記録する)
+    プロセス内では shared() が返す1つのクライアントを使い回し、netkeibaへのログインも一度だけ行う。
+
+    Attributes
+    ----------
+    session: requests.Session
+        接続プールを持つセッション
+    """
+
+    __shared: Optional['HttpClient'] = None
+    __lock = threading.Lock()
+
+    def __init__(self, pool_size: int = Scraping.HTTP_POOL_SIZE) -> None:
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update(Scraping.HTTP_HEADERS)
+
+    @classmethod
+    def shared(cls) -> 'HttpClient':
+        """
+        netkeibaにログイン済みの共有クライアントを返す
+        初めて呼ばれた時にクライアントを作成し、ログインする (認証情報が未設定の場合はログインしない)
+        """
+        with cls.__lock:
+            if cls.__shared is None:
+                from backend.environment.netkeiba import Netkeiba
+                client = cls()
+                if Netkeiba.USER and Netkeiba.PASS:
+                    client.session.post(Netkeiba.LOGIN_URL, data=Netkeiba.PAYLOAD, timeout=Scraping.TIMEOUT)
+                cls.__shared = client
+        return cls.__shared
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault('timeout', Scraping.TIMEOUT)
+        return self.session.get(url, **kwargs)
+
+    def close(self) -> None:
+        self.session.close()
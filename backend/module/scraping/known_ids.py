@@ -0,0 +1,35 @@
+from typing import Iterable
+
+
+class KnownIds:
+    """
+    データベースに保存済みのidの集合
+
+    テーブルのkey列のみをSELECT DISTINCTで一度だけ読み込み、以降は書き込んだidを追加して最新の状態に保つ。
+    スクレイピング済みかどうかの判定をO(1)で行うために利用する。
+
+    Attributes
+    ----------
+    id_set: set[str]
+        保存済みのid
+    """
+
+    def __init__(self, table_name: str, key: str) -> None:
+        # scrapingパッケージを読み込んだだけでデータベースに接続しないよう、ここでimportする
+        from backend.module.crud.read import read_id_set
+        self.id_set = read_id_set(table_name, key)
+
+    def __contains__(self, _id: str) -> bool:
+        return _id in self.id_set
+
+    def __len__(self) -> int:
+        return len(self.id_set)
+
+    def add(self, ids: Iterable[str]) -> None:
+        self.id_set.update(ids)
+
+    def filter(self, ids: Iterable[str]) -> list:
+        """
+        idsのうち、保存されていないidのみを順番を保ったまま返す
+        """
+        return [_id for _id in ids if _id not in self.id_set]
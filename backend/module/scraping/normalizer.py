@@ -0,0 +1,77 @@
+import re
+import numpy as np
+from typing import Optional
+
+# 着差の表記と馬身の対応
+DIFF_TIME_WORDS = {
+    '同着': 0,
+    'ハナ': 0.08,
+    'アタマ': 0.15,
+    'クビ': 0.30,
+    '大': 10,
+}
+
+
+def to_order(text) -> Optional[int]:
+    """
+    着順を整数に変換する
+    数字以外の値('除', '中', '4(降)'など)はNoneとする
+    """
+    if not isinstance(text, str) or not text.isdigit():
+        return None
+    return int(text)
+
+
+def to_diff_time(text) -> float:
+    """
+    着差('1/2', '1.1/4', 'クビ+1/2'など)を馬身の数値に変換する
+    1着馬など着差がない場合や、解釈できない場合はNaNとする
+    """
+    if not isinstance(text, str) or not text:
+        return np.nan
+    ans = 0.0
+    for diff in text.split('+'):
+        if diff in DIFF_TIME_WORDS:
+            ans += DIFF_TIME_WORDS[diff]
+            continue
+        try:
+            for num in diff.split('.'):
+                if '/' in num:
+                    numerator, denominator = num.split('/')
+                    ans += float(numerator) / float(denominator)
+                else:
+                    ans += float(num)
+        except ValueError:
+            return np.nan
+    return ans
+
+
+def to_int(text) -> Optional[int]:
+    """
+    払い戻し金額・人気などの数字を整数に変換する ('1,230' -> 1230)
+    数字が含まれない場合はNoneとする
+    """
+    if not isinstance(text, str):
+        return None
+    digits = re.sub(r'\D', '', text)
+    return int(digits) if digits else None
+
+
+def to_time_idx(text) -> int:
+    """
+    ﾀｲﾑ指数を整数に変換する (負の値('-5'など)も保持する)
+    指数がない場合('**'や空欄など)は0とする
+    """
+    try:
+        return int(text)
+    except (TypeError, ValueError):
+        return 0
+
+
+def to_horse_numbers(text, n: int = 3) -> list:
+    """
+    馬番の組み合わせ('3 - 5', '3 → 5 → 1'など)を長さnの整数のリストに変換する
+    組み合わせの馬数がnに満たない場合はNoneで埋める
+    """
+    numbers: list = [int(num) for num in re.findall(r'\d+', text)] if isinstance(text, str) else list()
+    return (numbers + [None] * n)[:n]
@@ -0,0 +1,78 @@
+import json
+import pandas as pd
+from typing import Optional
+from backend.environment.scraping import Scraping
+from backend.module.scraping.fetcher import Fetcher
+
+
+class OddsClient:
+    """
+    netkeibaのオッズAPI(api_get_jra_odds.html)から単勝・複勝オッズを取得する
+
+    ブラウザを起動せずにHTTPのみで取得するため、複数のレースのオッズをまとめて並行に取得できる。
+    オッズは刻々と変わるため、PageCacheは利用しない。
+
+    Attributes
+    ----------
+    fetcher: Fetcher
+        APIへのリクエストに利用する
+    """
+
+    odds_url = Scraping.RACE_BASE_URL + '/api/api_get_jra_odds.html?race_id={}&type=1&action=update'
+
+    def __init__(self, fetcher: Optional[Fetcher] = None) -> None:
+        self.fetcher = fetcher if fetcher is not None else Fetcher()
+
+    def fetch(self, race_id: str) -> pd.DataFrame:
+        """
+        Raises
+        ------
+        KeyError
+            オッズが公開されていない場合
+        """
+        oddses = self.fetch_all([race_id])[race_id]
+        if oddses is None:
+            raise KeyError('オッズが取得できませんでした。')
+        return oddses
+
+    def fetch_all(self, race_id_ls: list) -> dict:
+        """
+        race_id_lsの各レースの単勝・複勝オッズを並行して取得する
+
+        Returns
+        -------
+        oddses: dict[str, Optional[pd.DataFrame]]
+            race_idをkeyとしたオッズ (オッズが公開されていない場合はNone)
+            columns = ['horse_number', 'tansho', 'fukusho']
+            オッズの表示されていない馬(取消など)の単勝オッズは'---.-'、
+            複勝オッズはオッズページと同じく'1.1 - 1.3'の形式の文字列
+        """
+        urls = {race_id: self.odds_url.format(race_id) for race_id in race_id_ls}
+        contents = self.fetcher.fetch_all(list(urls.values()))
+        return {race_id: self.parse(contents[url]) for race_id, url in urls.items()}
+
+    def parse(self, content: Optional[bytes]) -> Optional[pd.DataFrame]:
+        try:
+            odds = json.loads(content or b'')['data']['odds']
+        except (ValueError, KeyError, TypeError):
+            return None
+        # '1'に単勝、'2'に複勝のオッズが[オッズ(複勝は下限), 複勝の上限, 人気]の形式で格納されている
+        if '1' not in odds or '2' not in odds:
+            return None
+        tansho, fukusho = odds['1'], odds['2']
+        rows = list()
+        for horse_number in sorted(tansho, key=int):
+            _tansho = tansho[horse_number][0]
+            _fukusho = fukusho.get(horse_number, ['', ''])
+            rows.append([
+                int(horse_number),
+                float(_tansho) if self.__is_odds(_tansho) else '---.-',
+                f'{_fukusho[0]} - {_fukusho[1]}' if self.__is_odds(_fukusho[0]) else '---.-',
+            ])
+        return pd.DataFrame(rows, columns=['horse_number', 'tansho', 'fukusho'])
+
+    def __is_odds(self, text: str) -> bool:
+        try:
+            return float(text) > 0
+        except ValueError:
+            return False
@@ -0,0 +1,119 @@
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterator, Optional
+from backend.environment.scraping import Scraping
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class PageCache:
+    """
+    取得したページをローカルに保存するキャッシュ
+
+    ページの内容はsha1値をkeyとして圧縮し、sha1値の先頭2文字毎のシャードファイルに追記する。
+    urlとsha1値の対応、及びシャードファイル内の位置はsqliteのインデックスで管理する。
+    zstandardがインストールされている場合はzstd、そうでない場合はgzipで圧縮する。
+
+    Attributes
+    ----------
+    cache_dir: str
+        シャードファイル及びインデックスを保存するディレクトリ
+    """
+
+    def __init__(self, cache_dir: str = Scraping.CACHE_DIR) -> None:
+        self.cache_dir = cache_dir
+        os.makedirs(os.path.join(cache_dir, 'shards'), exist_ok=True)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(os.path.join(cache_dir, 'index.sqlite'), check_same_thread=False)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS page (url TEXT PRIMARY KEY, digest TEXT NOT NULL, fetched_at REAL NOT NULL)'
+        )
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS blob ('
+            'digest TEXT PRIMARY KEY, shard TEXT NOT NULL, offset INTEGER NOT NULL, length INTEGER NOT NULL, codec TEXT NOT NULL)'
+        )
+        self.connection.commit()
+
+    def __contains__(self, url: str) -> bool:
+        with self.lock:
+            row = self.connection.execute('SELECT 1 FROM page WHERE url = ?', (url,)).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.connection.execute('SELECT COUNT(*) FROM page').fetchone()[0]
+
+    def get(self, url: str) -> Optional[bytes]:
+        """
+        urlに対応するページを取得する。保存されていない場合はNoneを返す。
+        """
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT blob.shard, blob.offset, blob.length, blob.codec FROM page '
+                'JOIN blob ON page.digest = blob.digest WHERE page.url = ?',
+                (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        shard, offset, length, codec = row
+        with open(os.path.join(self.cache_dir, 'shards', shard), 'rb') as f:
+            f.seek(offset)
+            return self.__decompress(f.read(length), codec)
+
+    def put(self, url: str, content: bytes) -> None:
+        """
+        urlに対応するページを保存する。同じ内容のページは一度だけ保存される。
+        """
+        digest = hashlib.sha1(content).hexdigest()
+        with self.lock:
+            if self.connection.execute('SELECT 1 FROM blob WHERE digest = ?', (digest,)).fetchone() is None:
+                codec, compressed = self.__compress(content)
+                shard = digest[:2] + '.bin'
+                with open(os.path.join(self.cache_dir, 'shards', shard), 'ab') as f:
+                    offset = f.tell()
+                    f.write(compressed)
+                self.connection.execute(
+                    'INSERT INTO blob (digest, shard, offset, length, codec) VALUES (?, ?, ?, ?, ?)',
+                    (digest, shard, offset, len(compressed), codec)
+                )
+            self.connection.execute(
+                'INSERT OR REPLACE INTO page (url, digest, fetched_at) VALUES (?, ?, ?)',
+                (url, digest, time.time())
+            )
+            self.connection.commit()
+
+    def discard(self, url: str) -> None:
+        """
+        urlに対応するページをインデックスから削除する
+        (レース確定前のページなど、後から内容が変わるページを保存してしまった場合に利用)
+        """
+        with self.lock:
+            self.connection.execute('DELETE FROM page WHERE url = ?', (url,))
+            self.connection.commit()
+
+    def urls(self) -> Iterator[str]:
+        with self.lock:
+            urls = [row[0] for row in self.connection.execute('SELECT url FROM page')]
+        return iter(urls)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __compress(self, content: bytes) -> tuple:
+        if zstandard is not None:
+            return 'zstd', zstandard.ZstdCompressor(level=10).compress(content)
+        return 'gzip', gzip.compress(content)
+
+    def __decompress(self, compressed: bytes, codec: str) -> bytes:
+        if codec == 'zstd':
+            if zstandard is None:
+                raise ImportError('zstdで圧縮されたページの展開にはzstandardが必要です。')
+            return zstandard.ZstdDecompressor().decompress(compressed)
+        return gzip.decompress(compressed)
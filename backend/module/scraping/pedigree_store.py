@@ -0,0 +1,132 @@
+import re
+import numpy as np
+import pandas as pd
+from typing import Optional
+from backend.module.scraping.html_parser import make_soup
+
+
+class PedigreeStore:
+    """
+    馬とその父・母の対応(血統のグラフ)を保持し、5代血統表を組み立てる
+
+    5代血統表の62頭は、k代目(k=1, ..., 5)の祖先がpeds_{2^k-2}からpeds_{2^(k+1)-3}に並び、
+    k代目のi番目の祖先の父と母は、k+1代目の2i番目と2i+1番目となる。
+    そのため、各馬の父・母の対応を一度だけ保存しておけば、共通する祖先のページを取得し直す必要がない。
+
+    Attributes
+    ----------
+    links: dict[str, tuple[Optional[str], Optional[str]]]
+        horse_idをkeyとした(父のhorse_id, 母のhorse_id)
+        父または母が存在しない(netkeibaにページがない)場合はNone
+    added: dict[str, tuple[Optional[str], Optional[str]]]
+        links のうち、データベースに保存されていないもの
+    failed: set[str]
+        血統ページを取得できなかった馬 (保存はせず、次回取得し直す)
+    """
+
+    n_generations = 5
+
+    # 血統ページ(/horse/ped/<horse_id>)のtd要素の順番(深さ優先)とpeds_*の番号の対応
+    transrate_num = [
+        0, 2, 6, 14, 30, 31, 15, 32, 33, 7, 16, 34,
+        35, 17, 36, 37, 3, 8, 18, 38, 39, 19, 40,
+        41, 9, 20, 42, 43, 21, 44, 45, 1, 4, 10, 22,
+        46, 47, 23, 48, 49, 11, 24, 50, 51, 25, 52,
+        53, 5, 12, 26, 54, 55, 27, 56, 57, 13, 28,
+        58, 59, 29, 60, 61
+    ]
+
+    def __init__(self, pedigree_df: pd.DataFrame = pd.DataFrame()) -> None:
+        """
+        Parameters
+        ----------
+        pedigree_df: pd.DataFrame
+            保存済みの対応 (read_pedigree, horse_profileの father_id, mother_id など)
+            columns = ['horse_id', 'father_id', 'mother_id']
+        """
+        self.links: dict = dict()
+        self.added: dict = dict()
+        self.failed: set = set()
+        for row in pedigree_df.itertuples():
+            self.links[row.horse_id] = (self.__to_id(row.father_id), self.__to_id(row.mother_id))
+
+    def __contains__(self, horse_id: str) -> bool:
+        return horse_id in self.links
+
+    def add_page(self, horse_id: str, html: Optional[bytes]) -> None:
+        """
+        血統ページからhorse_id及び4代目までの祖先の父・母の対応を追加する
+        ページが取得できなかった場合や血統表が存在しない場合は、failedに追加する
+        """
+        table = make_soup(html or b'').find("table")
+        if table is None:
+            self.failed.add(horse_id)
+            return
+        ancestors: list = [None] * len(self.transrate_num)
+        for idx, td in enumerate(table.find_all("td")[:len(self.transrate_num)]):
+            a = td.find("a")
+            if a is not None and len(a.get('href')[7:-1]) != 0:
+                ancestors[self.transrate_num[idx]] = a.get('href')[7:-1]
+        self.__add_link(horse_id, ancestors[0], ancestors[1])
+        for k in range(1, self.n_generations):
+            start, child_start = 2 ** k - 2, 2 ** (k + 1) - 2
+            for i in range(2 ** k):
+                if ancestors[start + i] is not None:
+                    self.__add_link(ancestors[start + i], ancestors[child_start + 2 * i], ancestors[child_start + 2 * i + 1])
+
+    def get_missing(self, horse_id: str) -> Optional[str]:
+        """
+        horse_idの5代血統表を組み立てるために、父・母の対応が分からない馬のうち最も近い代の馬を返す
+        全て分かっている場合はNoneを返す
+        (その馬の血統ページを取得すれば、そこから4代分の対応が得られる)
+        """
+        generation = [horse_id]
+        for _ in range(self.n_generations):
+            for _horse_id in generation:
+                if _horse_id is not None and _horse_id not in self.links and _horse_id not in self.failed:
+                    return _horse_id
+            generation = [parent for _horse_id in generation for parent in self.__get_parents(_horse_id)]
+        return None
+
+    def get_vector(self, horse_id: str) -> pd.Series:
+        """
+        horse_idの5代血統表をpeds_0, ..., peds_61の順に並べて返す
+        対応が分からない祖先はNaNとなる
+        """
+        vector: list = list()
+        generation = [horse_id]
+        for _ in range(self.n_generations):
+            generation = [parent for _horse_id in generation for parent in self.__get_parents(_horse_id)]
+            vector += generation
+        return pd.Series([np.nan if _id is None else _id for _id in vector]).rename(horse_id)
+
+    def pop_added(self) -> pd.DataFrame:
+        """
+        データベースに保存されていない対応を取り出す
+
+        Returns
+        -------
+        pedigree_df: pd.DataFrame
+            columns = ['horse_id', 'father_id', 'mother_id']
+        """
+        added, self.added = self.added, dict()
+        return pd.DataFrame(
+            [(horse_id, father_id, mother_id) for horse_id, (father_id, mother_id) in added.items()],
+            columns=['horse_id', 'father_id', 'mother_id']
+        )
+
+    def __get_parents(self, horse_id: Optional[str]) -> tuple:
+        if horse_id is None:
+            return (None, None)
+        return self.links.get(horse_id, (None, None))
+
+    def __add_link(self, horse_id: str, father_id: Optional[str], mother_id: Optional[str]) -> None:
+        if horse_id not in self.links:
+            self.links[horse_id] = (father_id, mother_id)
+            self.added[horse_id] = (father_id, mother_id)
+
+    def __to_id(self, _id) -> Optional[str]:
+        # horse_profileのfather_id, mother_idはリンクから取り出しているため、念のため余分な文字列を取り除く
+        if not isinstance(_id, str):
+            return None
+        return re.sub('horse|ped|/', '', _id) or None
@@ -0,0 +1,180 @@
+import json
+import os
+import re
+import pandas as pd
+from datetime import date, datetime
+from typing import Optional
+from backend.environment.scraping import Scraping
+from backend.module.scraping.fetcher import Fetcher
+
+
+class RaceCalendar:
+    """
+    netkeibaの開催日程から実際に開催されたレースのrace_idを取得する
+
+    月毎のカレンダー(calendar.html)から開催日を、開催日毎のレース一覧(race_list_sub.html)からrace_idを取得し、
+    年毎にcsvとして保存し、どの日まで取得したかを<year>.jsonに記録する。
+    年末まで取得済みの年は保存済みのものを利用し、それ以外は取得済みの日より後のみ取得し直す。
+    取得に失敗したページがある場合は、開催日程が欠けるため保存しない。
+
+    Attributes
+    ----------
+    calendar_dir: str
+        開催日程を保存するディレクトリ
+    fetcher: Fetcher
+        ページの取得に利用する
+    n_failed: int
+        取得に失敗したページ数
+    """
+
+    calendar_url = Scraping.RACE_BASE_URL + '/top/calendar.html?year={}&month={}'
+    race_list_url = Scraping.RACE_BASE_URL + '/top/race_list_sub.html?kaisai_date={}'
+
+    def __init__(self, calendar_dir: str = Scraping.CALENDAR_DIR, fetcher: Optional[Fetcher] = None) -> None:
+        self.calendar_dir = calendar_dir
+        os.makedirs(calendar_dir, exist_ok=True)
+        # 開催日程は更新されるため、PageCacheは利用しない
+        self.fetcher = fetcher if fetcher is not None else Fetcher()
+        self.n_failed = 0
+
+    def load(self, year: int, refresh: bool = False) -> pd.DataFrame:
+        """
+        year年に開催されたレースの一覧を取得する
+
+        Parameters
+        ----------
+        year: int
+            対象の年
+        refresh: bool default False
+            Trueの場合、保存済みの開催日程を利用せずに全て取得し直す
+
+        Returns
+        -------
+        calendar: pd.DataFrame
+            date, race_idを列に持つ開催日程
+        """
+        path = os.path.join(self.calendar_dir, f'{year}.csv')
+        fetch_end = min(date.today(), date(year, 12, 31))
+        calendar = pd.DataFrame(columns=['date', 'race_id'])
+        fetched_through = None
+        if os.path.exists(path) and not refresh:
+            calendar = pd.read_csv(path, dtype={'race_id': str})
+            calendar['date'] = pd.to_datetime(calendar['date']).dt.date
+            # 取得した日が記録されていない(以前の形式の)場合は、最終開催日まで取得済みとみなす
+            fetched_through = self.__get_fetched_through(year) or (calendar['date'].max() if len(calendar) else None)
+            # 年末まで取得済みの開催日程は確定しているため取得し直さない
+            if fetched_through is not None and fetched_through >= date(year, 12, 31):
+                return calendar
+        start_month = fetched_through.month if fetched_through is not None else 1
+        n_failed = self.n_failed
+        kaisai_dates = [
+            _date for _date in self.get_kaisai_dates(year, range(start_month, fetch_end.month + 1))
+            if _date <= fetch_end and (fetched_through is None or _date > fetched_through)
+        ]
+        race_ids = self.get_race_ids(kaisai_dates)
+        added = pd.DataFrame(
+            [(_date, race_id) for _date, race_id_ls in race_ids.items() for race_id in race_id_ls],
+            columns=['date', 'race_id']
+        )
+        calendar = pd.concat([calendar, added]).sort_values('race_id').reset_index(drop=True)
+        if self.n_failed > n_failed:
+            # 欠けた開催日程を確定したものとして保存しないよう、次回全て取得し直す
+            print(f'{year}年の開催日程のうち{self.n_failed - n_failed}ページの取得に失敗したため、保存しません。')
+            return calendar
+        calendar.to_csv(path, index=False)
+        with open(self.__get_meta_path(year), 'w') as f:
+            json.dump({'fetched_through': fetch_end.isoformat()}, f)
+        return calendar
+
+    def get_kaisai_dates(self, year: int, months=range(1, 13)) -> list:
+        """
+        year年のmonths月の開催日を取得する
+
+        Returns
+        -------
+        kaisai_dates: list[date]
+            開催日のリスト
+        """
+        urls = [self.calendar_url.format(year, month) for month in months]
+        kaisai_dates = set()
+        for html in self.fetcher.fetch_all(urls).values():
+            if html is None:
+                self.n_failed += 1
+            for text in re.findall(rb'kaisai_date=(\d{8})', html or b''):
+                kaisai_dates.add(datetime.strptime(text.decode(), '%Y%m%d').date())
+        return sorted(kaisai_dates)
+
+    def get_race_ids(self, date_ls: list) -> dict:
+        """
+        date_lsの各日付に開催されるレースのrace_idを取得する
+
+        Returns
+        -------
+        race_ids: dict[date, list[str]]
+            日付をkeyとしたrace_idのリスト
+        """
+        urls = {_date: self.race_list_url.format(_date.strftime('%Y%m%d')) for _date in date_ls}
+        contents = self.fetcher.fetch_all(list(urls.values()))
+        race_ids = dict()
+        for _date, url in urls.items():
+            if contents[url] is None:
+                self.n_failed += 1
+            race_ids[_date] = sorted(set(text.decode() for text in re.findall(rb'race_id=(\d{12})', contents[url] or b'')))
+        return race_ids
+
+    def get_race_ids_since(self, since: date) -> list:
+        """
+        since以降に開催されたレースのrace_idを取得する
+        保存済みの開催日程は利用せず、sinceの月から今月までのカレンダーのみ取得する
+
+        Parameters
+        ----------
+        since: date
+            この日以降(この日を含む)に開催されたレースを対象とする
+
+        Returns
+        -------
+        race_id_ls: list[str]
+            開催日順のrace_idのリスト
+        """
+        today = date.today()
+        kaisai_dates: list = list()
+        for year in range(since.year, today.year + 1):
+            start_month = since.month if year == since.year else 1
+            end_month = today.month if year == today.year else 12
+            kaisai_dates += [
+                _date for _date in self.get_kaisai_dates(year, range(start_month, end_month + 1))
+                if since <= _date <= today
+            ]
+        race_ids = self.get_race_ids(kaisai_dates)
+        return [race_id for _date in kaisai_dates for race_id in race_ids[_date]]
+
+    def __get_meta_path(self, year: int) -> str:
+        return os.path.join(self.calendar_dir, f'{year}.json')
+
+    def __get_fetched_through(self, year: int) -> Optional[date]:
+        """
+        year年の開催日程をどの日まで取得したかを返す (記録されていない場合はNone)
+        """
+        if not os.path.exists(self.__get_meta_path(year)):
+            return None
+        with open(self.__get_meta_path(year)) as f:
+            return date.fromisoformat(json.load(f)['fetched_through'])
+
+    def to_race_id_dict(self, year: int, refresh: bool = False) -> dict:
+        """
+        Result.scrapeに渡すrace_idの辞書を作成する
+
+        Returns
+        -------
+        race_id_dict : {place: race_id_place}
+            開催地をkeyとしたレースIDの辞書
+        race_id_place : {kai: race_id_kai}
+            ある開催地限定のレースID
+        race_id_kai: list
+            ある回に開催されたレース限定のレースID
+        """
+        race_id_dict: dict = dict()
+        for race_id in self.load(year, refresh)['race_id']:
+            race_id_dict.setdefault(int(race_id[4:6]), dict()).setdefault(int(race_id[6:8]), list()).append(race_id)
+        return race_id_dict
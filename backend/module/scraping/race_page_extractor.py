@@ -0,0 +1,284 @@
+import re
+import numpy as np
+import pandas as pd
+import lxml.html
+from datetime import datetime, date
+from typing import Optional
+from backend.environment.mapping import Mapping
+from backend.module.scraping.html_parser import make_tree, get_text, has_class
+from backend.module.scraping.normalizer import to_order, to_diff_time, to_int, to_time_idx, to_horse_numbers
+
+
+class RacePageExtractor:
+    """
+    db.netkeibaのレースページ(https://db.netkeiba.com/race/<race_id>)を一度だけ解析し、
+    result, race, race_card, refund, race_date_mapping の各テーブルの行を抽出する
+
+    ページはlxmlで解析し、レース結果のテーブルは1行ずつ列名を頼りに値を取り出す。
+    """
+
+    table_names = ['result', 'race_date_mapping', 'race', 'race_card', 'refund']
+
+    # レース結果のテーブルの列名
+    result_columns = {
+        'order': '着順',
+        'bracket_number': '枠番',
+        'horse_number': '馬番',
+        'horse_name': '馬名',
+        'sex&age': '性齢',
+        'weight_carry': '斤量',
+        'jockey_name': '騎手',
+        'diff_time': '着差',
+        'time_idx': 'ﾀｲﾑ指数',
+        'passing': '通過',
+        'last3F': '上り',
+        'odds': '単勝',
+        'popular': '人気',
+        'weight_horse': '馬体重',
+        'remark': '備考',
+        'prize': '賞金',
+    }
+
+    def __init__(self, table_names: Optional[list] = None) -> None:
+        """
+        Parameters
+        ----------
+        table_names: Optional[list[str]]
+            抽出するテーブル名 (指定しない場合は全てのテーブル)
+            先頭のテーブルの抽出に失敗した場合は例外を送出し、それ以外のテーブルは抽出できたもののみ返す
+            (抽出できなかったテーブルがあるレースは、BatchWriterが書き込まずfailedとして記録する)
+        """
+        if table_names is not None:
+            self.table_names = table_names
+
+    def __call__(self, race_id: str, html: bytes) -> dict:
+        """
+        Parameters
+        ----------
+        race_id: str
+            対象のレースのマスタID
+        html: bytes
+            レースページの内容
+
+        Returns
+        -------
+        tables: dict[str, pd.DataFrame]
+            テーブル名をkeyとした抽出結果
+            先頭以外のテーブルの抽出に失敗した場合、そのテーブルは含まれない
+
+        Raises
+        ------
+        AttributeError
+            レース結果が存在しない(レースが開催されていない)場合
+        """
+        tree = self.parse(html)
+        tables = dict()
+        for i, table_name in enumerate(self.table_names):
+            try:
+                if table_name == 'race_date_mapping':
+                    if 'result' not in tables:
+                        tables['result'] = self.extract_result(race_id, tree)
+                    tables[table_name] = tables['result'][['race_id', 'date']].drop_duplicates()
+                else:
+                    tables[table_name] = getattr(self, f'extract_{table_name}')(race_id, tree)
+            except (AttributeError, IndexError, KeyError, ValueError):
+                if i == 0:
+                    raise
+        return {table_name: tables[table_name] for table_name in self.table_names if table_name in tables}
+
+    @staticmethod
+    def parse(html: bytes) -> lxml.html.HtmlElement:
+        """
+        レースページを解析する
+
+        Raises
+        ------
+        AttributeError
+            レース結果が存在しない場合
+        """
+        tree = make_tree(html)
+        if not tree.xpath('//table[@summary="レース結果"]'):
+            raise AttributeError('レース結果が存在しません。')
+        return tree
+
+    def extract_result(self, race_id: str, tree: lxml.html.HtmlElement) -> pd.DataFrame:
+        rows = self.__walk_result_table(tree)
+        # 着順・着差は取り込み時に数値に変換する
+        _df = pd.DataFrame({
+            'order': pd.array([to_order(row['order']) for row in rows], dtype='Int64'),
+            'diff_time': [to_diff_time(row['diff_time']) for row in rows],
+            # 単勝オッズ列の'---'をNaNに変換
+            'odds': pd.to_numeric([row['odds'] for row in rows], errors='coerce'),
+        })
+        # 日付の抽出
+        _df['date'] = [self.__get_date(tree)] * len(_df)
+        # 賞金の抽出
+        _df['prize'] = [float(row['prize'].replace(',', '')) if row['prize'] else 0 for row in rows]
+        # ﾀｲﾑ指数の抽出
+        _df['time_idx'] = [to_time_idx(row['time_idx']) for row in rows]
+        # 馬場指数
+        _df["ground_state_idx"] = [self.__get_ground_state_idx(tree)] * len(_df)
+        # 上りの抽出
+        _df['last3F'] = [row['last3F'] or np.nan for row in rows]
+        # 備考及び通過順の抽出
+        _df['remark'] = [row['remark'] or np.nan for row in rows]
+        _df['passing'] = [row['passing'] or np.nan for row in rows]
+        _df["horse_id"] = [row['horse_id'] for row in rows]
+        _df['race_id'] = [race_id] * len(_df)
+        return _df
+
+    def extract_race(self, race_id: str, tree: lxml.html.HtmlElement) -> pd.DataFrame:
+        df = pd.DataFrame([])
+        # 天候、レースの種類、コースの長さ、馬場の状態、日付をスクレイピング
+        data_intro = tree.xpath(f'//div[{has_class("data_intro")}]')[0]
+        texts = ''.join(p.text_content() for p in data_intro.xpath('.//p')[:2])
+        info = re.findall(r'\w+', texts)
+        for text in info:
+            if text in ["芝", "ダート"]:
+                df["course_type"] = [text]
+            if "障" in text:
+                df["course_type"] = ["障害"]
+                df["turn"] = ["障害"]
+            if "m" in text:
+                df["course_len"] = [int(re.findall(r"(\d+)m", text)[0])]
+            if text in ["良", "稍重", "重", "不良"]:
+                df["ground_state"] = [text]
+            if text in ["曇", "晴", "雨", "小雨", "小雪", "雪"]:
+                df["weather"] = [text]
+            if all([w in text for w in ['年', '月', '日']]):
+                d = datetime.strptime(text, "%Y年%m月%d日")
+                df["date"] = [date(d.year, d.month, d.day)]
+            if "右" in text:
+                df["turn"] = ["右"]
+            elif "左" in text:
+                df["turn"] = ["左"]
+            elif "直線" in text:
+                df["turn"] = ["直線"]
+            if "新馬" in text:
+                df["race_class"] = ["新馬"]
+            elif "未勝利" in text:
+                df["race_class"] = ["未勝利"]
+            elif "1勝クラス" in text or "500万下" in text:
+                df["race_class"] = ["1勝クラス"]
+            elif "2勝クラス" in text or "1000万下" in text:
+                df["race_class"] = ["2勝クラス"]
+            elif "3勝クラス" in text or "1600万下" in text:
+                df["race_class"] = ["3勝クラス"]
+            elif "オープン" in text:
+                df["race_class"] = ["オープン"]
+        df['race_name'] = [tree.xpath('//h1')[1].text_content()]
+        df["nth_race"] = [int(race_id[-2:])]
+        df["nth_day"] = [int(race_id[8:10])]
+        df["nth_time"] = [int(race_id[6:8])]
+        df["venue"] = [v for v, k in Mapping.PLACE_ID_MAPPING.items() if k == race_id[4:6]]
+        df['race_id'] = [race_id]
+        return df
+
+    def extract_race_card(self, race_id: str, tree: lxml.html.HtmlElement) -> pd.DataFrame:
+        rows = self.__walk_result_table(tree)
+        _df = pd.DataFrame(rows)[[
+            'bracket_number',
+            'horse_number',
+            'sex&age',
+            'weight_carry',
+            'jockey_name',
+            'popular',
+            'weight_horse',
+            'horse_id',
+            'jockey_id',
+        ]]
+        # int型においてNaNが利用できないため、0で埋める。
+        _df['popular'] = pd.to_numeric(_df['popular'], errors='coerce').fillna(0)
+        _df['weight_carry'] = _df['weight_carry'].astype(float)
+        # 馬体重を馬体重と馬体重差に分割
+        _df = pd.concat([_df, _df['weight_horse'].str.split('(', expand=True)], axis=1).drop('weight_horse', axis=1)
+        _df.rename(columns={0: 'weight_horse', 1: 'diff_weight_horse'}, inplace=True)
+        if 'diff_weight_horse' not in _df.columns:
+            _df['diff_weight_horse'] = None
+        _df['weight_horse'] = _df['weight_horse'].replace('計不', 0)
+        _df['diff_weight_horse'] = _df['diff_weight_horse'].map(lambda x: x.replace(')', '') if x else 0)
+        # 性齢から年齢のみを取り出す。
+        _df['age'] = _df['sex&age'].map(lambda x: re.sub('牝|牡|セ', '', x))
+        _df.drop('sex&age', axis=1, inplace=True)
+        # 型を変更する
+        _df = _df.astype({
+            'bracket_number': 'int',
+            'horse_number': 'int',
+            'weight_horse': 'int',
+            'diff_weight_horse': 'int',
+            'age': 'int',
+            'popular': 'int'
+        })
+        _df['race_id'] = [race_id] * len(_df)
+        # 馬番順に変更する
+        _df.sort_values('horse_number', inplace=True)
+        return _df
+
+    def extract_refund(self, race_id: str, tree: lxml.html.HtmlElement) -> pd.DataFrame:
+        # 1つ目のテーブルに単勝〜馬連、2つ目のテーブルにワイド〜三連単がある
+        # 複勝やワイドなどは改行で区切られているため、文字列brに変換して後でsplitする
+        rows = list()
+        for betting in ['単勝', '三連複']:
+            table = tree.xpath(f'//table[not(@summary="レース結果")][.//th[normalize-space()="{betting}"]]')[0]
+            for tr in table.xpath('.//tr[th]'):
+                rows.append([get_text(cell, br='br') for cell in tr.xpath('./th|./td')][:4])
+        df = pd.DataFrame(rows, columns=['betting', 'horse_number', 'money', 'popular'])
+        df.set_index('betting', inplace=True)
+        # 複勝払い戻しの行を分割する
+        fukusho_row = df.loc['複勝', :].str.split('br', expand=True).T
+        fukusho_row.index = pd.Series([f'複勝_{i+1}' for i in range(len(fukusho_row))], name='betting')
+        df = pd.concat([df, fukusho_row]).drop('複勝')
+        # ワイド払い戻しの行を分割する
+        wide_row = df.loc['ワイド', :].str.split('br', expand=True).T
+        wide_row.index = pd.Series(['ワイド_12', 'ワイド_13', 'ワイド_23'], name='betting')
+        df = pd.concat([df, wide_row]).drop('ワイド')
+        # 払い戻し金額・人気・馬番は取り込み時に数値に変換する
+        horse_numbers = [to_horse_numbers(text) for text in df['horse_number']]
+        for i in range(3):
+            df[f'horse_number_{i}'] = pd.array([numbers[i] for numbers in horse_numbers], dtype='Int64')
+        df['money'] = pd.array([to_int(text) for text in df['money']], dtype='Int64')
+        df['popular'] = pd.array([to_int(text) for text in df['popular']], dtype='Int64')
+        df.drop('horse_number', axis=1, inplace=True)
+        df['race_id'] = [race_id] * len(df)
+        df.reset_index(inplace=True)
+        return df
+
+    def __walk_result_table(self, tree: lxml.html.HtmlElement) -> list:
+        """
+        レース結果のテーブルを1行ずつ走査し、列名をkeyとした値を取得する
+        ログインしていない場合に存在しない列(ﾀｲﾑ指数など)は空文字とする
+
+        Returns
+        -------
+        rows: list[dict[str, str]]
+            1頭分の値をまとめたdictのリスト
+        """
+        table = tree.xpath('//table[@summary="レース結果"]')[0]
+        headers = [get_text(th) for th in table.xpath('.//tr[th][1]/th')]
+        indices = dict()
+        for col, name in self.result_columns.items():
+            for i, header in enumerate(headers):
+                if header.startswith(name):
+                    indices[col] = i
+                    break
+        rows = list()
+        for tr in table.xpath('.//tr[td]'):
+            tds = tr.xpath('./td')
+            row = {col: get_text(tds[indices[col]]) if col in indices else '' for col in self.result_columns}
+            row['horse_id'] = self.__get_id(tds[indices['horse_name']])
+            row['jockey_id'] = self.__get_id(tds[indices['jockey_name']])
+            rows.append(row)
+        return rows
+
+    def __get_id(self, td: lxml.html.HtmlElement) -> str:
+        return re.findall(r"\d+", td.xpath('.//a/@href')[0])[0]
+
+    def __get_date(self, tree: lxml.html.HtmlElement) -> date:
+        href = tree.xpath('//li/a[contains(@href, "race/list")]/@href')[0]
+        d = datetime.strptime(re.sub('race/list|/', '', href), '%Y%m%d')
+        return date(d.year, d.month, d.day)
+
+    def __get_ground_state_idx(self, tree: lxml.html.HtmlElement) -> int:
+        for tr in tree.xpath('//tr[th[normalize-space()="馬場指数"]]'):
+            return int(tr.xpath('./td')[0].text_content().replace('\xa0(?)', ''))
+        return 0
@@ -0,0 +1,48 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    ホスト毎のリクエスト頻度を制限するトークンバケット
+    429/5xxが返ってきた場合は補充速度を半分にし、成功する毎に元の速度まで徐々に戻す
+
+    Attributes
+    ----------
+    base_rate: float
+        1秒あたりに補充されるトークン数の初期値
+    rate: float
+        現在の1秒あたりに補充されるトークン数
+    capacity: int
+        貯めておけるトークン数の上限(バースト幅)
+    """
+
+    min_rate = 0.05
+
+    def __init__(self, rate: float, capacity: int = 1) -> None:
+        self.base_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+
+    async def acquire(self) -> None:
+        """
+        トークンを1つ消費する。トークンが足りない場合は補充されるまで待機する。
+        イベントループは単一スレッドで動くため、先にトークンを予約してから待機する。
+        """
+        self.__refill()
+        self.tokens -= 1
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
+
+    def slow_down(self) -> None:
+        self.rate = max(self.rate / 2, self.min_rate)
+
+    def speed_up(self) -> None:
+        self.rate = min(self.rate + self.base_rate / 10, self.base_rate)
+
+    def __refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.tokens + (now - self.updated_at) * self.rate, self.capacity)
+        self.updated_at = now
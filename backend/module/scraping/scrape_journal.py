@@ -0,0 +1,144 @@
+import logging
+import os
+import sqlite3
+import time
+import pandas as pd
+from typing import Optional
+from backend.environment.scraping import Scraping
+from backend.module.scraping.known_ids import KnownIds
+
+logger = logging.getLogger(__name__)
+
+
+class ScrapeJournal:
+    """
+    スクレイピングの進捗をidごとに記録するジャーナル
+
+    データベースへの書き込みが完了したidをdone、取得・解析に失敗したidをfailedとしてsqliteに保存する。
+    中断したスクレイピングを再開する際は、doneのidを飛ばすことで続きから取得できる。
+
+    Attributes
+    ----------
+    name: str
+        ジャーナル名 (スクレイピング対象毎に分ける)
+    """
+
+    def __init__(self, name: str, journal_dir: str = Scraping.JOURNAL_DIR) -> None:
+        self.name = name
+        os.makedirs(journal_dir, exist_ok=True)
+        self.connection = sqlite3.connect(os.path.join(journal_dir, f'{name}.sqlite'))
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS entry (key TEXT PRIMARY KEY, status TEXT NOT NULL, updated_at REAL NOT NULL)'
+        )
+        self.connection.commit()
+
+    def done_keys(self) -> set:
+        return self.__get_keys('done')
+
+    def failed_keys(self) -> set:
+        return self.__get_keys('failed')
+
+    def mark_done(self, keys: list) -> None:
+        self.__mark(keys, 'done')
+
+    def mark_failed(self, keys: list) -> None:
+        self.__mark(keys, 'failed')
+
+    def reset(self) -> None:
+        """
+        記録を全て削除し、最初から取得し直せるようにする
+        """
+        self.connection.execute('DELETE FROM entry')
+        self.connection.commit()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __get_keys(self, status: str) -> set:
+        return set(row[0] for row in self.connection.execute('SELECT key FROM entry WHERE status = ?', (status,)))
+
+    def __mark(self, keys: list, status: str) -> None:
+        now = time.time()
+        self.connection.executemany(
+            'INSERT OR REPLACE INTO entry (key, status, updated_at) VALUES (?, ?, ?)',
+            [(key, status, now) for key in keys]
+        )
+        self.connection.commit()
+
+
+class BatchWriter:
+    """
+    スクレイピングしたデータを一定件数毎にデータベースへ書き込む
+
+    取得したデータはflush_size件分だけメモリに保持し、書き込みが完了したidをjournalにdoneとして記録する。
+    updatersのテーブルのうち抽出できなかったものがあるidは、一部のテーブルのみ保存されて再開時に飛ばされないよう、
+    どのテーブルにも書き込まずfailedとして記録する。
+    with文で利用した場合、中断(KeyboardInterrupt等)された時も保持しているデータを書き込んでから終了する。
+
+    Attributes
+    ----------
+    updaters: dict[str, Callable[[pd.DataFrame], bool]]
+        テーブル名をkeyとした、データベースへの書き込み関数 (crud.updateの関数)
+    journal: ScrapeJournal
+        進捗を記録するジャーナル
+    flush_size: int
+        何件分保持したら書き込むか
+    known_ids: Optional[KnownIds]
+        書き込みが完了したidを追加する保存済みidの集合
+    """
+
+    def __init__(
+        self,
+        updaters: dict,
+        journal: ScrapeJournal,
+        flush_size: int = Scraping.FLUSH_SIZE,
+        known_ids: Optional[KnownIds] = None
+    ) -> None:
+        self.updaters = updaters
+        self.journal = journal
+        self.flush_size = flush_size
+        self.known_ids = known_ids
+        self.buffer: dict = dict()
+
+    def __enter__(self) -> 'BatchWriter':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.flush()
+
+    def add(self, key: str, tables: dict) -> None:
+        """
+        Parameters
+        ----------
+        key: str
+            スクレイピング対象のid
+        tables: dict[str, pd.DataFrame]
+            テーブル名をkeyとしたスクレイピング結果
+        """
+        self.buffer[key] = tables
+        if len(self.buffer) >= self.flush_size:
+            self.flush()
+
+    def fail(self, key: str) -> None:
+        self.journal.mark_failed([key])
+
+    def flush(self) -> None:
+        if not self.buffer:
+            return
+        buffer = {key: tables for key, tables in self.buffer.items() if all(name in tables for name in self.updaters)}
+        incomplete_keys = [key for key in self.buffer if key not in buffer]
+        if incomplete_keys:
+            logger.warning('%d件は一部のテーブルを抽出できなかったため書き込みません: %s', len(incomplete_keys), incomplete_keys)
+            self.journal.mark_failed(incomplete_keys)
+        is_succeeded = True
+        for table_name, update_table in self.updaters.items():
+            dfs = [tables[table_name] for tables in buffer.values()]
+            if dfs:
+                # pd.DataFrame型にして一つのデータにまとめる
+                is_succeeded &= update_table(pd.concat(dfs))
+        # 書き込みに失敗した場合は、再開時に取得し直す
+        if is_succeeded and buffer:
+            self.journal.mark_done(list(buffer))
+            if self.known_ids is not None:
+                self.known_ids.add(buffer)
+        self.buffer = dict()
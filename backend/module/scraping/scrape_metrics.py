@@ -0,0 +1,227 @@
+import json
+import os
+import re
+import threading
+import time
+import numpy as np
+import pandas as pd
+from typing import Optional
+from urllib.parse import urlparse
+from tabulate import tabulate
+from backend.environment.scraping import Scraping
+
+
+class ScrapeMetrics:
+    """
+    スクレイピングの所要時間の内訳を記録する
+
+    取得はurlのパターン(エンドポイント)毎に、応答時間・転送量・リトライ回数・バックオフ及びリクエスト頻度の制限で待った時間を、
+    解析は解析処理毎に、1ページあたりの解析時間と抽出した行数を記録する。
+    実行の最後に report() で集計表を表示し、export() でjson/csvに書き出す。
+    プロセス内では shared() が返す1つのインスタンスに、全てのFetcher, ScrapePipelineが記録する。
+
+    Attributes
+    ----------
+    requests: dict[str, dict]
+        エンドポイントをkeyとした取得の記録
+    parses: dict[str, dict]
+        解析処理の名前をkeyとした解析の記録
+    """
+
+    __shared: Optional['ScrapeMetrics'] = None
+
+    # urlのパスとエンドポイント名の対応 (該当しないものはパスをそのまま使う)
+    endpoints = {
+        'race': r'^/race/\d{12}/?$',
+        'ped': r'^/horse/ped/\w+/?$',
+        'horse': r'^/horse/\w+/?$',
+        'shutuba': r'^/race/shutuba\.html$',
+        'odds': r'^/api/api_get_jra_odds\.html$',
+        'calendar': r'^/top/calendar\.html$',
+        'race_list': r'^/top/race_list_sub\.html$',
+    }
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+        self.requests: dict = dict()
+        self.parses: dict = dict()
+
+    @classmethod
+    def shared(cls) -> 'ScrapeMetrics':
+        if cls.__shared is None:
+            cls.__shared = cls()
+        return cls.__shared
+
+    def get_endpoint(self, url: str) -> str:
+        parsed = urlparse(url)
+        for endpoint, pattern in self.endpoints.items():
+            if re.match(pattern, parsed.path):
+                return endpoint
+        return parsed.netloc + parsed.path
+
+    def record_request(self, url: str, status: Optional[int], elapsed: float, n_bytes: int = 0) -> None:
+        """
+        1回のリクエストを記録する (statusがNoneの場合は通信エラー)
+        """
+        with self.lock:
+            stats = self.__get_request_stats(url)
+            stats['latencies'].append(elapsed)
+            stats['bytes'] += n_bytes
+            status = 'error' if status is None else str(status)
+            stats['statuses'][status] = stats['statuses'].get(status, 0) + 1
+
+    def record_retry(self, url: str, backoff: float) -> None:
+        with self.lock:
+            stats = self.__get_request_stats(url)
+            stats['retries'] += 1
+            stats['backoff_sec'] += backoff
+
+    def record_throttle(self, url: str, waited: float) -> None:
+        """
+        TokenBucketでリクエスト頻度の制限により待った時間を記録する
+        """
+        with self.lock:
+            self.__get_request_stats(url)['throttle_sec'] += waited
+
+    def record_cache_hit(self, url: str) -> None:
+        with self.lock:
+            self.__get_request_stats(url)['cache_hits'] += 1
+
+    def record_parse(self, name: str, elapsed: float, tables: Optional[dict]) -> None:
+        """
+        1ページの解析を記録する
+
+        Parameters
+        ----------
+        name: str
+            解析処理の名前
+        elapsed: float
+            解析にかかった時間(秒)
+        tables: Optional[dict[str, pd.DataFrame]]
+            抽出した行データ (解析に失敗した場合はNone)
+        """
+        with self.lock:
+            stats = self.parses.setdefault(name, {'latencies': list(), 'failures': 0, 'rows': dict()})
+            stats['latencies'].append(elapsed)
+            if tables is None:
+                stats['failures'] += 1
+                return
+            for table_name, df in tables.items():
+                stats['rows'][table_name] = stats['rows'].get(table_name, 0) + len(df)
+
+    def summary(self) -> tuple:
+        """
+        Returns
+        -------
+        request_df: pd.DataFrame
+            エンドポイント毎の取得の集計
+        parse_df: pd.DataFrame
+            解析処理毎の解析の集計
+        """
+        with self.lock:
+            request_rows = [
+                {
+                    'endpoint': endpoint,
+                    'requests': len(stats['latencies']),
+                    'cache_hits': stats['cache_hits'],
+                    'retries': stats['retries'],
+                    'non_200': sum(n for status, n in stats['statuses'].items() if status != '200'),
+                    'mb': stats['bytes'] / 1024 ** 2,
+                    'total_sec': sum(stats['latencies']),
+                    'backoff_sec': stats['backoff_sec'],
+                    'throttle_sec': stats['throttle_sec'],
+                    **self.__get_percentiles(stats['latencies']),
+                }
+                for endpoint, stats in self.requests.items()
+            ]
+            parse_rows = [
+                {
+                    'parser': name,
+                    'pages': len(stats['latencies']),
+                    'failures': stats['failures'],
+                    'total_sec': sum(stats['latencies']),
+                    **self.__get_percentiles(stats['latencies']),
+                    'rows': ', '.join(f'{table_name}={n}' for table_name, n in stats['rows'].items()),
+                }
+                for name, stats in self.parses.items()
+            ]
+        return pd.DataFrame(request_rows), pd.DataFrame(parse_rows)
+
+    def report(self) -> None:
+        """
+        集計表を表示する
+        """
+        request_df, parse_df = self.summary()
+        print(f'経過時間: {time.time() - self.started_at:.1f}秒')
+        if len(request_df):
+            print(tabulate(request_df, headers='keys', tablefmt='presto', floatfmt='.2f', showindex=False))
+        if len(parse_df):
+            print(tabulate(parse_df, headers='keys', tablefmt='presto', floatfmt='.2f', showindex=False))
+
+    def export(self, path: Optional[str] = None) -> str:
+        """
+        記録をpathに書き出す
+        拡張子が.csvの場合は集計表を、それ以外はレイテンシのヒストグラムを含めてjsonで書き出す
+
+        Parameters
+        ----------
+        path: Optional[str]
+            書き出し先 (指定しない場合はScraping.METRICS_DIRに開始時刻のファイル名で保存する)
+
+        Returns
+        -------
+        path: str
+            書き出したファイルのパス
+        """
+        if path is None:
+            os.makedirs(Scraping.METRICS_DIR, exist_ok=True)
+            path = os.path.join(Scraping.METRICS_DIR, time.strftime('%Y%m%d_%H%M%S.json', time.localtime(self.started_at)))
+        request_df, parse_df = self.summary()
+        if path.endswith('.csv'):
+            pd.concat([request_df.assign(kind='request'), parse_df.assign(kind='parse')]).to_csv(path, index=False)
+            return path
+        with self.lock:
+            histograms = {
+                'requests': {endpoint: self.__get_histogram(stats['latencies']) for endpoint, stats in self.requests.items()},
+                'parses': {name: self.__get_histogram(stats['latencies']) for name, stats in self.parses.items()},
+            }
+            statuses = {endpoint: stats['statuses'] for endpoint, stats in self.requests.items()}
+        with open(path, 'w') as f:
+            json.dump({
+                'started_at': self.started_at,
+                'elapsed_sec': time.time() - self.started_at,
+                'requests': request_df.to_dict(orient='records'),
+                'parses': parse_df.to_dict(orient='records'),
+                'statuses': statuses,
+                'histogram_buckets_sec': list(Scraping.LATENCY_BUCKETS),
+                'histograms': histograms,
+            }, f, ensure_ascii=False, indent=2)
+        return path
+
+    def __get_request_stats(self, url: str) -> dict:
+        return self.requests.setdefault(self.get_endpoint(url), {
+            'latencies': list(),
+            'statuses': dict(),
+            'bytes': 0,
+            'retries': 0,
+            'backoff_sec': 0.0,
+            'throttle_sec': 0.0,
+            'cache_hits': 0,
+        })
+
+    def __get_percentiles(self, latencies: list) -> dict:
+        if not latencies:
+            return {'mean_ms': np.nan, 'p50_ms': np.nan, 'p95_ms': np.nan, 'max_ms': np.nan}
+        values = np.array(latencies) * 1000
+        return {
+            'mean_ms': values.mean(),
+            'p50_ms': np.percentile(values, 50),
+            'p95_ms': np.percentile(values, 95),
+            'max_ms': values.max(),
+        }
+
+    def __get_histogram(self, latencies: list) -> list:
+        # 各バケットの上限以下の件数 (最後は上限なし)
+        counts, _ = np.histogram(latencies, bins=[0.0, *Scraping.LATENCY_BUCKETS, np.inf])
+        return counts.tolist()
@@ -0,0 +1,187 @@
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Callable, Optional
+from tqdm import tqdm
+from backend.environment.scraping import Scraping
+from backend.module.scraping.fetcher import Fetcher
+from backend.module.scraping.known_ids import KnownIds
+from backend.module.scraping.page_cache import PageCache
+from backend.module.scraping.scrape_journal import ScrapeJournal, BatchWriter
+from backend.module.scraping.scrape_metrics import ScrapeMetrics
+
+
+def timed_extract(extract: Callable[[str, bytes], dict], key: str, html: bytes) -> tuple:
+    """
+    解析プロセスで解析し、抽出した行データと解析にかかった時間を返す
+    解析に失敗した場合は、例外と解析にかかった時間を返す
+    """
+    started_at = time.perf_counter()
+    try:
+        tables = extract(key, html)
+    except ScrapePipeline.parse_errors as e:
+        return e, time.perf_counter() - started_at
+    return tables, time.perf_counter() - started_at
+
+
+class ScrapePipeline:
+    """
+    ページの取得、解析、データベースへの書き込みを分離して並行に行う
+
+    取得用のスレッドがFetcherで取得したページをキューに積み、
+    ProcessPoolExecutorの解析プロセスがキューから取り出したページを行データに変換し、
+    メインスレッドのBatchWriterのみがデータベースへ書き込む。
+    保存済みのページを解析し直す場合など、解析が律速となる場合に全てのコアを利用できる。
+
+    Attributes
+    ----------
+    extract: Callable[[str, bytes], dict[str, pd.DataFrame]]
+        idとページの内容から、テーブル名をkeyとした行データを抽出する (pickle可能である必要がある)
+    writer: BatchWriter
+        抽出した行データを書き込む
+    fetcher: Fetcher
+        ページの取得に利用する
+    max_workers: int
+        解析プロセス数
+    metrics: ScrapeMetrics
+        解析時間・抽出した行数の記録先 (指定しない場合はプロセス内で共有するもの)
+    """
+
+    # 解析に失敗したとみなす例外
+    parse_errors = (AttributeError, IndexError, KeyError, ValueError)
+
+    def __init__(
+        self,
+        extract: Callable[[str, bytes], dict],
+        writer: BatchWriter,
+        fetcher: Optional[Fetcher] = None,
+        max_workers: int = Scraping.PARSE_WORKERS,
+        metrics: Optional[ScrapeMetrics] = None
+    ) -> None:
+        self.extract = extract
+        self.writer = writer
+        self.fetcher = fetcher if fetcher is not None else Fetcher()
+        self.max_workers = max_workers
+        self.metrics = metrics if metrics is not None else ScrapeMetrics.shared()
+        self.name = getattr(extract, '__name__', type(extract).__name__)
+
+    def run(self, keys: list, urls: list) -> None:
+        """
+        keysに対応するurlsのページを取得・解析し、書き込む
+        中断(KeyboardInterrupt)された場合は、それまでに解析し終えたデータを書き込んで終了する
+
+        Parameters
+        ----------
+        keys: list[str]
+            スクレイピング対象のid
+        urls: list[str]
+            keysに対応するページのurl
+        """
+        pages: queue.Queue = queue.Queue(maxsize=Scraping.CHUNK_SIZE * 2)
+        stop = threading.Event()
+        producer = threading.Thread(target=self.__produce, args=(keys, urls, pages, stop), daemon=True)
+        producer.start()
+        pbar = tqdm(total=len(keys))
+        pending: dict = dict()
+        executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        try:
+            while True:
+                item = pages.get()
+                if item is None:
+                    break
+                key, url, html = item
+                if html is None:
+                    self.writer.fail(key)
+                    pbar.update(1)
+                    continue
+                pending[executor.submit(timed_extract, self.extract, key, html)] = (key, url)
+                # 解析待ちのページが溜まりすぎないようにする
+                if len(pending) >= self.max_workers * 2:
+                    self.__collect(pending, pbar, FIRST_COMPLETED)
+            self.__collect(pending, pbar)
+        except KeyboardInterrupt:
+            print("スクレイピングを中断します。\n")
+        finally:
+            stop.set()
+            # 解析プロセスもSIGINTを受け取り結果の取り出しで例外が起こり得るため、先にバッファの行データを書き込む
+            self.writer.flush()
+            executor.shutdown(wait=True, cancel_futures=True)
+            self.__collect({future: item for future, item in pending.items() if future.done() and not future.cancelled()}, pbar)
+            self.writer.flush()
+            pbar.close()
+
+    def __produce(self, keys: list, urls: list, pages: queue.Queue, stop: threading.Event) -> None:
+        try:
+            for key, url, html in zip(keys, urls, self.fetcher.iter_fetch(urls)):
+                if stop.is_set() or not self.__put(pages, (key, url, html), stop):
+                    return
+        finally:
+            self.__put(pages, None, stop)
+
+    def __put(self, pages: queue.Queue, item, stop: threading.Event) -> bool:
+        """
+        キューに空きができるまで待ってitemを積む
+        中断された(メインスレッドがキューから取り出さなくなった)場合は積まずにFalseを返す
+        """
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def __collect(self, pending: dict, pbar: tqdm, return_when: str = 'ALL_COMPLETED') -> None:
+        done, _ = wait(list(pending), return_when=return_when)
+        for future in done:
+            key, url = pending.pop(future)
+            self.__write(future, key, url)
+            pbar.update(1)
+
+    def __write(self, future: Future, key: str, url: str) -> None:
+        try:
+            tables, elapsed = future.result()
+        except BaseException:
+            # 解析プロセスが中断・異常終了した場合は、解析していないため再開時に取得し直す
+            return
+        if isinstance(tables, Exception):
+            self.metrics.record_parse(self.name, elapsed, None)
+            # 開催前のページなどを保存しないようにする
+            if self.fetcher.cache is not None:
+                self.fetcher.cache.discard(url)
+            self.writer.fail(key)
+        else:
+            self.metrics.record_parse(self.name, elapsed, tables)
+            self.writer.add(key, tables)
+
+
+def run_pipeline(table_name: str, key: str, url_prefix: str, extract: Callable[[str, bytes], dict], updaters: dict, ids) -> None:
+    """
+    保存済みでないidのページを取得・解析し、Scraping.FLUSH_SIZE件毎にデータベースに書き込む
+
+    保存済みのidはtable_nameのテーブルのkey列のみ読み込み、ジャーナルのdoneのidと合わせて集合で判定する。
+    取得と解析を分離し、解析は複数プロセスで行う。
+
+    Parameters
+    ----------
+    table_name: str
+        保存済みのidを判定するテーブル名 (ジャーナル名にも用いる)
+    key: str
+        idの列名 (race_id, horse_id など)
+    url_prefix: str
+        idを付け足すとページのurlになる文字列 (Scraping.DB_BASE_URL + '/race/' など)
+    extract: Callable[[str, bytes], dict[str, pd.DataFrame]]
+        idとページの内容から、テーブル名をkeyとした行データを抽出する
+    updaters: dict[str, Callable[[pd.DataFrame], bool]]
+        テーブル名をkeyとした、データベースへの書き込み関数
+    ids: Iterable
+        スクレイピング対象のid (文字列、またはkeyを属性に持つ行)
+    """
+    known_ids = KnownIds(table_name, key)
+    journal = ScrapeJournal(table_name)
+    known_ids.add(journal.done_keys())
+    id_ls = known_ids.filter(_id if isinstance(_id, str) else getattr(_id, key) for _id in ids)
+    urls = [url_prefix + _id for _id in id_ls]
+    writer = BatchWriter(updaters, journal, known_ids=known_ids)
+    ScrapePipeline(extract, writer, Fetcher(cache=PageCache())).run(id_ls, urls)
@@ -0,0 +1,75 @@
+import re
+import pandas as pd
+from datetime import date, datetime
+from backend.module.scraping.html_parser import make_soup
+
+
+class ShutubaExtractor:
+    """
+    race.netkeibaの出馬表ページ(shutuba.html?race_id=<race_id>)から出馬表を抽出する
+    """
+
+    def __call__(self, race_id: str, html: bytes) -> pd.DataFrame:
+        """
+        Returns
+        -------
+        _df: pd.DataFrame
+            出馬表の列名のままの1レース分の出馬表
+        """
+        _df = pd.read_html(html.decode('EUC-JP', errors='replace'))[0]
+        _df = _df.T.reset_index(level=0, drop=True).T
+        soup = make_soup(html)
+        texts = soup.find('div', attrs={'class': 'RaceData01'}).text
+        texts = re.findall(r'\w+', texts)
+        for text in texts:
+            if 'm' in text:
+                _df['course_len'] = [int(re.findall(r"(\d+)m", text)[0])] * len(_df)
+            if text in ["曇", "晴", "雨", "小雨", "小雪", "雪"]:
+                _df["weather"] = [text] * len(_df)
+            if text in ["良", "稍重", "重"]:
+                _df["ground_state"] = [text] * len(_df)
+            if '不' in text:
+                _df["ground_state"] = ['不良'] * len(_df)
+            # 2020/12/13追加
+            if '稍' in text:
+                _df["ground_state"] = ['稍重'] * len(_df)
+            if '芝' in text:
+                _df['course_type'] = ['芝'] * len(_df)
+            if '障' in text:
+                _df['course_type'] = ['障害'] * len(_df)
+            if 'ダ' in text:
+                _df['course_type'] = ['ダート'] * len(_df)
+            if "右" in text:
+                _df["turn"] = ['右'] * len(_df)
+            elif "左" in text:
+                _df["turn"] = ['左'] * len(_df)
+            elif '直線' in text:
+                _df["turn"] = ['直線'] * len(_df)
+        texts = soup.find('div', attrs={'class': 'RaceData02'}).text
+        texts = re.findall(r'\w+', texts)
+        for text in texts:
+            if text in ["新馬", "未勝利", "１勝クラス", "２勝クラス", "３勝クラス", "オープン"]:
+                _df['race_class'] = [text] * len(_df)
+        _df["nth_race"] = [int(race_id[-2:])] * len(_df)
+        _df["nth_day"] = [int(race_id[8:10])] * len(_df)
+        _df["nth_time"] = [int(race_id[6:8])] * len(_df)
+        for info in soup.find_all('dd'):
+            if info.get('class') == ['Active']:
+                d = datetime.strptime(info.find('a').get('href').split('&')[0][-8:], '%Y%m%d')
+                _df['date'] = [date(d.year, d.month, d.day)] * len(_df)
+        # horse_id
+        horse_id_list = []
+        horse_td_list = soup.find_all("td", attrs={'class': 'HorseInfo'})
+        for td in horse_td_list:
+            horse_id = re.findall(r'\d+', td.find('a')['href'])[0]
+            horse_id_list.append(horse_id)
+        # jockey_id
+        jockey_id_list = []
+        jockey_td_list = soup.find_all("td", attrs={'class': 'Jockey'})
+        for td in jockey_td_list:
+            jockey_id = re.findall(r'\d+', td.find('a')['href'])[0]
+            jockey_id_list.append(jockey_id)
+        _df['horse_id'] = horse_id_list
+        _df['jockey_id'] = jockey_id_list
+        _df['race_id'] = [race_id] * len(_df)
+        return _df
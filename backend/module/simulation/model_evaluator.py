@@ -1,5 +1,6 @@
 import numpy as np
 from backend.module.repository import Refund
+from backend.module.utils.lazy import Lazy
 from itertools import combinations
 from itertools import permutations
 
@@ -13,7 +14,7 @@ class ModelEvaluator:
     rank_predictor: RankPredictor
         ある日付に開催されたレースの予測を行う
     """
-    refund = Refund()
+    refund = Lazy(Refund)
 
     def __init__(self, rank_predictor):
         self.rank_predictor = rank_predictor
@@ -1,15 +1,12 @@
 import datetime
-import lightgbm as lgb
 import pandas as pd
-import re
-import requests
 from backend.environment.lightgbm import LightGBM
 from backend.environment.columns import Columns as Cols
 from backend.module.repository import OriginalRaceCard
 from backend.module.preparing import TableMerger
 from backend.module.utils.fukusho_odds import FukushoOdds
-from bs4 import BeautifulSoup
-from sklearn.metrics import roc_auc_score
+from backend.module.utils.lazy import Lazy
+from backend.module.scraping import RaceCalendar
 
 # TODO: weight_horse, diff_weight_horseについて
 # TODO: LightGBM.PARAMSを書き換えたい (l.134)
@@ -31,7 +28,7 @@ class RankPredictor:
         lightgbmを用いて予測を行うためのモデル
     """
 
-    table_merger = TableMerger()
+    table_merger = Lazy(TableMerger)
 
     def __init__(self, prediction_extarctor, method='regression'):
         """
@@ -129,6 +126,8 @@ class RankPredictor:
         roc_auc_score: float
             予測の正答率 min 0, max 1.0
         """
+        # sklearnは読み込みに時間がかかるため、評価する時に初めてimportする
+        from sklearn.metrics import roc_auc_score
         return roc_auc_score(y_true, self.__get_predictions(X)['score'])
 
     def __create_model(self):
@@ -140,6 +139,8 @@ class RankPredictor:
         lgb_clf: lightgbm
             lightgbmを用いて予測を行うためのモデル
         """
+        # lightgbmは読み込みに時間がかかるため、モデルを作成する時に初めてimportする
+        import lightgbm as lgb
         if self.method == 'regression':
             lgb_clf = lgb.LGBMRegressor(**LightGBM.PARAMS)
         elif self.method == 'binary':
@@ -203,12 +204,8 @@ class RankPredictor:
             開催地に対応したマスタid
         """
         venue_ids = set()
-        for _date in date_ls:
-            url = 'https://race.netkeiba.com/top/race_list_sub.html?kaisai_date=' + _date.strftime('%Y%m%d')
-            responses = requests.get(url)
-            soup = BeautifulSoup(responses.content, "html.parser")
-            for race_list in soup.find_all('li'):
-                venue_ids.add(re.findall(r'\d+', race_list.find_all('a')[0].get('href'))[0][:10])
+        for race_id_ls in RaceCalendar().get_race_ids(date_ls).values():
+            venue_ids |= set(race_id[:10] for race_id in race_id_ls)
         if num == 'all':
             return list(venue_ids)
         else:
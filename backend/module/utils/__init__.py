@@ -1,2 +1,3 @@
 # flake8: noqa
 from .fukusho_odds import FukushoOdds
+from .lazy import Lazy
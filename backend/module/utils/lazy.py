@@ -0,0 +1,72 @@
+import threading
+from typing import Callable, Optional
+
+
+class Lazy:
+    """
+    初回参照時にloaderを呼び出して値を作成し、以降はその値を返すクラス属性
+
+    repository・mapping・preparingのクラスは、import時にテーブル全体を読み込んだり前処理したりしないよう、
+    raw_df, race_date_mapping, TableMergerの各テーブルなどのクラス属性にこれを用いる。
+    値はクラス(とそのインスタンス)の間で共有され、Lazy.refresh(cls)で破棄すると次回の参照時に読み込み直す。
+
+    Examples
+    --------
+    >>> class Race:
+    ...     raw_df = Lazy(read_race)
+    >>> Race.raw_df           # ここで初めてread_race()が呼ばれる
+    >>> Lazy.refresh(Race)    # 次回の参照時に読み込み直す
+    """
+
+    def __init__(self, loader: Callable) -> None:
+        """
+        Parameters
+        ----------
+        loader: Callable
+            引数なしで値を返す関数 (read_race, Resultなど)
+        """
+        self.loader = loader
+        self.name: Optional[str] = None
+        self.__value = None
+        self.__loaded = False
+        self.__lock = threading.Lock()
+
+    def __set_name__(self, owner, name: str) -> None:
+        self.name = name
+
+    def __get__(self, obj, owner=None):
+        if not self.__loaded:
+            with self.__lock:
+                if not self.__loaded:
+                    self.__value = self.loader()
+                    self.__loaded = True
+        return self.__value
+
+    @property
+    def loaded(self) -> bool:
+        return self.__loaded
+
+    def reset(self) -> None:
+        """
+        読み込んだ値を破棄し、次回の参照時にloaderを呼び出し直す
+        """
+        with self.__lock:
+            self.__value = None
+            self.__loaded = False
+
+    @staticmethod
+    def refresh(cls, *names: str) -> None:
+        """
+        clsとその親クラスのLazy属性を破棄する
+
+        Parameters
+        ----------
+        cls: type
+            対象のクラス
+        names: str
+            破棄する属性名 (指定しない場合は全てのLazy属性)
+        """
+        for klass in cls.__mro__:
+            for name, attribute in vars(klass).items():
+                if isinstance(attribute, Lazy) and (not names or name in names):
+                    attribute.reset()
@@ -1,43 +1,85 @@
+import argparse
+from datetime import date, timedelta
+from typing import Optional
+from backend.environment.scraping import Scraping
 from backend.module.repository import (
     Result,
-    Race,
-    HorseProfile,
-    RaceCard,
-    Refund
+    HorseProfile
 )
+from backend.module.scraping import RaceCalendar, ScrapeMetrics
 from backend.module.crud.read import (
-    read_race_id_ls,
-    read_horse_id_ls
+    read_horse_id_ls,
+    read_latest_race_date
 )
-scrape_year = '2022'
-
-race_id_dict = {}
-for place in range(1, 11):
-    race_id_place = {}
-    for kai in range(1, 13):
-        race_id_kai = []
-        for day in range(1, 13):
-            for r in range(1, 13):
-                race_id = scrape_year + str(place).zfill(2) + str(kai).zfill(2) + str(day).zfill(2) + str(r).zfill(2)
-                race_id_kai.append(race_id)
-        race_id_place[kai] = race_id_kai
-    race_id_dict[place] = race_id_place
-
-# Resultのスクレイピング
-Result.scrape(race_id_dict)
-
-# id_lsの取得
-race_id_ls = read_race_id_ls()
-horse_id_ls = read_horse_id_ls()
-
-# HorseProfileのスクレイピング
-HorseProfile.scrape(horse_id_ls)
-
-# Raceのスクレイピング
-Race.scrape(race_id_ls)
-
-# RaceCardのスクレイピング
-RaceCard.scrape(race_id_ls)
-
-# Returnのスクレイピング
-Refund.scrape(race_id_ls)
+from backend.module.crud.update import refresh_performance_views
+scrape_year = 2022
+
+
+def backfill(year: int) -> None:
+    """
+    year年に開催された全てのレースと、出走した馬のプロフィールをスクレイピングする
+    """
+    # 開催日程から実際に開催されたレースのrace_idのみ取得する
+    race_id_ls = list(RaceCalendar().load(year)['race_id'])
+
+    # Result, Race, RaceCard, Refundのスクレイピング
+    # (レースページは一度だけ取得し、全てのテーブルをまとめて更新する。解析は複数プロセスで行う)
+    Result.scrape_race_ids(race_id_ls)
+
+    # id_lsの取得
+    horse_id_ls = read_horse_id_ls()
+
+    # HorseProfileのスクレイピング
+    HorseProfile.scrape(horse_id_ls)
+
+
+def sync(since: Optional[date] = None) -> None:
+    """
+    race_date_mappingの最新の開催日のScraping.SYNC_LOOKBACK_DAYS日前以降に開催されたレースと、
+    それらに出走した馬のプロフィールのみスクレイピングする
+    (前回中断した場合に書き込まれていないレースも取得し直す。保存済みのレースはscrape内で除かれる)
+
+    Parameters
+    ----------
+    since: date default None
+        指定した場合は、race_date_mappingの代わりにこの日以降のレースを対象とする
+    """
+    if since is None:
+        latest_date = read_latest_race_date()
+        if latest_date is None:
+            raise ValueError('race_date_mappingにレースが保存されていません。先にbackfillを実行してください。')
+        since = latest_date - timedelta(days=Scraping.SYNC_LOOKBACK_DAYS)
+    race_id_ls = RaceCalendar().get_race_ids_since(since)
+    print(f'{since}以降に開催されたレースは{len(race_id_ls)}件です。')
+    if not race_id_ls:
+        return
+
+    Result.scrape_race_ids(race_id_ls)
+
+    # 新たに取得したレースに出走した馬のみ対象とする (保存済みの馬はscrape内で除かれる)
+    horse_id_ls = read_horse_id_ls(race_id_ls)
+    HorseProfile.scrape(horse_id_ls)
+
+
+# 解析プロセスから読み込まれた際に再度スクレイピングしないようにする
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='netkeibaからレースと馬のデータをスクレイピングする')
+    subparsers = parser.add_subparsers(dest='command')
+    backfill_parser = subparsers.add_parser('backfill', help='指定した年のレースを全てスクレイピングする')
+    backfill_parser.add_argument('--year', type=int, default=scrape_year)
+    sync_parser = subparsers.add_parser('sync', help='保存済みの最新の開催日付近以降のレースのみスクレイピングする')
+    sync_parser.add_argument('--since', type=date.fromisoformat, default=None, help='YYYY-MM-DD')
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'sync':
+            sync(args.since)
+        else:
+            backfill(getattr(args, 'year', scrape_year))
+        # 成績の累積値のマテリアライズドビューに、取得したレースを反映する
+        refresh_performance_views()
+    finally:
+        # 取得・解析にかかった時間の内訳を表示し、書き出す
+        metrics = ScrapeMetrics.shared()
+        metrics.report()
+        print(f'計測結果を{metrics.export()}に書き出しました。')
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from backend.module.scraping.normalizer import to_diff_time, to_horse_numbers, to_int, to_order, to_time_idx
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('1', 1),
+    ('12', 12),
+    ('除', None),
+    ('中', None),
+    ('取', None),
+    ('4(降)', None),
+    ('', None),
+    (None, None),
+])
+def test_to_order(text, expected):
+    assert to_order(text) == expected
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('ハナ', 0.08),
+    ('アタマ', 0.15),
+    ('クビ', 0.3),
+    ('同着', 0),
+    ('大', 10),
+    ('1/2', 0.5),
+    ('3/4', 0.75),
+    ('1', 1),
+    ('1.1/2', 1.5),
+    ('2.1/4', 2.25),
+    ('クビ+1/2', 0.8),
+])
+def test_to_diff_time(text, expected):
+    assert to_diff_time(text) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize('text', ['', None, 'abc'])
+def test_to_diff_time_without_diff(text):
+    # 1着馬など着差がない場合や解釈できない場合はNaN
+    assert np.isnan(to_diff_time(text))
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('230', 230),
+    ('1,030', 1030),
+    ('12,830', 12830),
+    ('', None),
+    (None, None),
+])
+def test_to_int(text, expected):
+    assert to_int(text) == expected
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('85', 85),
+    ('-5', -5),
+    ('-12', -12),
+    ('**', 0),
+    ('', 0),
+    (None, 0),
+])
+def test_to_time_idx(text, expected):
+    assert to_time_idx(text) == expected
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('3', [3, None, None]),
+    ('3 - 5', [3, 5, None]),
+    ('1 - 3 - 5', [1, 3, 5]),
+    ('3 → 5 → 1', [3, 5, 1]),
+    (None, [None, None, None]),
+])
+def test_to_horse_numbers(text, expected):
+    assert to_horse_numbers(text) == expected
@@ -0,0 +1,73 @@
+import pandas as pd
+import pytest
+from backend.module.scraping.pedigree_store import PedigreeStore
+
+
+def make_ped_page(ancestors: list) -> bytes:
+    """
+    peds_0, ..., peds_61の順に並べた祖先のhorse_idから、血統ページ(/horse/ped/<horse_id>)と同じ順番でtd要素を並べる
+    """
+    tds = ''.join(
+        f'<td><a href="/horse/{ancestors[num]}/">{ancestors[num]}</a></td>' if ancestors[num] else '<td></td>'
+        for num in PedigreeStore.transrate_num
+    )
+    return f'<html><body><table class="blood_table">{tds}</table></body></html>'.encode()
+
+
+@pytest.fixture
+def ancestors():
+    return [f'p{num}' for num in range(62)]
+
+
+def test_add_page_builds_five_generations(ancestors):
+    store = PedigreeStore()
+    store.add_page('H', make_ped_page(ancestors))
+    assert store.get_vector('H').tolist() == ancestors
+    assert store.get_missing('H') is None
+    # 血統表の馬とその4代目までの祖先の31頭の対応が追加される
+    added = store.pop_added()
+    assert len(added) == 31
+    assert added.set_index('horse_id').loc['H'].tolist() == ['p0', 'p1']
+    assert added.set_index('horse_id').loc['p0'].tolist() == ['p2', 'p3']
+    assert store.pop_added().empty
+
+
+def test_shared_ancestors_are_reused(ancestors):
+    store = PedigreeStore()
+    store.add_page('H', make_ped_page(ancestors))
+    store.add_page('K', make_ped_page(['p0'] + [f'q{num}' for num in range(1, 62)]))
+    # 父(p0)の血統はHの血統ページから分かっているため、取得し直す必要がない
+    assert store.get_missing('K') is None
+    assert store.get_vector('K')[[0, 2, 6]].tolist() == ['p0', 'p2', 'p6']
+
+
+def test_get_vector_leaves_unknown_ancestors_as_nan(ancestors):
+    ancestors[1] = None
+    store = PedigreeStore()
+    store.add_page('H', make_ped_page(ancestors))
+    vector = store.get_vector('H')
+    assert vector[0] == 'p0'
+    assert pd.isna(vector[1])
+    # 母が分からないため、母系の祖先も分からない
+    assert vector[4:6].isna().all()
+
+
+@pytest.mark.parametrize('html', [None, b'', b'<html><body><p>not found</p></body></html>'])
+def test_add_page_without_table_is_failed(html):
+    store = PedigreeStore()
+    store.add_page('X', html)
+    assert 'X' in store.failed
+    assert 'X' not in store
+    assert store.get_missing('X') is None
+
+
+def test_init_normalizes_saved_links():
+    pedigree_df = pd.DataFrame({
+        'horse_id': ['H'],
+        'father_id': ['/horse/ped/F/'],
+        'mother_id': [None],
+    })
+    store = PedigreeStore(pedigree_df)
+    assert store.links['H'] == ('F', None)
+    assert store.get_missing('H') == 'F'
+    assert store.pop_added().empty
@@ -0,0 +1,105 @@
+import os
+from datetime import date
+import numpy as np
+import pandas as pd
+import pytest
+from backend.module.scraping.race_page_extractor import RacePageExtractor
+
+RACE_ID = '202206010101'
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), 'fixtures', f'race_{RACE_ID}.html')
+
+
+@pytest.fixture(scope='module')
+def html():
+    with open(FIXTURE_PATH, 'rb') as f:
+        return f.read()
+
+
+@pytest.fixture(scope='module')
+def tables(html):
+    return RacePageExtractor()(RACE_ID, html)
+
+
+def test_extract_all_tables(tables):
+    assert list(tables) == RacePageExtractor.table_names
+    for df in tables.values():
+        assert (df['race_id'] == RACE_ID).all()
+
+
+def test_result(tables):
+    df = tables['result']
+    assert df['horse_id'].tolist() == ['2019104476', '2019105000', '2019106000']
+    # 競走中止など着順が数字でない場合は欠損値
+    assert df['order'].tolist()[:2] == [1, 2]
+    assert pd.isna(df['order'][2])
+    # 1着馬の着差はNaN
+    assert np.isnan(df['diff_time'][0])
+    assert df['diff_time'][1] == pytest.approx(0.3)
+    # 負のﾀｲﾑ指数は保持し、指数がない場合('**')は0
+    assert df['time_idx'].tolist() == [85, -5, 0]
+    assert df['prize'].tolist() == [520.0, 210.0, 0.0]
+    assert (df['ground_state_idx'] == -10).all()
+    assert (df['date'] == date(2022, 1, 5)).all()
+    assert df['remark'][2] == '競走中止'
+
+
+def test_race_date_mapping(tables):
+    assert tables['race_date_mapping'].to_dict('records') == [{'race_id': RACE_ID, 'date': date(2022, 1, 5)}]
+
+
+def test_race(tables):
+    race = tables['race'].iloc[0]
+    assert race['course_type'] == '芝'
+    assert race['course_len'] == 1800
+    assert race['turn'] == '右'
+    assert race['weather'] == '晴'
+    assert race['ground_state'] == '良'
+    assert race['race_class'] == '未勝利'
+    assert race['race_name'] == '3歳未勝利'
+    assert race['venue'] == '中山'
+    assert race['date'] == date(2022, 1, 5)
+    assert (race['nth_race'], race['nth_day'], race['nth_time']) == (1, 1, 1)
+
+
+def test_race_card(tables):
+    df = tables['race_card'].set_index('horse_number')
+    # 馬番順に並ぶ
+    assert df.index.tolist() == [1, 3, 5]
+    assert df['weight_horse'].tolist() == [0, 480, 466]
+    assert df['diff_weight_horse'].tolist() == [0, 4, -2]
+    assert df['age'].tolist() == [3, 3, 3]
+    assert df['jockey_id'].tolist() == ['01075', '01167', '05339']
+
+
+def test_refund(tables):
+    df = tables['refund'].set_index('betting')
+    assert set(df.index) == {
+        '単勝', '枠連', '馬連', '馬単', '三連複', '三連単',
+        '複勝_1', '複勝_2', '複勝_3', 'ワイド_12', 'ワイド_13', 'ワイド_23',
+    }
+    assert df.loc['単勝', ['money', 'popular', 'horse_number_0']].tolist() == [230, 1, 3]
+    assert pd.isna(df.loc['単勝', 'horse_number_1'])
+    assert df.loc[['複勝_1', '複勝_2', '複勝_3'], 'horse_number_0'].tolist() == [3, 5, 1]
+    assert df.loc[['複勝_1', '複勝_2', '複勝_3'], 'money'].tolist() == [110, 150, 400]
+    assert df.loc['ワイド_13', ['money', 'horse_number_0', 'horse_number_1']].tolist() == [1030, 1, 3]
+    assert df.loc['三連単', ['money', 'horse_number_0', 'horse_number_1', 'horse_number_2']].tolist() == [12830, 3, 5, 1]
+
+
+def test_table_names(html):
+    tables = RacePageExtractor(['race', 'refund'])(RACE_ID, html)
+    assert list(tables) == ['race', 'refund']
+
+
+def test_page_without_result_raises():
+    with pytest.raises(AttributeError):
+        RacePageExtractor()(RACE_ID, '<html><body><p>レースが存在しません</p></body></html>'.encode('euc_jp'))
+
+
+def test_failed_secondary_table_is_omitted(html):
+    # 払い戻しのテーブルがないページでは、refundのみ含まれない
+    html = html.replace('summary="払い戻し"'.encode('euc_jp'), b'')
+    html = html.replace('三連複'.encode('euc_jp'), b'')
+    tables = RacePageExtractor()(RACE_ID, html)
+    assert 'refund' not in tables
+    assert 'result' in tables
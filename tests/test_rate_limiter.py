@@ -0,0 +1,42 @@
+import asyncio
+import pytest
+from backend.module.scraping.rate_limiter import TokenBucket
+
+
+def test_slow_down_halves_rate_down_to_min_rate():
+    bucket = TokenBucket(rate=1)
+    bucket.slow_down()
+    assert bucket.rate == 0.5
+    for _ in range(10):
+        bucket.slow_down()
+    assert bucket.rate == TokenBucket.min_rate
+
+
+def test_speed_up_recovers_up_to_base_rate():
+    bucket = TokenBucket(rate=1)
+    bucket.slow_down()
+    bucket.speed_up()
+    assert bucket.rate == pytest.approx(0.6)
+    for _ in range(10):
+        bucket.speed_up()
+    assert bucket.rate == 1
+
+
+def test_acquire_waits_only_when_tokens_run_out(monkeypatch):
+    sleeps = list()
+
+    async def sleep(seconds):
+        sleeps.append(seconds)
+
+    async def acquire(bucket, n):
+        for _ in range(n):
+            await bucket.acquire()
+
+    monkeypatch.setattr(asyncio, 'sleep', sleep)
+    bucket = TokenBucket(rate=0.5, capacity=2)
+    asyncio.run(acquire(bucket, 2))
+    assert sleeps == []
+    # 3回目は1トークン分(1 / 0.5 = 2秒)待機する
+    asyncio.run(acquire(bucket, 1))
+    assert len(sleeps) == 1
+    assert sleeps[0] == pytest.approx(2, abs=0.01)